@@ -0,0 +1,165 @@
+"""Move past events and their bookings from the hot tables to the archive tables.
+
+An event qualifies once its date is more than ARCHIVE_AFTER_DAYS in the
+past. Events go in batches, each batch in three steps:
+  1. copy the events into events_archive, so archived bookings can reference them;
+  2. move their bookings ARCHIVE_BOOKING_BATCH_SIZE rows per transaction;
+  3. in one transaction, refresh the archived copies, delete the hot rows that
+     still have no bookings and log tombstones so delta-sync clients drop the events.
+Every step commits by itself and is safe to repeat. An interrupted run
+leaves consistent tables, and the next run carries on from where it stopped.
+
+This runs outside the API processes, so it can't clear their catalog response
+caches: archived events stay visible there for up to CATALOG_CACHE_TTL_SECONDS.
+
+Usage (from backend/):
+    python -m app.archive [--older-than-days 30] [--max-batches N] [--dry-run]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, delete, exists, func, insert, literal, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import database, models
+from .changes import delete_events
+from .logs import configure_logging, get_logger
+from .search import SQLITE_FTS_OPTIMIZE
+
+logger = get_logger(__name__)
+
+# Archival settings (override through the environment)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_EVENT_BATCH_SIZE = int(os.getenv("ARCHIVE_EVENT_BATCH_SIZE", "200"))
+ARCHIVE_BOOKING_BATCH_SIZE = int(os.getenv("ARCHIVE_BOOKING_BATCH_SIZE", "5000"))
+
+EVENT_COLUMNS = [column.name for column in models.Event.__table__.columns]
+BOOKING_COLUMNS = [column.name for column in models.Booking.__table__.columns]
+
+def _copy(source, target, columns, archived_at, where):
+    """INSERT INTO target (columns, archived_at) SELECT columns, :archived_at FROM source WHERE ..."""
+    return insert(target).from_select(
+        [*columns, "archived_at"],
+        select(*(getattr(source, name) for name in columns), literal(archived_at, DateTime()))
+        .where(*where),
+    )
+
+async def _next_event_batch(db: AsyncSession, cutoff: datetime, batch_size: int, after_id: int):
+    event = models.Event
+    # SQLite hands out max(id) + 1 for new rows, so keep the newest row to stop an archived id coming back
+    newest = select(func.max(event.id)).scalar_subquery()
+    return (await db.execute(
+        select(event.id)
+        .where(event.date < cutoff, event.id > after_id, event.id < newest)
+        .order_by(event.id)
+        .limit(batch_size)
+    )).scalars().all()
+
+async def _move_bookings(db: AsyncSession, event_ids, batch_size: int) -> int:
+    booking = models.Booking
+    newest = select(func.max(booking.id)).scalar_subquery()
+    moved = 0
+    while True:
+        ids = (await db.execute(
+            select(booking.id)
+            .where(booking.event_id.in_(event_ids), booking.id < newest)
+            .order_by(booking.id)
+            .limit(batch_size)
+        )).scalars().all()
+        if not ids:
+            return moved
+        archived_at = datetime.utcnow()
+        await db.execute(_copy(booking, models.ArchivedBooking, BOOKING_COLUMNS, archived_at, [booking.id.in_(ids)]))
+        await db.execute(delete(booking).where(booking.id.in_(ids)))
+        await db.commit()
+        moved += len(ids)
+
+async def archive_past_events(
+    db: AsyncSession,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_EVENT_BATCH_SIZE,
+    booking_batch_size: int = ARCHIVE_BOOKING_BATCH_SIZE,
+    max_batches: int = None,
+    dry_run: bool = False,
+):
+    started = time.perf_counter()
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    event, archived_event = models.Event, models.ArchivedEvent
+    report = {"cutoff": cutoff.isoformat(), "batches": 0, "events": 0, "bookings": 0, "deferred_events": 0}
+    if dry_run:
+        report["eligible_events"] = (await db.execute(
+            select(func.count()).select_from(event).where(event.date < cutoff)
+        )).scalar_one()
+        return report
+
+    after_id = 0
+    while max_batches is None or report["batches"] < max_batches:
+        event_ids = await _next_event_batch(db, cutoff, batch_size, after_id)
+        if not event_ids:
+            break
+        after_id = event_ids[-1]
+        archived_at = datetime.utcnow()
+
+        # 1. Archived copies first, so the bookings moved next have an event to point at
+        already = select(archived_event.id).where(archived_event.id.in_(event_ids))
+        await db.execute(_copy(event, archived_event, EVENT_COLUMNS, archived_at,
+                               [event.id.in_(event_ids), event.id.not_in(already)]))
+        await db.commit()
+
+        # 2. Bookings, in bounded transactions
+        report["bookings"] += await _move_bookings(db, event_ids, booking_batch_size)
+
+        # 3. Drop the hot rows of events whose bookings are all gone (a newer booking may have
+        # arrived, or been held back by the id guard; those events wait for the next run)
+        booking = models.Booking
+        no_bookings = ~exists().where(booking.event_id == event.id)
+        # Locking the rows holds off new bookings (their foreign key check waits) until the commit
+        done = (await db.execute(
+            select(event.id).where(event.id.in_(event_ids), no_bookings).with_for_update()
+        )).scalars().all()
+        removed = 0
+        if done:
+            # Refresh the copies in case the hot rows changed since step 1 (e.g. a late booking)
+            await db.execute(
+                update(archived_event)
+                .where(archived_event.id.in_(done))
+                .values({
+                    name: select(getattr(event, name)).where(event.id == archived_event.id).scalar_subquery()
+                    for name in EVENT_COLUMNS if name != "id"
+                })
+                .execution_options(synchronize_session=False)
+            )
+            # Re-checked by the DELETE itself: a booking that landed after the SELECT above keeps its
+            # event hot (no orphan on SQLite, no foreign key error aborting the run on Postgres)
+            removed = await delete_events(db, done, no_bookings)
+        await db.commit()
+        report["batches"] += 1
+        report["events"] += removed
+        report["deferred_events"] += len(event_ids) - removed
+        logger.info("archive batch committed", extra={"events": removed, "last_event_id": after_id})
+
+    if report["events"] and db.bind.dialect.name == "sqlite":
+        await db.execute(text(SQLITE_FTS_OPTIMIZE))
+        await db.commit()
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info("archive run finished", extra=report)
+    return report
+
+async def _main(args):
+    async with database.get_async_sessionmaker()() as db:
+        report = await archive_past_events(
+            db, args.older_than_days, args.batch_size, args.booking_batch_size, args.max_batches, args.dry_run
+        )
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move past events and their bookings to the archive tables.")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_EVENT_BATCH_SIZE, help="events per batch")
+    parser.add_argument("--booking-batch-size", type=int, default=ARCHIVE_BOOKING_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, help="stop after this many batches (resume with another run)")
+    parser.add_argument("--dry-run", action="store_true", help="count eligible events without moving anything")
+    configure_logging()
+    asyncio.run(_main(parser.parse_args()))
@@ -78,15 +78,22 @@
 #     return user
 
 
+import os
+import time
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app import models
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
+from .cache import TTLCache
 from .database import get_db
-import bcrypt
+from .hashing import password_hasher
+from .logs import get_logger
+
+logger = get_logger(__name__)
 
 SECRET_KEY = "yash"  # Consider using a more secure secret key in production
 ALGORITHM = "HS256"
@@ -94,55 +101,102 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # Fix the tokenUrl to match your actual login endpoint
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
+# Same scheme for routes where signing in is optional: a missing token yields None instead of 401
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login", auto_error=False)
+
+# bcrypt runs on a bounded pool and raises 503 when it is saturated
+async def hash_password(password: str):
+    return await password_hasher.hash_async(password)
 
-def hash_password(password: str):
-    # Encode the password to bytes before hashing
-    encoded_password = password.encode('utf-8')
-    # Generate a salt and hash the password
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(encoded_password, salt)
-    return hashed.decode('utf-8')
+async def verify_password(plain_password: str, hashed_password: str):
+    return await password_hasher.verify_async(plain_password, hashed_password)
 
-def verify_password(plain_password: str, hashed_password: str):
-    # Encode both passwords to bytes before comparison
-    encoded_plain = plain_password.encode('utf-8')
-    encoded_hashed = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(encoded_plain, encoded_hashed)
+def password_needs_rehash(hashed_password: str):
+    return password_hasher.needs_rehash(hashed_password)
 
 # JWT creation
 def create_access_token(data: dict, expires_delta: timedelta = None):
-    print("Key used for encoding:", SECRET_KEY)
     to_encode = data.copy()
     # Use the constant for expiration
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# Authenticated-user caches (override sizes/TTL through the environment)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# token -> (user_id, exp); lets repeat requests skip JWT signature checks
+token_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+# user_id -> schemas.User principal; lets repeat requests skip the users query
+user_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+
+def invalidate_user(user_id: int):
+    user_cache.delete(user_id)
+    token_cache.delete_where(lambda token, claims: claims[0] == user_id)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+def decode_token(token: str):
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user_id_str: str = payload.get("sub")
+    if user_id_str is None:
+        raise ValueError("missing sub")
+    claims = (int(user_id_str), payload.get("exp"))
+    ttl = claims[1] - time.time() if claims[1] is not None else None
+    token_cache.set(token, claims, ttl=ttl)
+    return claims
+
 # JWT validation (used in protected routes)
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    print("Key used for decoding:", SECRET_KEY)
     try:
-        print("Token received:", token)
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print("Decoded payload:", payload)
-        user_id_str: str = payload.get("sub")
-        if user_id_str is None:
-            print("No 'sub' field in payload")
-            raise credentials_exception
-        user_id = int(user_id_str)
-        print("User ID:", user_id)
+        user_id, _ = decode_token(token)
     except (JWTError, ValueError) as e:
-        print(f"JWT Error: {e}")
+        logger.info("rejected bearer token", extra={"reason": type(e).__name__})
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    principal = user_cache.get(user_id)
+    if principal is not None:
+        return principal
+    user = await db.get(models.User, user_id)
     if user is None:
-        print("User not found in database")
+        logger.info("token subject not found", extra={"user_id": user_id})
         raise credentials_exception
-    print(f"User found: {user.email}")
-    return user
\ No newline at end of file
+    principal = schemas.User.model_validate(user, from_attributes=True)
+    user_cache.set(user_id, principal)
+    return principal
+
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+
+# Emails allowed to own events, see their stats and export attendees (comma-separated).
+# Empty lets any signed-in user in development and nobody in production (fail closed)
+ORGANIZER_EMAILS = {email.strip().lower() for email in os.getenv("ORGANIZER_EMAILS", "").split(",") if email.strip()}
+
+def is_organizer(user: schemas.User) -> bool:
+    if ORGANIZER_EMAILS:
+        return user.email.lower() in ORGANIZER_EMAILS
+    return ENVIRONMENT != "production"
+
+async def get_current_organizer(current_user: schemas.User = Depends(get_current_user)):
+    if not is_organizer(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Organizer access required")
+    return current_user
+
+# For routes open to anonymous callers that record the organizer when one is signed in;
+# a token that is present must be valid, but a non-organizer is treated like an anonymous caller
+async def get_optional_organizer(token: str = Depends(optional_oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    if token is None:
+        return None
+    user = await get_current_user(token, db)
+    return user if is_organizer(user) else None
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+
+# Seat availability stream settings (override through the environment)
+STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", "20000"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+STREAM_RETRY_MS = int(os.getenv("STREAM_RETRY_MS", "3000"))
+
+def encode_message(version: int, event_id: int, remaining_seats, capacity) -> bytes:
+    data = orjson.dumps({"event_id": event_id, "remaining_seats": remaining_seats, "capacity": capacity})
+    return b"id: %d\nevent: availability\ndata: %s\n\n" % (version, data)
+
+class Topic:
+    """Latest availability of one event plus the signal subscribers wait on.
+
+    Only the newest message is kept: a subscriber that falls behind skips straight
+    to it (coalescing), so a slow client costs no memory and never blocks publish.
+    """
+
+    __slots__ = ("version", "message", "changed", "subscribers")
+
+    def __init__(self):
+        self.version = 0
+        self.message = None
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+
+class AvailabilityBroker:
+    """In-process pub/sub of per-event seat counts for the SSE stream.
+
+    Each publish encodes the message once and wakes every waiting subscriber.
+    Subscribers hold only their topic and the last version they sent.
+    """
+
+    def __init__(self, max_subscribers: int, heartbeat: float):
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self._topics = {}
+        self.subscribers = 0
+        self.published = 0
+        self._heartbeat_task = None
+
+    def watched(self, event_ids):
+        return [event_id for event_id in event_ids if event_id in self._topics]
+
+    def publish(self, event_id: int, remaining_seats, capacity):
+        topic = self._topics.get(event_id)
+        if topic is None:
+            return
+        topic.version += 1
+        topic.message = encode_message(topic.version, event_id, remaining_seats, capacity)
+        self._wake(topic)
+        self.published += 1
+
+    @staticmethod
+    def _wake(topic: Topic):
+        # Swap in a fresh Event before waking waiters so they re-wait on the new one
+        changed, topic.changed = topic.changed, asyncio.Event()
+        changed.set()
+
+    async def _beat(self):
+        # One timer for all subscribers instead of a timeout per connection
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for topic in list(self._topics.values()):
+                self._wake(topic)
+
+    def subscribe(self, event_id: int) -> "Subscription":
+        if self.subscribers >= self.max_subscribers:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many availability subscribers, try again later",
+                headers={"Retry-After": "5"},
+            )
+        loop = asyncio.get_running_loop()
+        if self._heartbeat_task is None or self._heartbeat_task.done() or self._heartbeat_task.get_loop() is not loop:
+            self._heartbeat_task = loop.create_task(self._beat())
+        topic = self._topics.get(event_id)
+        if topic is None:
+            topic = self._topics[event_id] = Topic()
+        topic.subscribers += 1
+        self.subscribers += 1
+        return Subscription(self, event_id, topic)
+
+    def _unsubscribe(self, event_id: int, topic: Topic):
+        topic.subscribers -= 1
+        self.subscribers -= 1
+        if topic.subscribers == 0 and self._topics.get(event_id) is topic:
+            del self._topics[event_id]
+
+    def stats(self):
+        return {
+            "subscribers": self.subscribers,
+            "topics": len(self._topics),
+            "published": self.published,
+            "max_subscribers": self.max_subscribers,
+        }
+
+class Subscription:
+    """One connected client. `seen` starts at the topic version when the client
+    subscribed, so a publish that races the snapshot query is still delivered."""
+
+    __slots__ = ("broker", "event_id", "topic", "seen", "closed")
+
+    def __init__(self, broker: AvailabilityBroker, event_id: int, topic: Topic):
+        self.broker = broker
+        self.event_id = event_id
+        self.topic = topic
+        self.seen = topic.version
+        self.closed = False
+
+    def close(self):
+        # Called from the generator's finally and from the response background task;
+        # the latter covers clients that disconnect before the first frame is sent
+        if not self.closed:
+            self.closed = True
+            self.broker._unsubscribe(self.event_id, self.topic)
+
+    async def stream(self, snapshot: bytes):
+        """Yield SSE frames until the client goes away."""
+        topic = self.topic
+        try:
+            yield b"retry: %d\n" % STREAM_RETRY_MS + snapshot
+            while True:
+                if topic.version != self.seen:
+                    self.seen = topic.version
+                    yield topic.message
+                    continue
+                await topic.changed.wait()
+                if topic.version == self.seen:
+                    # Heartbeat wake-up: a comment frame keeps proxies from closing the idle connection
+                    yield b": keepalive\n\n"
+        finally:
+            self.close()
+
+availability_broker = AvailabilityBroker(STREAM_MAX_SUBSCRIBERS, STREAM_HEARTBEAT_SECONDS)
+
+async def publish_seats(db: AsyncSession, event_ids):
+    """Push current seat counts for the given events to any connected subscribers."""
+    watched = availability_broker.watched(set(event_ids))
+    if not watched:
+        return
+    result = await db.execute(
+        select(models.Event.id, models.Event.remaining_seats, models.Event.capacity)
+        .where(models.Event.id.in_(watched))
+    )
+    for event_id, remaining_seats, capacity in result:
+        availability_broker.publish(event_id, remaining_seats, capacity)
@@ -0,0 +1,121 @@
+"""Catalog delta sync: what changed in the events table since a client's cursor.
+
+Changes are read from two ordered streams: events by (updated_at, id), and
+the tombstone log by (deleted_at, event_id). A sync cursor is a position
+(timestamp, kind, id) in their merge, with kind 0 for updates and 1 for
+deletes. When a client has caught up, its cursor is held back to
+CHANGES_SETTLE_SECONDS before now. A transaction that stamped its rows
+earlier but committed later is therefore still picked up. Clients may see
+a change twice, so they apply changes as idempotent upserts and deletes.
+"""
+import base64
+import os
+from datetime import datetime, timedelta
+from typing import Iterable
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import fastjson, models, schemas
+
+# Longest expected gap between stamping a row and committing it (override through the environment)
+CHANGES_SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", "2"))
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+
+UPDATED, DELETED = 0, 1
+# Sorts after every change at its timestamp: "everything up to and including ts"
+_ALL = 2
+
+def encode_sync_cursor(ts: datetime, kind: int, event_id: int) -> str:
+    raw = f"{ts.isoformat()}|{kind}|{event_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_sync_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts, kind, event_id = raw.split("|")
+        position = datetime.fromisoformat(ts), int(kind), int(event_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+    if position[1] not in (UPDATED, DELETED, _ALL):
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+    return position
+
+def _after(ts_column, id_column, kind: int, position):
+    """Rows of stream `kind` whose merged position is after the cursor."""
+    ts, cursor_kind, event_id = position
+    if kind < cursor_kind:
+        return ts_column > ts
+    if kind > cursor_kind:
+        return ts_column >= ts
+    return tuple_(ts_column, id_column) > tuple_(ts, event_id)
+
+def settled_position(seconds: float = 0.0):
+    return datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS + seconds), _ALL, 0
+
+async def fetch_snapshot(db: AsyncSession, lag_seconds: float = 0.0):
+    # The cursor is taken before the read, so anything the snapshot might miss is replayed as a change
+    position = settled_position(lag_seconds)
+    rows = (await db.execute(fastjson.select_fields(schemas.Event, models.Event).order_by(models.Event.id))).all()
+    return {"items": rows, "deleted": [], "next_cursor": encode_sync_cursor(*position), "has_more": False}
+
+async def fetch_changes(db: AsyncSession, since: str, limit: int = DEFAULT_CHANGES_LIMIT, lag_seconds: float = 0.0):
+    position = decode_sync_cursor(since)
+    # lag_seconds widens the settle window, e.g. by the replication lag bound on a replica
+    settled = settled_position(lag_seconds)
+    event = models.Event
+    fields = fastjson.response_fields(schemas.Event)
+    updated = (await db.execute(
+        select(event.updated_at, *(getattr(event, name) for name in fields))
+        .where(_after(event.updated_at, event.id, UPDATED, position))
+        .order_by(event.updated_at, event.id)
+        .limit(limit + 1)
+    )).all()
+    tombstone = models.EventTombstone
+    deleted = (await db.execute(
+        select(tombstone.deleted_at, tombstone.event_id)
+        .where(_after(tombstone.deleted_at, tombstone.event_id, DELETED, position))
+        .order_by(tombstone.deleted_at, tombstone.event_id)
+        .limit(limit + 1)
+    )).all()
+
+    merged = sorted(
+        [((row[0], UPDATED, row.id), row[1:]) for row in updated]
+        + [((row.deleted_at, DELETED, row.event_id), row.event_id) for row in deleted]
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+    if has_more:
+        next_position = merged[-1][0]
+    else:
+        # Caught up: hold the cursor back to the settled point, but never move it backwards
+        next_position = max(position, settled)
+    return {
+        "items": [item for key, item in merged if key[1] == UPDATED],
+        "deleted": [item for key, item in merged if key[1] == DELETED],
+        "next_cursor": encode_sync_cursor(*next_position),
+        "has_more": has_more,
+    }
+
+def encode_changes(page) -> bytes:
+    fields = fastjson.response_fields(schemas.Event)
+    return fastjson.dumps({**page, "items": fastjson.row_dicts(fields, page["items"])})
+
+async def delete_events(db: AsyncSession, event_ids: Iterable[int], *where):
+    """Delete events and log their tombstones in the caller's transaction (not committed here).
+
+    Extra `where` clauses are checked by the DELETE itself; only rows actually removed get a tombstone.
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return 0
+    deleted_at = datetime.utcnow()
+    result = await db.execute(
+        delete(models.Event).where(models.Event.id.in_(event_ids), *where).returning(models.Event.id)
+    )
+    removed = result.scalars().all()
+    if removed:
+        await db.execute(
+            insert(models.EventTombstone), [{"event_id": event_id, "deleted_at": deleted_at} for event_id in removed]
+        )
+    return len(removed)
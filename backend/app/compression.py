@@ -0,0 +1,129 @@
+import gzip
+import os
+import time
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: install `brotli` to serve Content-Encoding: br
+    brotli = None
+
+# Response compression settings (override through the environment)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+# Cached bodies are compressed once per cache version, so they can afford smaller, slower output
+CACHED_GZIP_LEVEL = int(os.getenv("CACHED_GZIP_LEVEL", "9"))
+CACHED_BROTLI_QUALITY = int(os.getenv("CACHED_BROTLI_QUALITY", "8"))
+
+# Preferred first; brotli only when the module is installed
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/plain", "text/csv", "text/html")
+
+def choose_encoding(accept_encoding: str):
+    """Pick the best supported coding from an Accept-Encoding header, or None for identity."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip()] = quality
+    wildcard = offered.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = offered.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class CompressionStats:
+    def __init__(self):
+        self.responses = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def record(self, encoding: str, size_in: int, size_out: int, seconds: float):
+        self.responses[encoding] = self.responses.get(encoding, 0) + 1
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+        self.seconds += seconds
+
+    def stats(self) -> dict:
+        return {
+            "encodings": list(ENCODINGS),
+            "responses": dict(self.responses),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+            "compress_seconds": round(self.seconds, 4),
+        }
+
+compression_stats = CompressionStats()
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    started = time.perf_counter()
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=CACHED_BROTLI_QUALITY if cached else BROTLI_QUALITY)
+    else:
+        # mtime=0 keeps the output (and so the ETag of a cached variant) deterministic
+        compressed = gzip.compress(body, compresslevel=CACHED_GZIP_LEVEL if cached else GZIP_LEVEL, mtime=0)
+    compression_stats.record(encoding, len(body), len(compressed), time.perf_counter() - started)
+    return compressed
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing complete responses above COMPRESSION_MIN_BYTES.
+
+    Streaming responses (SSE, exports) and responses that already carry a
+    Content-Encoding, such as the precompressed catalog cache, pass through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    await send(message)
+                else:
+                    # Held until the first body chunk shows whether the response is complete
+                    start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            held, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < COMPRESSION_MIN_BYTES:
+                await send(held)
+                await send(message)
+                return
+            compressed = compress(body, encoding)
+            headers = MutableHeaders(scope=held)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(held)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
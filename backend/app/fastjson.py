@@ -0,0 +1,21 @@
+import os
+import orjson
+from sqlalchemy import select
+
+# Opt-in fast path for list endpoints: select plain columns and encode rows with orjson,
+# skipping ORM identity mapping and per-row Pydantic validation
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+def response_fields(schema):
+    """Field names in the order Pydantic would serialize them."""
+    return tuple(schema.model_fields)
+
+def select_fields(schema, model):
+    return select(*(getattr(model, name) for name in response_fields(schema)))
+
+def row_dicts(fields, rows):
+    return [dict(zip(fields, row)) for row in rows]
+
+def dumps(content) -> bytes:
+    # Naive datetimes encode like Pydantic's ISO output; non-ASCII stays UTF-8 as with FastAPI
+    return orjson.dumps(content)
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from fastapi import HTTPException, status
+
+# Password hashing settings (override through the environment)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded worker pool.
+
+    At most `workers` hashes run at once and at most `max_queue` more may wait;
+    anything beyond that is rejected with 503 instead of tying up the request
+    threadpool that every other endpoint shares.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_queue: int, latency_window: int = 1024):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._latency_total = 0.0
+        self._latencies = deque(maxlen=latency_window)
+
+    def _run(self, fn, *args):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._latency_total += elapsed
+                self._latencies.append(elapsed)
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self._queued += 1
+        try:
+            future = self._executor.submit(self._run, fn, *args)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        # A future cancelled before a worker picked it up never ran _run, so it is still counted as queued
+        # (asyncio.wrap_future cancels it when the awaiting request is cancelled, e.g. on client disconnect)
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+        self._slots.release()
+
+    def _hash_args(self, password: str):
+        return bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds)
+
+    def _verify_args(self, password: str, hashed_password: str):
+        return bcrypt.checkpw, password.encode("utf-8"), hashed_password.encode("utf-8")
+
+    def hash(self, password: str) -> str:
+        return self._submit(*self._hash_args(password)).result().decode("utf-8")
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._submit(*self._verify_args(password, hashed_password)).result()
+
+    # Awaitable variants for async handlers: the event loop is free while bcrypt runs
+    async def hash_async(self, password: str) -> str:
+        hashed = await asyncio.wrap_future(self._submit(*self._hash_args(password)))
+        return hashed.decode("utf-8")
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(*self._verify_args(password, hashed_password)))
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        # bcrypt hashes look like $2b$<rounds>$<salt+hash>; stronger hashes are left alone,
+        # so lowering BCRYPT_ROUNDS never downgrades existing passwords
+        try:
+            return int(hashed_password.split("$")[2]) < self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            completed = self._completed
+            snapshot = {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": completed,
+                "rejected": self._rejected,
+                "latency_avg_ms": round(self._latency_total / completed * 1000, 2) if completed else 0.0,
+            }
+        for name, pct in (("latency_p50_ms", 0.50), ("latency_p99_ms", 0.99)):
+            snapshot[name] = round(latencies[int(pct * (len(latencies) - 1))] * 1000, 2) if latencies else 0.0
+        return snapshot
+
+password_hasher = PasswordHasher(BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request, Response
+from . import compression
+from .cache import TTLCache
+
+# Catalog response cache settings (override through the environment)
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "30"))
+CATALOG_CACHE_MAX_SIZE = int(os.getenv("CATALOG_CACHE_MAX_SIZE", "1024"))
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "0"))
+
+# variants holds compressed copies of body, filled lazily per Content-Encoding;
+# headers are extra response headers that belong to the body (e.g. a pagination cursor)
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "last_modified", "variants", "headers"])
+
+def variant_etag(etag: str, encoding) -> str:
+    # Each encoding is a different representation, so it needs its own strong validator
+    return etag if encoding is None else etag[:-1] + "-" + encoding + '"'
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+class ResponseCache:
+    """Versioned cache of encoded JSON responses with ETag/Last-Modified support.
+
+    Writers call `invalidate()`, which bumps the version and drops every entry.
+    The TTL bounds how stale a worker can be when another worker did the write.
+    """
+
+    def __init__(self, max_size: int, ttl: float, max_age: int):
+        self._entries = TTLCache(max_size, ttl)
+        self._lock = threading.Lock()
+        self.max_age = max_age
+        self.version = 0
+        self.invalidated_at = float("-inf")
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.not_modified = 0
+
+    @staticmethod
+    def key(request: Request) -> str:
+        return request.url.path + "?" + "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+
+    def get(self, key: str):
+        return self._entries.get(key)
+
+    def store(self, key: str, version: int, body: bytes, cacheable: bool = True, headers=None) -> CachedResponse:
+        entry = CachedResponse(body, '"' + hashlib.sha1(body).hexdigest() + '"', self.last_modified, {}, headers or {})
+        # Don't cache a body computed before a concurrent invalidation
+        with self._lock:
+            if cacheable and version == self.version:
+                self._entries.set(key, entry)
+        return entry
+
+    def invalidated_within(self, seconds: float) -> bool:
+        return time.monotonic() - self.invalidated_at < seconds
+
+    def invalidate(self):
+        with self._lock:
+            self.invalidated_at = time.monotonic()
+            self.version += 1
+            self.last_modified = formatdate(time.time(), usegmt=True)
+            self._entries.clear()
+
+    def is_not_modified(self, request: Request, entry: CachedResponse) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return any(_etag_matches(if_none_match, variant_etag(entry.etag, encoding))
+                       for encoding in (None, *compression.ENCODINGS))
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                return parsedate_to_datetime(entry.last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def encoded(self, entry: CachedResponse, encoding):
+        """Return the body in `encoding`, compressing it at most once per cache entry."""
+        if encoding is None:
+            return entry.body
+        body = entry.variants.get(encoding)
+        if body is None:
+            body = entry.variants[encoding] = compression.compress(entry.body, encoding, cached=True)
+        return body
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        encoding = None
+        if len(entry.body) >= compression.COMPRESSION_MIN_BYTES:
+            encoding = compression.choose_encoding(request.headers.get("accept-encoding", ""))
+        headers = {
+            **entry.headers,
+            "ETag": variant_etag(entry.etag, encoding),
+            "Last-Modified": entry.last_modified,
+            "Cache-Control": f"public, max-age={self.max_age}, must-revalidate",
+            "Vary": "Accept-Encoding",
+        }
+        if self.is_not_modified(request, entry):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.encoded(entry, encoding), media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {**self._entries.stats(), "version": self.version, "not_modified": self.not_modified}
+
+catalog_cache = ResponseCache(CATALOG_CACHE_MAX_SIZE, CATALOG_CACHE_TTL_SECONDS, CATALOG_MAX_AGE)
@@ -0,0 +1,65 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+from fastapi import HTTPException, Response, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+
+# How long a stored response can be replayed (override through the environment)
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+def fingerprint(path: str, body: str) -> str:
+    return hashlib.sha256(f"{path}\n{body}".encode("utf-8")).hexdigest()
+
+def validate_key(key: str):
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters",
+        )
+
+async def replay(db: AsyncSession, user_id: int, key: str, request_hash: str):
+    """Return the stored response for (user, key), or None if the request should run."""
+    result = await db.execute(
+        select(models.IdempotencyKey).where(
+            models.IdempotencyKey.user_id == user_id, models.IdempotencyKey.key == key
+        )
+    )
+    stored = result.scalars().first()
+    if stored is None:
+        return None
+    if stored.expires_at <= datetime.utcnow():
+        await db.delete(stored)
+        await db.flush()
+        return None
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request",
+        )
+    return Response(
+        content=stored.response_body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+def remember(db: AsyncSession, user_id: int, key: str, request_hash: str, status_code: int, body: str):
+    # Added to the caller's transaction so the response is stored iff the booking commits
+    now = datetime.utcnow()
+    db.add(models.IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        status_code=status_code,
+        response_body=body,
+        created_at=now,
+        expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+    ))
+
+async def purge_expired(db: AsyncSession) -> int:
+    result = await db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.expires_at <= datetime.utcnow()))
+    await db.commit()
+    return result.rowcount
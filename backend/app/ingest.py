@@ -0,0 +1,191 @@
+import csv
+import json
+import os
+from pydantic import ValidationError
+from sqlalchemy import case, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from . import models, schemas
+
+# Bulk ingestion settings (override through the environment)
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+BULK_MAX_BATCH_SIZE = 10000
+# Cap on reported row errors so a bad feed can't grow the response without bound
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+
+async def iter_lines(chunks):
+    """Yield decoded lines from an async byte-chunk stream without buffering the whole body."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+async def iter_ndjson_records(lines):
+    row = 0
+    async for line in lines:
+        row += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, None, "expected a JSON object"
+            continue
+        yield row, record, None
+
+async def iter_csv_records(lines):
+    header = None
+    row = 0
+    buffered = []
+    async for line in lines:
+        buffered.append(line)
+        # A record is complete once its quotes are balanced (embedded newlines stay inside quotes)
+        text = "\n".join(buffered)
+        if text.count('"') % 2:
+            continue
+        buffered = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty CSV cells mean "not provided"
+        yield row, {name: value for name, value in zip(header, values) if value != ""}, None
+    if buffered:
+        yield row + 1, None, "unterminated quoted field"
+
+def validate_record(record: dict):
+    try:
+        event = schemas.EventCreate(**record)
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return {**event.dict(), "remaining_seats": event.capacity}, None
+
+def upsert_statement(dialect: str):
+    dialect_insert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}[dialect]
+    statement = dialect_insert(models.Event)
+    excluded = statement.excluded
+    event = models.Event
+    # Keep seats already sold when a feed changes an event's capacity (or gives an unlimited
+    # event one); a capacity below the tickets already sold leaves no seats, not a negative count
+    remaining = case(
+        (event.capacity.is_(None), excluded.capacity - event.tickets_sold),
+        else_=event.remaining_seats + excluded.capacity - event.capacity,
+    )
+    remaining = case(
+        (excluded.capacity.is_(None), excluded.remaining_seats),
+        (remaining < 0, 0),
+        else_=remaining,
+    )
+    updates = {name: excluded[name] for name in schemas.EventCreate.model_fields if name != "external_id"}
+    # Column onupdate defaults don't apply to ON CONFLICT DO UPDATE, so bump updated_at explicitly.
+    # The WHERE guard leaves another organizer's event untouched even if it appears mid-batch.
+    return statement.on_conflict_do_update(
+        index_elements=[event.external_id],
+        set_={**updates, "remaining_seats": remaining, "updated_at": excluded.updated_at},
+        where=event.organizer_id.is_not_distinct_from(excluded.organizer_id),
+    )
+
+class BulkIngestor:
+    """Validates records and writes them in fixed-size batches, one transaction per batch."""
+
+    def __init__(self, db: AsyncSession, batch_size: int, upsert: bool, organizer_id=None, on_batch_committed=None):
+        self.db = db
+        self.batch_size = batch_size
+        self.upsert = upsert
+        # Stamped on inserted rows; an upsert keeps the existing event's organizer
+        self.organizer_id = organizer_id
+        self.on_batch_committed = on_batch_committed
+        self.statement = upsert_statement(db.bind.dialect.name) if upsert else insert(models.Event)
+        self.batch = []
+        self.batch_rows = []
+        self.report = {"received": 0, "written": 0, "failed": 0, "batches": 0, "errors": [], "errors_truncated": False}
+
+    def error(self, row: int, message: str):
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < BULK_MAX_ERRORS:
+            self.report["errors"].append({"row": row, "error": message})
+        else:
+            self.report["errors_truncated"] = True
+
+    async def add(self, row: int, record, parse_error):
+        self.report["received"] += 1
+        if parse_error is not None:
+            return self.error(row, parse_error)
+        values, validation_error = validate_record(record)
+        if validation_error is not None:
+            return self.error(row, validation_error)
+        if self.upsert and values.get("external_id") is None:
+            return self.error(row, "external_id: required in upsert mode")
+        self.batch.append({**values, "organizer_id": self.organizer_id})
+        self.batch_rows.append(row)
+        if len(self.batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        if not self.batch:
+            return
+        batch, rows = self.batch, self.batch_rows
+        self.batch, self.batch_rows = [], []
+        self.report["batches"] += 1
+        if self.upsert:
+            batch, rows = await self.drop_foreign(batch, rows)
+            if not batch:
+                return
+        try:
+            await self.db.execute(self.statement, batch)
+            await self.db.commit()
+            written = len(batch)
+        except SQLAlchemyError:
+            await self.db.rollback()
+            written = await self.write_rows(batch, rows)
+        self.report["written"] += written
+        if written and self.on_batch_committed is not None:
+            self.on_batch_committed()
+
+    async def drop_foreign(self, batch, rows):
+        """Report upsert rows whose external_id belongs to another organizer's event instead of writing them."""
+        result = await self.db.execute(
+            select(models.Event.external_id).where(
+                models.Event.external_id.in_({values["external_id"] for values in batch}),
+                models.Event.organizer_id.is_distinct_from(self.organizer_id),
+            )
+        )
+        foreign = set(result.scalars())
+        if not foreign:
+            return batch, rows
+        kept, kept_rows = [], []
+        for values, row in zip(batch, rows):
+            if values["external_id"] in foreign:
+                self.error(row, "external_id: belongs to an event owned by another organizer")
+            else:
+                kept.append(values)
+                kept_rows.append(row)
+        return kept, kept_rows
+
+    async def write_rows(self, batch, rows):
+        """Retry a rejected batch one row per SAVEPOINT, so only the offending rows fail."""
+        written = 0
+        for values, row in zip(batch, rows):
+            try:
+                async with self.db.begin_nested():
+                    await self.db.execute(self.statement, [values])
+            except SQLAlchemyError as e:
+                self.error(row, f"rejected by database: {type(getattr(e, 'orig', e)).__name__}: {getattr(e, 'orig', e)}")
+            else:
+                written += 1
+        await self.db.commit()
+        return written
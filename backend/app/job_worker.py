@@ -0,0 +1,32 @@
+"""Drain the background job queue outside the API processes.
+
+Runs JOB_WORKERS workers of app.jobs.job_queue until interrupted. Pair it
+with JOB_WORKERS=0 on the API processes so only this process sends mail.
+It is a module of its own so that `python -m` imports app.jobs normally:
+run as __main__, jobs.py would be a second copy whose HANDLERS the
+registered handlers never reach.
+
+Usage (from backend/):
+    JOB_WORKERS=4 python -m app.job_worker
+"""
+import asyncio
+from . import database, notifications  # notifications registers the handlers
+from .jobs import job_queue
+from .logs import configure_logging
+
+async def _main():
+    if job_queue.workers <= 0:
+        raise SystemExit("JOB_WORKERS must be at least 1")
+    job_queue.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await job_queue.stop()
+        await database.dispose_engines()
+
+if __name__ == "__main__":
+    configure_logging()
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,369 @@
+"""Durable background jobs stored in the jobs table.
+
+enqueue() only adds a row to the caller's session, so a job commits or rolls
+back together with the change that needs it. JobQueue runs JOB_WORKERS
+asyncio workers inside the API process. A worker claims due jobs with one
+UPDATE ... RETURNING. The UPDATE increments attempts and pushes run_at
+forward by the visibility timeout. On PostgreSQL the claim uses
+FOR UPDATE SKIP LOCKED, so several processes never claim the same job.
+If the worker dies, the job becomes due again once the timeout passes.
+Delivery is therefore at-least-once, and handlers must tolerate repeats.
+A failed job is retried with exponential backoff and jitter. After
+max_attempts failures it is marked dead and kept for inspection.
+
+To drain the queue outside the API processes, run `python -m app.job_worker`
+(see that module).
+"""
+import asyncio
+import os
+import random
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import orjson
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import database, idempotency, models
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+# Job queue settings (override through the environment)
+# 0 disables the in-process pool, e.g. when `python -m app.job_worker` drains the queue instead
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_CLAIM_BATCH_SIZE = int(os.getenv("JOB_CLAIM_BATCH_SIZE", "10"))
+# A woken worker waits this long before claiming, so a burst of commits is claimed as one batch
+JOB_CLAIM_LINGER_SECONDS = float(os.getenv("JOB_CLAIM_LINGER_SECONDS", "0.05"))
+# Idle workers poll this often; jobs enqueued by this process wake them at once
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+# A claimed job is redelivered if not finished within this long; also the handler timeout
+JOB_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "8"))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "2"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+JOB_SHUTDOWN_GRACE_SECONDS = float(os.getenv("JOB_SHUTDOWN_GRACE_SECONDS", "10"))
+# Finished jobs are deleted after this long; dead ones are kept
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+# /metrics leaves out the queue gauges when the database doesn't answer within this long
+JOB_STATS_TIMEOUT_SECONDS = float(os.getenv("JOB_STATS_TIMEOUT_SECONDS", "1"))
+
+PENDING, DONE, DEAD = "pending", "done", "dead"
+
+HANDLERS = {}
+
+def handler(kind: str):
+    """Register `fn(db, job)` to run jobs of this kind.
+
+    The job is marked done after fn returns, so fn commits any writes of its own and
+    must tolerate running again: a crash in between redelivers the job.
+    """
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+@dataclass
+class ClaimedJob:
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    created_at: datetime
+    lease_expires: datetime
+
+def enqueue(db: AsyncSession, kind: str, payload: dict, delay_seconds: float = 0, max_attempts: int = None):
+    """Add a job to the session; it becomes visible to workers when the caller commits."""
+    now = datetime.utcnow()
+    job = models.Job(
+        kind=kind,
+        payload=orjson.dumps(payload).decode("utf-8"),
+        status=PENDING,
+        attempts=0,
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+        run_at=now + timedelta(seconds=delay_seconds),
+        created_at=now,
+    )
+    db.add(job)
+    job_queue.enqueued += 1
+    return job
+
+def backoff_seconds(attempts: int) -> float:
+    # Full jitter keeps a burst of failures from retrying in lockstep
+    ceiling = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+async def claim(db: AsyncSession, worker: str, limit: int, visibility_timeout: float = None):
+    now = datetime.utcnow()
+    job = models.Job
+    # A plain read first: on SQLite even an UPDATE that matches nothing takes the write lock
+    due_ids = (await db.execute(
+        select(job.id)
+        .where(job.status == PENDING, job.run_at <= now)
+        .order_by(job.run_at, job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+    if not due_ids:
+        await db.commit()
+        return []
+    rows = (await db.execute(
+        update(job)
+        # Re-checked on the row itself, in case another worker claimed it since the read
+        .where(job.id.in_(due_ids), job.status == PENDING, job.run_at <= now)
+        .values(
+            attempts=job.attempts + 1,
+            run_at=now + timedelta(seconds=visibility_timeout or JOB_VISIBILITY_TIMEOUT_SECONDS),
+            locked_by=worker,
+        )
+        .returning(job.id, job.kind, job.payload, job.attempts, job.max_attempts, job.created_at, job.run_at)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.commit()
+    return sorted(
+        (ClaimedJob(row.id, row.kind, orjson.loads(row.payload), row.attempts, row.max_attempts, row.created_at,
+                    row.run_at)
+         for row in rows),
+        key=lambda claimed: claimed.id,
+    )
+
+def _owned(claimed: ClaimedJob):
+    # attempts is the lease token: a redelivery bumps it, and the stale worker's write then matches nothing
+    return (models.Job.id == claimed.id, models.Job.attempts == claimed.attempts, models.Job.status == PENDING)
+
+async def queue_stats(db: AsyncSession):
+    job = models.Job
+    now = datetime.utcnow()
+    due, oldest_due = (await db.execute(
+        select(func.count(), func.min(job.run_at)).where(job.status == PENDING, job.run_at <= now)
+    )).one()
+    pending, dead = (await db.execute(
+        select(
+            func.count().filter(job.status == PENDING),
+            func.count().filter(job.status == DEAD),
+        )
+    )).one()
+    return {
+        "due": due,
+        # Due jobs plus ones waiting on a retry backoff or held by a worker
+        "pending": pending,
+        "dead": dead,
+        # How long the oldest due job has been waiting for a worker
+        "lag_seconds": round((now - oldest_due).total_seconds(), 3) if oldest_due else 0.0,
+    }
+
+async def try_queue_stats():
+    """queue_stats() on a session of its own, or None if the database is down or slow."""
+    async def fetch():
+        async with database.get_async_sessionmaker()() as db:
+            return await queue_stats(db)
+
+    try:
+        return await asyncio.wait_for(fetch(), JOB_STATS_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning("job queue stats unavailable", extra={"error": type(e).__name__})
+        return None
+
+class JobQueue:
+    """Pool of asyncio workers that claim and run due jobs."""
+
+    def __init__(self, workers: int, window: int = 4096):
+        self.workers = workers
+        self.enqueued = 0
+        self.claimed = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.dead = 0
+        self.lease_lost = 0
+        self.running = 0
+        self._finished = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._tasks = []
+        self._idle_workers = deque()
+        self._notified = False
+        self._stopping = asyncio.Event()
+        self._name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def notify(self):
+        """Wake one idle worker now instead of at its next poll (jobs committed by this process)."""
+        # One at a time: waking the whole pool per commit would have every worker race for the same job
+        if self._idle_workers:
+            self._idle_workers.popleft().set()
+        else:
+            self._notified = True
+
+    def start(self):
+        if self.workers <= 0 or self._tasks:
+            return
+        # Events bind to the loop that first waits on them, and a restarted app may run on a new loop
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker(f"{self._name}:{number}")) for number in range(self.workers)]
+        self._tasks.append(loop.create_task(self._purge_loop()))
+        logger.info("job workers started", extra={"workers": self.workers})
+
+    async def stop(self):
+        if not self._tasks:
+            return
+        # Let in-flight jobs finish; anything still running after the grace period is redelivered later
+        self._stopping.set()
+        while self._idle_workers:
+            self._idle_workers.popleft().set()
+        _, pending = await asyncio.wait(self._tasks, timeout=JOB_SHUTDOWN_GRACE_SECONDS)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _idle(self):
+        if self._notified:
+            # A notify() arrived while every worker was busy
+            self._notified = False
+            return
+        wakeup = asyncio.Event()
+        self._idle_workers.append(wakeup)
+        try:
+            await asyncio.wait_for(wakeup.wait(), JOB_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            return
+        finally:
+            if wakeup in self._idle_workers:
+                self._idle_workers.remove(wakeup)
+        # Each claim and completion is a write; on SQLite those compete with bookings for one lock
+        await asyncio.sleep(JOB_CLAIM_LINGER_SECONDS)
+
+    async def _worker(self, name: str):
+        sessions = database.get_async_sessionmaker()
+        while not self._stopping.is_set():
+            try:
+                async with sessions() as db:
+                    batch = await claim(db, name, JOB_CLAIM_BATCH_SIZE)
+            except Exception:
+                logger.exception("job claim failed")
+                batch = []
+            if not batch:
+                await self._idle()
+                continue
+            self.claimed += len(batch)
+            self.running += len(batch)
+            try:
+                async with sessions() as db:
+                    succeeded = [claimed for claimed in batch if await self.run(db, claimed)]
+                    if succeeded:
+                        await self._complete(db, succeeded)
+            except Exception:
+                # Anything not marked done comes back when its visibility timeout passes
+                logger.exception("job batch failed")
+            finally:
+                self.running -= len(batch)
+
+    async def run(self, db: AsyncSession, claimed: ClaimedJob) -> bool:
+        """Run one job; on failure record the retry (or death) and return False."""
+        fn = HANDLERS.get(claimed.kind)
+        started = time.perf_counter()
+        try:
+            if fn is None:
+                raise LookupError(f"no handler for job kind {claimed.kind!r}")
+            # Stop before the lease runs out, or another worker may start the same job
+            lease_left = (claimed.lease_expires - datetime.utcnow()).total_seconds()
+            await asyncio.wait_for(fn(db, claimed), max(lease_left, 0))
+        except Exception as e:
+            await db.rollback()
+            await self._fail(db, claimed, e)
+            return False
+        logger.debug("job ran", extra={"job_id": claimed.id, "kind": claimed.kind,
+                                       "duration_ms": round((time.perf_counter() - started) * 1000, 1)})
+        return True
+
+    async def _complete(self, db: AsyncSession, batch):
+        # One write for the whole batch keeps the worker's share of the SQLite write lock small
+        finished = await db.execute(
+            update(models.Job)
+            .where(tuple_(models.Job.id, models.Job.attempts).in_([(job.id, job.attempts) for job in batch]),
+                   models.Job.status == PENDING)
+            .values(status=DONE, finished_at=datetime.utcnow(), locked_by=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if finished.rowcount != len(batch):
+            # Redelivered elsewhere after the lease ran out; that worker's run counts instead
+            self.lease_lost += len(batch) - finished.rowcount
+            logger.warning("job lease lost", extra={"jobs": len(batch) - finished.rowcount})
+        self.succeeded += finished.rowcount
+        now, now_utc = time.monotonic(), datetime.utcnow()
+        for job in batch:
+            self._finished.append(now)
+            self._latencies.append((now_utc - job.created_at).total_seconds())
+
+    async def _fail(self, db: AsyncSession, claimed: ClaimedJob, error: Exception):
+        error_text = f"{type(error).__name__}: {error}"[:2000]
+        if claimed.attempts >= claimed.max_attempts:
+            values = {"status": DEAD, "finished_at": datetime.utcnow()}
+        else:
+            values = {"run_at": datetime.utcnow() + timedelta(seconds=backoff_seconds(claimed.attempts))}
+        try:
+            await db.execute(
+                update(models.Job).where(*_owned(claimed))
+                .values(locked_by=None, last_error=error_text, **values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        except Exception:
+            # The visibility timeout still brings the job back
+            logger.exception("job failure not recorded", extra={"job_id": claimed.id})
+            return
+        extra = {"job_id": claimed.id, "kind": claimed.kind, "attempts": claimed.attempts, "error": error_text}
+        if values.get("status") == DEAD:
+            self.dead += 1
+            logger.error("job dead", extra=extra)
+        else:
+            self.retried += 1
+            logger.warning("job failed, will retry", extra=extra)
+
+    async def purge(self):
+        """Delete finished jobs past JOB_RETENTION_HOURS and idempotency keys past their TTL."""
+        async with database.get_async_sessionmaker()() as db:
+            cutoff = datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS)
+            result = await db.execute(
+                delete(models.Job).where(models.Job.status == DONE, models.Job.finished_at < cutoff)
+            )
+            await db.commit()
+            return {"jobs": result.rowcount, "idempotency_keys": await idempotency.purge_expired(db)}
+
+    async def _purge_loop(self):
+        while not self._stopping.is_set():
+            try:
+                purged = await self.purge()
+                if any(purged.values()):
+                    logger.info("purged expired rows", extra=purged)
+            except Exception:
+                logger.exception("job purge failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), 3600)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self):
+        now = time.monotonic()
+        recent = [finished for finished in self._finished if now - finished <= 60]
+        latencies = sorted(self._latencies)
+        snapshot = {
+            "workers": self.workers if self._tasks else 0,
+            "running": self.running,
+            "enqueued": self.enqueued,
+            "claimed": self.claimed,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "dead": self.dead,
+            "lease_lost": self.lease_lost,
+            # Jobs finished per second over the last minute (or the window's span, if shorter)
+            "throughput_per_second": round(len(recent) / max(now - recent[0], 1.0), 2) if recent else 0.0,
+        }
+        # Enqueue to completion, including queueing, retries and backoff
+        for name, pct in (("latency_p50_ms", 0.50), ("latency_p99_ms", 0.99)):
+            snapshot[name] = round(latencies[int(pct * (len(latencies) - 1))] * 1000, 2) if latencies else 0.0
+        return snapshot
+
+job_queue = JobQueue(JOB_WORKERS)
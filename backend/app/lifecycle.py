@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from sqlalchemy import text
+from . import database, migrate
+from .jobs import job_queue
+from .replicas import replica_set
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+# Startup settings (override through the environment)
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "4"))
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+# Development convenience: production runs `python -m app.migrate` once before the workers start
+_DEFAULT_AUTO_MIGRATE = "false" if os.getenv("ENVIRONMENT", "development") == "production" else "true"
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", _DEFAULT_AUTO_MIGRATE).lower() in ("1", "true", "yes")
+
+# Taken when app.main starts importing (it imports this module first), so startup_ms is import-to-ready
+IMPORTED_AT = time.perf_counter()
+state = {"started": False, "startup_ms": None, "warm_connections": 0}
+
+async def warm_pool(engine, connections: int) -> int:
+    """Open pooled connections up front so early requests don't pay for connect (and SQLite pragmas)."""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 0
+    count = min(connections, size)
+    if count <= 0:
+        return 0
+
+    async def open_connection():
+        conn = await engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    opened = await asyncio.gather(*(open_connection() for _ in range(count)), return_exceptions=True)
+    # Closing returns each connection to the pool, where it stays checked in and ready
+    for conn in opened:
+        if not isinstance(conn, BaseException):
+            await conn.close()
+    for result in opened:
+        if isinstance(result, BaseException):
+            raise result
+    return count
+
+async def readiness():
+    """Return (ready, detail): startup finished, the database answers and the schema is current."""
+    detail = {
+        "started": state["started"],
+        "startup_ms": state["startup_ms"],
+        "expected_schema_version": migrate.LATEST_VERSION,
+    }
+
+    async def probe():
+        async with database.get_async_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            return await conn.run_sync(migrate.current_version)
+
+    try:
+        detail["schema_version"] = await asyncio.wait_for(probe(), READINESS_TIMEOUT_SECONDS)
+        detail["database"] = "ok"
+    except asyncio.TimeoutError:
+        detail["database"] = "timeout"
+    except Exception as e:
+        detail["database"] = type(e).__name__
+    ready = (
+        state["started"] and detail["database"] == "ok" and detail["schema_version"] == migrate.LATEST_VERSION
+    )
+    return ready, {"status": "ready" if ready else "not_ready", **detail}
+
+@asynccontextmanager
+async def lifespan(app):
+    if AUTO_MIGRATE:
+        try:
+            await asyncio.to_thread(migrate.upgrade)
+        except Exception:
+            # e.g. several dev workers racing on one SQLite file; readiness shows the schema version
+            logger.exception("automatic migration failed")
+    try:
+        engines = [database.get_async_engine(), *database.get_replica_engines()]
+        warmed = await asyncio.gather(*(warm_pool(engine, DB_POOL_WARMUP) for engine in engines))
+        state["warm_connections"] = sum(warmed)
+    except Exception:
+        # Keep starting: liveness stays up and readiness reports the database until it recovers
+        logger.exception("connection pool warmup failed")
+    replica_set.start()
+    job_queue.start()
+    state["started"] = True
+    state["startup_ms"] = round((time.perf_counter() - IMPORTED_AT) * 1000, 1)
+    logger.info("startup complete", extra={"startup_ms": state["startup_ms"], "warm_connections": state["warm_connections"]})
+    yield
+    state["started"] = False
+    await job_queue.stop()
+    await replica_set.stop()
+    await database.dispose_engines()
@@ -0,0 +1,166 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+
+# Logging settings (override through the environment)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Comma separated "<path prefix>=<rate>" pairs, e.g. "/api/events=0.01,/api/bookings=1"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+route_var = contextvars.ContextVar("route", default=None)
+sampled_var = contextvars.ContextVar("sampled", default=True)
+
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+def parse_sample_rates(spec: str) -> dict:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        prefix, _, rate = item.partition("=")
+        rates[prefix.strip()] = float(rate)
+    return rates
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "route": getattr(record, "route", None),
+        }
+        # Anything passed through `extra=` becomes a top-level field
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class ContextFilter(logging.Filter):
+    """Attaches request context and drops records from unsampled requests.
+
+    Warnings and errors are always kept.
+    """
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING and not sampled_var.get():
+            return False
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        return True
+
+class DropOnFullQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: records are dropped when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DropOnFullQueueHandler.dropped += 1
+
+class SamplingPolicy:
+    def __init__(self, rates: dict):
+        # Longest prefix wins
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, path: str) -> float:
+        for prefix, rate in self.rates:
+            if path.startswith(prefix):
+                return rate
+        return 1.0
+
+    def should_sample(self, path: str) -> bool:
+        rate = self.rate_for(path)
+        return rate >= 1.0 or random.random() < rate
+
+sampling_policy = SamplingPolicy(parse_sample_rates(LOG_SAMPLE_RATES))
+_listener = None
+
+def configure_logging(stream=None):
+    """Route the `app` logger tree through a non-blocking queue to a JSON stream handler."""
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    handler = DropOnFullQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    # QueueHandler.prepare would pre-format the message; keep the record as-is for the formatter
+    handler.prepare = lambda record: record
+
+    logger = logging.getLogger("app")
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(handler)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class SampledLogger(logging.LoggerAdapter):
+    """Skips building records for unsampled requests before any formatting work."""
+
+    def isEnabledFor(self, level):
+        if level < logging.WARNING and not sampled_var.get():
+            return False
+        return self.logger.isEnabledFor(level)
+
+    def process(self, msg, kwargs):
+        return msg, kwargs
+
+def get_logger(name: str) -> SampledLogger:
+    return SampledLogger(logging.getLogger(name), {})
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware that sets the request id, route and sampling decision."""
+
+    header = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == self.header:
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        path = scope["path"]
+        tokens = (
+            request_id_var.set(request_id),
+            route_var.set(path),
+            sampled_var.set(sampling_policy.should_sample(path)),
+        )
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(self.header, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            for var, token in zip((request_id_var, route_var, sampled_var), tokens):
+                var.reset(token)
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import random
+import smtplib
+from collections import deque
+from email.message import EmailMessage
+
+# Outgoing mail settings (override through the environment)
+MAIL_BACKEND = os.getenv("MAIL_BACKEND", "fake")
+MAIL_FROM = os.getenv("MAIL_FROM", "Houzeful <no-reply@houzeful.local>")
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+# Fake sink knobs, for exercising retries and slow delivery locally
+MAIL_FAKE_LATENCY_MS = float(os.getenv("MAIL_FAKE_LATENCY_MS", "0"))
+MAIL_FAKE_FAILURE_RATE = float(os.getenv("MAIL_FAKE_FAILURE_RATE", "0"))
+
+class MailDeliveryError(Exception):
+    pass
+
+class FakeMailSink:
+    """Keeps sent messages in memory instead of delivering them.
+
+    Messages are counted per Message-ID, so at-least-once redeliveries show up
+    as duplicates. latency_ms and failure_rate simulate a slow or flaky server.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, failure_rate: float = 0.0, outbox_size: int = 1000):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.outbox = deque(maxlen=outbox_size)
+        self.deliveries = {}
+        self.sent = 0
+        self.failed = 0
+
+    async def send(self, message: EmailMessage):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        if self.failure_rate and random.random() < self.failure_rate:
+            self.failed += 1
+            raise MailDeliveryError("simulated delivery failure")
+        message_id = message["Message-ID"]
+        self.deliveries[message_id] = self.deliveries.get(message_id, 0) + 1
+        self.outbox.append(message)
+        self.sent += 1
+
+    def clear(self):
+        self.outbox.clear()
+        self.deliveries.clear()
+        self.sent = self.failed = 0
+
+    def stats(self):
+        return {
+            "backend": "fake",
+            "sent": self.sent,
+            "failed": self.failed,
+            "unique_messages": len(self.deliveries),
+            "duplicates": self.sent - len(self.deliveries),
+        }
+
+class SmtpMailer:
+    """Sends through an SMTP relay; smtplib blocks, so each send runs in a thread."""
+
+    def __init__(self, host: str, port: int, username=None, password=None, starttls: bool = True,
+                 timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.sent = 0
+        self.failed = 0
+
+    def _send(self, message: EmailMessage):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+    async def send(self, message: EmailMessage):
+        try:
+            await asyncio.to_thread(self._send, message)
+        except (OSError, smtplib.SMTPException) as e:
+            self.failed += 1
+            raise MailDeliveryError(str(e)) from e
+        self.sent += 1
+
+    def stats(self):
+        return {"backend": "smtp", "sent": self.sent, "failed": self.failed}
+
+if MAIL_BACKEND == "smtp":
+    mailer = SmtpMailer(SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_STARTTLS, SMTP_TIMEOUT_SECONDS)
+else:
+    mailer = FakeMailSink(MAIL_FAKE_LATENCY_MS, MAIL_FAKE_FAILURE_RATE)
@@ -43,16 +43,33 @@
 
 
 import os
-from fastapi import FastAPI
+from app import lifecycle
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine
-from app import models
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import database
+from app.availability import availability_broker
+from app.compression import CompressionMiddleware, compression_stats
+from app.auth import token_cache, user_cache
+from app.hashing import password_hasher
+from app.http_cache import catalog_cache
+from app.jobs import job_queue, queue_stats, try_queue_stats
+from app.logs import RequestContextMiddleware, configure_logging
+from app.mail import mailer
+from app.ratelimit import rate_limiter
+from app.recommendations import recommendation_index
+from app.replicas import ReadYourWritesMiddleware, replica_set
+from app.metrics import MetricsMiddleware, instrument_engine, render as render_metrics
 from .routers import events, bookings, users
 
+configure_logging()
+
 app = FastAPI(
     title="Houzeful API",
     version="1.0.0",
-    description="Event booking platform API"
+    description="Event booking platform API",
+    lifespan=lifecycle.lifespan,
 )
 
 # CORS for Railway deployment
@@ -77,10 +94,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[events.NEXT_CURSOR_HEADER],
 )
-
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
+# Engines are created lazily at startup; instrument each one as it appears.
+# The schema is managed by `python -m app.migrate`, not created at import.
+database.on_engine_created(instrument_engine)
 
 # Include routers
 app.include_router(events.router, prefix="/api")
@@ -93,4 +115,83 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "database": "sqlite"}
\ No newline at end of file
+    return {"status": "healthy", "database": database.get_async_engine().dialect.name}
+
+@app.get("/health/live")
+def liveness():
+    # Process is up and serving; says nothing about the database
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    ready, detail = await lifecycle.readiness()
+    return JSONResponse(detail, status_code=200 if ready else 503)
+
+@app.get("/metrics/password-hashing")
+def password_hashing_metrics():
+    return password_hasher.stats()
+
+@app.get("/metrics/user-cache")
+def user_cache_metrics():
+    return {"users": user_cache.stats(), "tokens": token_cache.stats()}
+
+@app.get("/metrics/catalog-cache")
+def catalog_cache_metrics():
+    return catalog_cache.stats()
+
+@app.get("/metrics/availability-stream")
+def availability_stream_metrics():
+    return availability_broker.stats()
+
+@app.get("/metrics/rate-limit")
+def rate_limit_metrics():
+    return rate_limiter.stats()
+
+@app.get("/metrics/compression")
+def compression_metrics():
+    return compression_stats.stats()
+
+@app.get("/metrics/recommendations")
+def recommendation_metrics():
+    return recommendation_index.stats()
+
+@app.get("/metrics/replicas")
+def replica_metrics():
+    return replica_set.stats()
+
+@app.get("/metrics/jobs")
+async def job_metrics(db: AsyncSession = Depends(database.get_db)):
+    return {"queue": await queue_stats(db), "workers": job_queue.stats(), "mail": mailer.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    hashing = password_hasher.stats()
+    # Process metrics are served even when the database is down; only the queue gauges need it
+    queue, workers = await try_queue_stats(), job_queue.stats()
+    catalog = catalog_cache.stats()
+    gauges = [
+        ("houzeful_password_hash_queue_depth", "Password hashes waiting for a worker.", hashing["queue_depth"]),
+        ("houzeful_password_hash_running", "Password hashes in progress.", hashing["running"]),
+        ("houzeful_password_hash_latency_p99_seconds", "Recent p99 bcrypt latency.", hashing["latency_p99_ms"] / 1000),
+        ("houzeful_user_cache_hit_ratio", "Authenticated-user cache hit ratio.", user_cache.stats()["hit_ratio"]),
+        ("houzeful_catalog_cache_hit_ratio", "Catalog response cache hit ratio.", catalog["hit_ratio"]),
+        ("houzeful_availability_subscribers", "Open seat availability streams.", availability_broker.subscribers),
+        ("houzeful_compressed_bytes_saved", "Response bytes saved by compression.",
+         compression_stats.bytes_in - compression_stats.bytes_out),
+        ("houzeful_job_throughput_per_second", "Background jobs finished per second, last minute.",
+         workers["throughput_per_second"]),
+    ]
+    counters = [
+        ("houzeful_password_hash_rejected_total", "Password hash requests rejected with 503.", hashing["rejected"]),
+        ("houzeful_catalog_not_modified_total", "Catalog requests answered with 304.", catalog["not_modified"]),
+        ("houzeful_rate_limited_total", "Login/register attempts rejected with 429.", rate_limiter.limited),
+        ("houzeful_jobs_succeeded_total", "Background jobs finished by this process.", workers["succeeded"]),
+        ("houzeful_jobs_retried_total", "Background job attempts that failed and were rescheduled.", workers["retried"]),
+    ]
+    if queue is not None:
+        gauges += [
+            ("houzeful_job_queue_due", "Background jobs due and waiting for a worker.", queue["due"]),
+            ("houzeful_job_queue_lag_seconds", "Age of the oldest due background job.", queue["lag_seconds"]),
+            ("houzeful_jobs_dead", "Background jobs that used up their attempts.", queue["dead"]),
+        ]
+    return PlainTextResponse(render_metrics(gauges, counters), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,149 @@
+import contextvars
+import os
+import time
+from bisect import bisect_left
+from anyio.to_thread import current_default_thread_limiter
+from sqlalchemy import event
+
+# Add a Server-Timing header with DB and total time to every response (debugging aid)
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# [query count, db seconds] for the request being handled; None outside requests
+_request_db = contextvars.ContextVar("request_db", default=None)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+class Histogram:
+    """Prometheus histogram keyed by label values.
+
+    Bucket arrays are allocated once per label set and mutated in place. Updates come
+    from the event loop thread, so no lock is taken on the hot path.
+    """
+
+    def __init__(self, name: str, help: str, label_names, buckets):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            # [bucket counts..., +Inf count, sum]
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in list(self._series.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                yield f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{label_text}}} {series[-1]}"
+            yield f"{self.name}_count{{{label_text}}} {cumulative}"
+
+REQUEST_LATENCY = Histogram(
+    "houzeful_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "houzeful_http_request_db_seconds", "Time spent in SQL statements per request.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "houzeful_http_request_queries", "SQL statements executed per request.",
+    ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_db.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+
+def instrument_engine(engine):
+    """Attribute SQL statements run on `engine` (sync or async) to the current request."""
+    target = getattr(engine, "sync_engine", engine)
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, DB time and query count per route template."""
+
+    def __init__(self, app, server_timing: bool = METRICS_SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        stats = [0, 0.0]
+        token = _request_db.set(stats)
+        status_code = 500
+
+        async def send_with_metrics(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    timing = (
+                        f'db;dur={stats[1] * 1000:.2f};desc="{stats[0]} queries", '
+                        f"total;dur={(time.perf_counter() - started) * 1000:.2f}"
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _request_db.reset(token)
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't blow up cardinality
+            template = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+            REQUEST_LATENCY.observe((method, template, status_code), time.perf_counter() - started)
+            REQUEST_DB_TIME.observe((method, template), stats[1])
+            REQUEST_QUERIES.observe((method, template), stats[0])
+
+def _sample(kind: str, name: str, help: str, value):
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {kind}"
+    yield f"{name} {value}"
+
+def _gauge(name: str, help: str, value):
+    return _sample("gauge", name, help, value)
+
+def _counter(name: str, help: str, value):
+    # Counters only go up (resetting on restart) and are named with a _total suffix
+    return _sample("counter", name, help, value)
+
+def render(extra_gauges=(), extra_counters=()) -> str:
+    """Render all metrics in Prometheus text exposition format (call from the event loop)."""
+    lines = []
+    for histogram in (REQUEST_LATENCY, REQUEST_DB_TIME, REQUEST_QUERIES):
+        lines.extend(histogram.render())
+    limiter = current_default_thread_limiter()
+    lines.extend(_gauge("houzeful_threadpool_busy_threads", "Worker threads in use by sync endpoints.", limiter.borrowed_tokens))
+    lines.extend(_gauge("houzeful_threadpool_max_threads", "Size of the sync endpoint threadpool.", limiter.total_tokens))
+    lines.extend(_gauge("houzeful_threadpool_waiting_tasks", "Tasks waiting for a worker thread.", limiter.statistics().tasks_waiting))
+    for name, help, value in extra_gauges:
+        lines.extend(_gauge(name, help, value))
+    for name, help, value in extra_counters:
+        lines.extend(_counter(name, help, value))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,136 @@
+"""Versioned schema migrations.
+
+Each module in app/migrations named `NNNN_description.py` defines
+`upgrade(conn)`. Applied versions are recorded in `schema_migrations`. Run
+this once per deploy, before the API workers start:
+
+    python -m app.migrate            # upgrade to the latest version
+    python -m app.migrate --status   # list applied and pending versions
+
+Steps use the if-missing helpers below. A database first created by the
+old import-time create_all() therefore upgrades cleanly, and a migration
+that stopped half way can simply be run again.
+"""
+import argparse
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from . import migrations
+from .database import DATABASE_URL, create_db_engine
+from .logs import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+_MODULE_NAME = re.compile(r"^(\d{4})_\w+$")
+# Arbitrary constant key for the PostgreSQL advisory lock serialising concurrent migrators
+_ADVISORY_LOCK_KEY = 724011
+
+version_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def discover():
+    """Return [(version, name)] for every migration, oldest first, without importing them."""
+    found = []
+    for info in pkgutil.iter_modules(migrations.__path__):
+        match = _MODULE_NAME.match(info.name)
+        if match:
+            found.append((int(match.group(1)), info.name))
+    return sorted(found)
+
+LATEST_VERSION = discover()[-1][0]
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table("schema_migrations"):
+        return 0
+    latest = select(schema_migrations.c.version).order_by(schema_migrations.c.version.desc()).limit(1)
+    return conn.execute(latest).scalar() or 0
+
+def applied_versions(conn):
+    if not inspect(conn).has_table("schema_migrations"):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+# Helpers for migration modules
+def has_column(conn, table: str, column: str) -> bool:
+    return any(info["name"] == column for info in inspect(conn).get_columns(table))
+
+def add_column(conn, table: str, column: Column):
+    if has_column(conn, table, column.name):
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.execute(text(ddl))
+
+def create_index(conn, name: str, table: str, columns, unique: bool = False):
+    inspector = inspect(conn)
+    existing = inspector.get_indexes(table) + [
+        {**constraint, "unique": True} for constraint in inspector.get_unique_constraints(table)
+    ]
+    # Skip when an index (or, for unique ones, a UNIQUE constraint) already covers the columns
+    if any(info["name"] == name or (info["column_names"] == list(columns) and (info.get("unique") or not unique))
+           for info in existing):
+        return
+    conn.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)})"))
+
+def upgrade(url: str = DATABASE_URL, target: int = None):
+    """Apply pending migrations up to `target` (default: latest). Returns the versions applied."""
+    engine = create_db_engine(url)
+    applied_now = []
+    try:
+        with engine.connect() as lock_conn:
+            postgres = lock_conn.dialect.name == "postgresql"
+            if postgres:
+                # Held for the whole run, so a second migrator waits and then finds nothing to do
+                lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+                lock_conn.commit()
+            with engine.begin() as conn:
+                version_metadata.create_all(conn, checkfirst=True)
+                done = applied_versions(conn)
+            for version, name in discover():
+                if version in done or (target is not None and version > target):
+                    continue
+                logger.info("applying migration", extra={"version": version, "migration": name})
+                module = importlib.import_module(f"{migrations.__name__}.{name}")
+                with engine.begin() as conn:
+                    module.upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+                applied_now.append(version)
+            if postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+                lock_conn.commit()
+    finally:
+        engine.dispose()
+    return applied_now
+
+def status(url: str = DATABASE_URL):
+    engine = create_db_engine(url)
+    try:
+        with engine.connect() as conn:
+            done = applied_versions(conn)
+    finally:
+        engine.dispose()
+    return [(version, name, version in done) for version, name in discover()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args()
+    configure_logging()
+    if args.status:
+        for version, name, applied in status():
+            print(f"{version:04d} {name:50s} {'applied' if applied else 'pending'}")
+    else:
+        applied = upgrade(target=args.target)
+        print(f"applied migrations: {', '.join(f'{version:04d}' for version in applied) or 'none'}")
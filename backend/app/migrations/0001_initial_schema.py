@@ -0,0 +1,37 @@
+"""Tables as the app originally created them with create_all()."""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "events", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False),
+    Column("description", String),
+    Column("genre", String),
+    Column("location", String),
+    Column("date", DateTime, nullable=False),
+    Column("language", String),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "bookings", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("event_id", Integer, ForeignKey("events.id")),
+    Column("booked_id", DateTime),
+    Column("number_of_tickets", Integer),
+)
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
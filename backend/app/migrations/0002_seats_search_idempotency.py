@@ -0,0 +1,39 @@
+"""Seat capacity, partner ids, booking aggregates, pagination indexes, search and idempotency keys."""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, UniqueConstraint, text
+from app.migrate import add_column, create_index
+from app.search import POSTGRES_SEARCH_DDL, SQLITE_FTS_DDL
+
+metadata = MetaData()
+# Reference only, so the foreign key below resolves; created in 0001
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+idempotency_keys = Table(
+    "idempotency_keys", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("key", String, nullable=False),
+    Column("request_hash", String, nullable=False),
+    Column("status_code", Integer, nullable=False),
+    Column("response_body", Text, nullable=False),
+    Column("created_at", DateTime),
+    Column("expires_at", DateTime, nullable=False, index=True),
+    UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+)
+
+def upgrade(conn):
+    add_column(conn, "events", Column("capacity", Integer))
+    add_column(conn, "events", Column("remaining_seats", Integer))
+    add_column(conn, "events", Column("external_id", String))
+    add_column(conn, "events", Column("tickets_sold", Integer, nullable=False, server_default="0"))
+    add_column(conn, "events", Column("booking_count", Integer, nullable=False, server_default="0"))
+    add_column(conn, "events", Column("last_booked_at", DateTime))
+    create_index(conn, "uq_events_external_id", "events", ["external_id"], unique=True)
+    create_index(conn, "ix_events_date_id", "events", ["date", "id"])
+    create_index(conn, "ix_events_genre_date_id", "events", ["genre", "date", "id"])
+    create_index(conn, "ix_events_location_date_id", "events", ["location", "date", "id"])
+    create_index(conn, "ix_events_language_date_id", "events", ["language", "date", "id"])
+    create_index(conn, "ix_bookings_user_id_id", "bookings", ["user_id", "id"])
+    idempotency_keys.create(conn, checkfirst=True)
+    search_ddl = {"sqlite": SQLITE_FTS_DDL, "postgresql": POSTGRES_SEARCH_DDL}.get(conn.dialect.name, [])
+    for statement in search_ddl:
+        conn.execute(text(statement))
@@ -0,0 +1,20 @@
+"""Event change tracking for delta sync: updated_at and the tombstone log."""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, Table, text
+from app.migrate import add_column, create_index
+
+metadata = MetaData()
+
+event_tombstones = Table(
+    "event_tombstones", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("event_id", Integer, nullable=False),
+    Column("deleted_at", DateTime, nullable=False),
+    Index("ix_event_tombstones_deleted_at_event_id", "deleted_at", "event_id"),
+)
+
+def upgrade(conn):
+    add_column(conn, "events", Column("updated_at", DateTime))
+    # Existing rows count as changed when they were created
+    conn.execute(text("UPDATE events SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"))
+    create_index(conn, "ix_events_updated_at_id", "events", ["updated_at", "id"])
+    event_tombstones.create(conn, checkfirst=True)
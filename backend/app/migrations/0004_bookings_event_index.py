@@ -0,0 +1,5 @@
+"""Index bookings by event, for id-ordered attendee exports."""
+from app.migrate import create_index
+
+def upgrade(conn):
+    create_index(conn, "ix_bookings_event_id_id", "bookings", ["event_id", "id"])
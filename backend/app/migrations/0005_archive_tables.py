@@ -0,0 +1,43 @@
+"""Cold-tier tables for archived past events and their bookings."""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table
+
+metadata = MetaData()
+# Reference only, so the foreign key below resolves; created in 0001
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+events_archive = Table(
+    "events_archive", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String, nullable=False),
+    Column("description", String),
+    Column("genre", String),
+    Column("location", String),
+    Column("date", DateTime, nullable=False),
+    Column("language", String),
+    Column("capacity", Integer),
+    Column("remaining_seats", Integer),
+    Column("external_id", String),
+    Column("tickets_sold", Integer, nullable=False, server_default="0"),
+    Column("booking_count", Integer, nullable=False, server_default="0"),
+    Column("last_booked_at", DateTime),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("archived_at", DateTime, nullable=False),
+    Index("ix_events_archive_date_id", "date", "id"),
+)
+
+bookings_archive = Table(
+    "bookings_archive", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("event_id", Integer, ForeignKey("events_archive.id")),
+    Column("booked_id", DateTime),
+    Column("number_of_tickets", Integer),
+    Column("archived_at", DateTime, nullable=False),
+    Index("ix_bookings_archive_user_id_id", "user_id", "id"),
+    Index("ix_bookings_archive_event_id_id", "event_id", "id"),
+)
+
+def upgrade(conn):
+    events_archive.create(conn, checkfirst=True)
+    bookings_archive.create(conn, checkfirst=True)
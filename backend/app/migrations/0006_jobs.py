@@ -0,0 +1,23 @@
+"""Durable background job queue."""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text
+
+metadata = MetaData()
+
+jobs = Table(
+    "jobs", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("kind", String, nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("status", String, nullable=False, server_default="pending"),
+    Column("attempts", Integer, nullable=False, server_default="0"),
+    Column("max_attempts", Integer, nullable=False),
+    Column("run_at", DateTime, nullable=False),
+    Column("locked_by", String),
+    Column("last_error", Text),
+    Column("created_at", DateTime, nullable=False),
+    Column("finished_at", DateTime),
+    Index("ix_jobs_status_run_at_id", "status", "run_at", "id"),
+)
+
+def upgrade(conn):
+    jobs.create(conn, checkfirst=True)
@@ -0,0 +1,9 @@
+"""Owning organizer on events, so organizer dashboards only show their own events."""
+from sqlalchemy import Column, Integer
+from app.migrate import add_column, create_index
+
+def upgrade(conn):
+    # NULL for events created before owners were recorded
+    add_column(conn, "events", Column("organizer_id", Integer))
+    add_column(conn, "events_archive", Column("organizer_id", Integer))
+    create_index(conn, "ix_events_organizer_id_id", "events", ["organizer_id", "id"])
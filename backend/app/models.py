@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -24,10 +24,45 @@ class Event(Base):
     location = Column(String)
     date = Column(DateTime, nullable=False)
     language = Column(String)
+    # NULL capacity means unlimited seats; remaining_seats is decremented atomically on booking
+    capacity = Column(Integer, nullable=True)
+    remaining_seats = Column(Integer, nullable=True)
+    # Partner feed identifier, the conflict target for bulk upserts
+    external_id = Column(String, unique=True, nullable=True)
+    # Booking aggregates, updated by the same statement that reserves seats; app/reconcile.py recomputes them
+    tickets_sold = Column(Integer, nullable=False, default=0, server_default="0")
+    booking_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_booked_at = Column(DateTime, nullable=True)
+    # Organizer who created the event; scopes the stats dashboard. NULL for older events
+    organizer_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped by every ORM/Core UPDATE (seat counts included); drives GET /events/changes
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     bookings = relationship("Booking", back_populates="event")
 
+    # Composite indexes backing keyset pagination on (date, id) with filters
+    __table_args__ = (
+        Index("ix_events_date_id", "date", "id"),
+        Index("ix_events_genre_date_id", "genre", "date", "id"),
+        Index("ix_events_location_date_id", "location", "date", "id"),
+        Index("ix_events_language_date_id", "language", "date", "id"),
+        Index("ix_events_organizer_id_id", "organizer_id", "id"),
+        Index("ix_events_updated_at_id", "updated_at", "id"),
+    )
+
+class EventTombstone(Base):
+    __tablename__ = "event_tombstones"
+
+    # One row per deleted event, so delta sync can tell clients to drop it
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_event_tombstones_deleted_at_event_id", "deleted_at", "event_id"),
+    )
+
 class Booking(Base):
     __tablename__ = "bookings"
 
@@ -40,3 +75,93 @@ class Booking(Base):
     user = relationship("User", back_populates="bookings")
     event = relationship("Event", back_populates="bookings")
 
+    # Serve "my bookings" lookups and attendee exports, both in id order
+    __table_args__ = (
+        Index("ix_bookings_user_id_id", "user_id", "id"),
+        Index("ix_bookings_event_id_id", "event_id", "id"),
+    )
+
+# Cold tier: past events and their bookings, moved here by app/archive.py with their original ids.
+# Default reads see only the hot tables; endpoints opt in to these with include_archived.
+class ArchivedEvent(Base):
+    __tablename__ = "events_archive"
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String, nullable=False)
+    description = Column(String)
+    genre = Column(String)
+    location = Column(String)
+    date = Column(DateTime, nullable=False)
+    language = Column(String)
+    capacity = Column(Integer, nullable=True)
+    remaining_seats = Column(Integer, nullable=True)
+    external_id = Column(String, nullable=True)
+    tickets_sold = Column(Integer, nullable=False, default=0, server_default="0")
+    booking_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_booked_at = Column(DateTime, nullable=True)
+    organizer_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    bookings = relationship("ArchivedBooking", back_populates="event")
+
+    __table_args__ = (
+        Index("ix_events_archive_date_id", "date", "id"),
+    )
+
+class ArchivedBooking(Base):
+    __tablename__ = "bookings_archive"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    event_id = Column(Integer, ForeignKey("events_archive.id"))
+    booked_id = Column(DateTime)
+    number_of_tickets = Column(Integer, default=1)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    event = relationship("ArchivedEvent", back_populates="bookings")
+
+    __table_args__ = (
+        Index("ix_bookings_archive_user_id_id", "user_id", "id"),
+        Index("ix_bookings_archive_event_id_id", "event_id", "id"),
+    )
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String, nullable=False)
+    # Hash of the request the key was first used with; reuse with a different body is rejected
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    # Background work enqueued in the same transaction as the change that needs it
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    # pending -> done, or dead once max_attempts have failed
+    status = Column(String, nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False)
+    # When the job may next be claimed: a retry's backoff, or a claimed job's visibility timeout
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_at_id", "status", "run_at", "id"),
+    )
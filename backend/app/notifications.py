@@ -0,0 +1,46 @@
+from email.message import EmailMessage
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+from .jobs import ClaimedJob, enqueue, handler
+from .logs import get_logger
+from .mail import MAIL_FROM, mailer
+
+logger = get_logger(__name__)
+
+BOOKING_CONFIRMATION = "booking_confirmation"
+
+def enqueue_booking_confirmation(db: AsyncSession, bookings):
+    # One email per request, so a batch booking gets a single message listing every event
+    return enqueue(db, BOOKING_CONFIRMATION, {"booking_ids": [booking.id for booking in bookings]})
+
+def booking_confirmation_message(user, rows) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = MAIL_FROM
+    message["To"] = user.email
+    message["Subject"] = "Your Houzeful booking" if len(rows) == 1 else f"Your {len(rows)} Houzeful bookings"
+    # Stable per booking, so a redelivered job sends the same Message-ID and duplicates are recognisable
+    message["Message-ID"] = f"<booking-{'-'.join(str(booking.id) for booking, _ in rows)}@houzeful>"
+    lines = [f"Hi {user.name},", "", "Thanks for booking with Houzeful:", ""]
+    for booking, event in rows:
+        tickets = "ticket" if booking.number_of_tickets == 1 else "tickets"
+        lines.append(f"  * {event.title}, {event.date:%a %d %b %Y %H:%M}, {event.location or 'TBA'}: "
+                     f"{booking.number_of_tickets} {tickets} (booking #{booking.id})")
+    message.set_content("\n".join(lines + ["", "See you there!"]))
+    return message
+
+@handler(BOOKING_CONFIRMATION)
+async def send_booking_confirmation(db: AsyncSession, job: ClaimedJob):
+    booking_ids = job.payload["booking_ids"]
+    rows = (await db.execute(
+        select(models.Booking, models.Event)
+        .join(models.Event, models.Event.id == models.Booking.event_id)
+        .where(models.Booking.id.in_(booking_ids))
+        .order_by(models.Booking.id)
+    )).all()
+    if not rows:
+        # Cancelled, or archived before the mail went out; nothing left to confirm
+        logger.info("booking confirmation skipped", extra={"job_id": job.id, "booking_ids": booking_ids})
+        return
+    user = await db.get(models.User, rows[0][0].user_id)
+    await mailer.send(booking_confirmation_message(user, rows))
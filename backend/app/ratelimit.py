@@ -0,0 +1,132 @@
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, namedtuple
+from fastapi import HTTPException, Request, status
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+# Rate limit settings (override through the environment); rates are tokens per minute
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "200000"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "20"))
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", "5"))
+REGISTER_IP_BURST = int(os.getenv("REGISTER_IP_BURST", "5"))
+REGISTER_IP_PER_MINUTE = float(os.getenv("REGISTER_IP_PER_MINUTE", "5"))
+# Number of reverse proxies in front of the app whose X-Forwarded-For entries can be trusted
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+Limit = namedtuple("Limit", ["scope", "capacity", "refill_per_second"])
+
+LOGIN_PER_IP = Limit("login:ip", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE / 60)
+LOGIN_PER_EMAIL = Limit("login:email", LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE / 60)
+REGISTER_PER_IP = Limit("register:ip", REGISTER_IP_BURST, REGISTER_IP_PER_MINUTE / 60)
+
+class RateLimitBackend(ABC):
+    """Token bucket storage. Subclass and implement `consume` to share buckets
+    between workers (for example in Redis); the limiter only calls this method."""
+
+    @abstractmethod
+    async def consume(self, key: str, capacity: int, refill_per_second: float, cost: int = 1) -> float:
+        """Take `cost` tokens. Return 0 if allowed, else seconds until enough tokens refill."""
+
+    def stats(self) -> dict:
+        return {}
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process token buckets, sharded by key hash so each lock guards a small map.
+
+    A bucket is dropped once it would have refilled completely: from then on it is
+    indistinguishable from a new one. Each shard is kept in least-recently-used order,
+    so expired buckets are swept from the front a few at a time, and the oldest are
+    evicted when a shard reaches its share of `max_keys`.
+    """
+
+    def __init__(self, shards: int, max_keys: int):
+        self._shards = [(OrderedDict(), threading.Lock()) for _ in range(shards)]
+        self._max_per_shard = max(1, max_keys // shards)
+        self.expired = 0
+        self.evictions = 0
+
+    async def consume(self, key: str, capacity: int, refill_per_second: float, cost: int = 1) -> float:
+        return self.take(key, capacity, refill_per_second, cost)
+
+    def take(self, key: str, capacity: int, refill_per_second: float, cost: int = 1) -> float:
+        now = time.monotonic()
+        buckets, lock = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+                buckets.move_to_end(key)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / refill_per_second
+            # Stored as (tokens, updated_at, full_at)
+            buckets[key] = (tokens, now, now + (capacity - tokens) / refill_per_second)
+            # Bounded sweep per call keeps expiry amortized O(1)
+            for _ in range(2):
+                oldest = next(iter(buckets.values()))
+                if oldest[2] > now:
+                    break
+                buckets.popitem(last=False)
+                self.expired += 1
+            while len(buckets) > self._max_per_shard:
+                buckets.popitem(last=False)
+                self.evictions += 1
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "keys": sum(len(buckets) for buckets, _ in self._shards),
+            "shards": len(self._shards),
+            "max_keys": self._max_per_shard * len(self._shards),
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+def client_ip(request: Request) -> str:
+    if TRUSTED_PROXY_HOPS:
+        # Each trusted proxy appends the address it saw, so count back from the right
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+class RateLimiter:
+    """Applies token-bucket limits and turns an empty bucket into a 429."""
+
+    def __init__(self, backend: RateLimitBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.allowed = 0
+        self.limited = 0
+
+    async def hit(self, limit: Limit, identity: str):
+        if not self.enabled:
+            return
+        retry_after = await self.backend.consume(f"{limit.scope}:{identity}", limit.capacity, limit.refill_per_second)
+        if retry_after:
+            self.limited += 1
+            logger.warning("rate limited", extra={"scope": limit.scope})
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        self.allowed += 1
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "allowed": self.allowed, "limited": self.limited, **self.backend.stats()}
+
+rate_limiter = RateLimiter(MemoryBackend(RATE_LIMIT_SHARDS, RATE_LIMIT_MAX_KEYS), RATE_LIMIT_ENABLED)
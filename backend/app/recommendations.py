@@ -0,0 +1,296 @@
+"""Co-booking recommendations: "people who booked this also booked".
+
+A batch job streams bookings grouped by user. For every event it counts
+how many of its bookers also booked each other event, and keeps the top
+RECOMMENDATIONS_TOP_K neighbours. The result goes into one flat binary file
+that API workers memory-map read-only. Every worker shares the same page
+cache copy, and a lookup reads its K entries in place.
+
+A refresh recomputes only the events booked by users with new bookings.
+Those are the only rows whose counts can change, so the result matches a
+full rebuild.
+
+Usage (from backend/):
+    python -m app.recommendations             # full rebuild
+    python -m app.recommendations --refresh   # fold in bookings made since the last run
+"""
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain, groupby
+from operator import itemgetter
+from sqlalchemy import distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import database, models
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+# Recommendation index settings (override through the environment)
+RECOMMENDATIONS_INDEX_PATH = os.getenv("RECOMMENDATIONS_INDEX_PATH", "recommendations.idx")
+RECOMMENDATIONS_TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "20"))
+# Only a user's most recent distinct events count, so one heavy booker can't add O(n^2) pairs
+RECOMMENDATIONS_MAX_EVENTS_PER_USER = int(os.getenv("RECOMMENDATIONS_MAX_EVENTS_PER_USER", "100"))
+RECOMMENDATIONS_RELOAD_SECONDS = float(os.getenv("RECOMMENDATIONS_RELOAD_SECONDS", "30"))
+# Bookings re-read below the stored watermark, for ids that committed out of order
+RECOMMENDATIONS_REFRESH_OVERLAP = int(os.getenv("RECOMMENDATIONS_REFRESH_OVERLAP", "1000"))
+# Past this share of events touched, a refresh falls back to a full rebuild
+RECOMMENDATIONS_REFRESH_MAX_FRACTION = float(os.getenv("RECOMMENDATIONS_REFRESH_MAX_FRACTION", "0.5"))
+BUILD_CHUNK_SIZE = 50_000
+_IN_CHUNK = 500
+
+# File layout, arrays in native byte order (built and read on the same kind of host):
+#   header (64 bytes) | event_ids int32[rows] (sorted) | bookers int32[rows]
+#   | neighbours int32[rows * k] | co_bookings int32[rows * k]
+# Unused neighbour slots hold 0, which is never an event id.
+_MAGIC = b"HZCOBK01"
+_HEADER = struct.Struct("<8sIIqd")  # magic, k, rows, watermark booking id, built_at
+_HEADER_SIZE = 64
+
+def _write(path: str, k: int, watermark: int, rows):
+    """Write [(event_id, bookers, [(neighbour, co_bookings)])] sorted by event_id, replacing path atomically."""
+    event_ids, bookers = array("i"), array("i")
+    neighbours, co_bookings = array("i", bytes(4 * k * len(rows))), array("i", bytes(4 * k * len(rows)))
+    for row, (event_id, count, top) in enumerate(rows):
+        event_ids.append(event_id)
+        bookers.append(count)
+        base = row * k
+        for slot, (neighbour, co) in enumerate(top[:k]):
+            neighbours[base + slot] = neighbour
+            co_bookings[base + slot] = co
+    header = _HEADER.pack(_MAGIC, k, len(rows), watermark, time.time()).ljust(_HEADER_SIZE, b"\0")
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, "wb") as f:
+        f.write(header)
+        for part in (event_ids, bookers, neighbours, co_bookings):
+            part.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    # Readers holding the old mapping keep a valid view of the old inode
+    os.replace(temporary, path)
+
+class RecommendationIndex:
+    """Read-only view of the index file, remapped when a newer file replaces it."""
+
+    def __init__(self, path: str, reload_seconds: float = RECOMMENDATIONS_RELOAD_SECONDS):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._identity = None
+        self._checked_at = float("-inf")
+        self._mmap = None
+        self._views = ()
+        self.k = 0
+        self.rows = 0
+        self.watermark = 0
+        self.built_at = None
+        self.lookups = 0
+        self.reloads = 0
+
+    def _release(self):
+        for view in self._views:
+            view.release()
+        self._views = ()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._identity = None
+        self.k = self.rows = 0
+
+    def reload(self):
+        self._checked_at = time.monotonic()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._release()
+            return
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if identity == self._identity:
+            return
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, k, rows, watermark, built_at = _HEADER.unpack_from(mapped)
+        if magic != _MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a recommendation index")
+        whole = memoryview(mapped)
+        offsets = [_HEADER_SIZE]
+        for length in (rows, rows, rows * k, rows * k):
+            offsets.append(offsets[-1] + 4 * length)
+        views = tuple(whole[start:end].cast("i") for start, end in zip(offsets, offsets[1:]))
+        whole.release()
+        self._release()
+        self._mmap, self._views = mapped, views
+        self._identity = identity
+        self.k, self.rows, self.watermark, self.built_at = k, rows, watermark, built_at
+        self.reloads += 1
+
+    def _fresh(self):
+        if time.monotonic() - self._checked_at >= self.reload_seconds:
+            self.reload()
+        return self._views
+
+    def _row(self, event_id: int):
+        event_ids = self._views[0]
+        row = bisect_left(event_ids, event_id)
+        return row if row < self.rows and event_ids[row] == event_id else None
+
+    def neighbours(self, event_id: int, limit: int = None):
+        """Return [(event_id, co_bookings, score)], best first; score is the share of this event's bookers."""
+        views = self._fresh()
+        self.lookups += 1
+        if not views:
+            return []
+        row = self._row(event_id)
+        if row is None:
+            return []
+        _, bookers, neighbours, co_bookings = views
+        base = row * self.k
+        result = []
+        for slot in range(base, base + min(limit or self.k, self.k)):
+            neighbour = neighbours[slot]
+            if neighbour == 0:
+                break
+            result.append((neighbour, co_bookings[slot], co_bookings[slot] / bookers[row]))
+        return result
+
+    def iter_rows(self):
+        """Yield every stored row in the format _write() takes."""
+        self._fresh()
+        event_ids, bookers, neighbours, co_bookings = self._views or ((),) * 4
+        for row in range(self.rows):
+            base = row * self.k
+            top = [(n, c) for n, c in zip(neighbours[base:base + self.k], co_bookings[base:base + self.k]) if n]
+            yield event_ids[row], bookers[row], top
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path, "loaded": bool(self._views), "rows": self.rows, "k": self.k,
+            "watermark": self.watermark, "built_at": self.built_at, "lookups": self.lookups, "reloads": self.reloads,
+        }
+
+recommendation_index = RecommendationIndex(RECOMMENDATIONS_INDEX_PATH)
+
+async def _iter_user_events(db: AsyncSession, watermark: int, user_ids=None):
+    """Yield each user's distinct most recent events, streaming bookings in user order."""
+    booking = models.Booking
+    query = (
+        select(booking.user_id, booking.event_id)
+        .where(booking.user_id.is_not(None), booking.event_id.is_not(None), booking.id <= watermark)
+        .order_by(booking.user_id, booking.id)
+        .execution_options(yield_per=BUILD_CHUNK_SIZE)
+    )
+    chunks = [None] if user_ids is None else [user_ids[i:i + _IN_CHUNK] for i in range(0, len(user_ids), _IN_CHUNK)]
+    pending_user, pending = None, []
+    for chunk in chunks:
+        result = await db.stream(query if chunk is None else query.where(booking.user_id.in_(chunk)))
+        async for rows in result.partitions():
+            for user_id, group in groupby(rows, key=itemgetter(0)):
+                if user_id == pending_user:
+                    pending.extend(map(itemgetter(1), group))
+                    continue
+                if pending_user is not None:
+                    yield pending_user, _recent_distinct(pending)
+                pending_user, pending = user_id, list(map(itemgetter(1), group))
+    if pending_user is not None:
+        yield pending_user, _recent_distinct(pending)
+
+def _recent_distinct(events):
+    return list(dict.fromkeys(reversed(events)))[:RECOMMENDATIONS_MAX_EVENTS_PER_USER]
+
+async def _co_bookings(db: AsyncSession, watermark: int, k: int, user_ids=None, targets=None):
+    """Top-k co-booked events for each target event (default: every booked event)."""
+    # Users with 2+ events as a CSR array: events of user u are flat[offsets[u]:offsets[u + 1]]
+    offsets, flat = array("q", [0]), array("i")
+    bookers = Counter()
+    async for _, events in _iter_user_events(db, watermark, user_ids):
+        bookers.update(events)
+        if len(events) > 1:
+            flat.extend(events)
+            offsets.append(len(flat))
+    if targets is None:
+        targets = bookers.keys()
+    members = {event_id: array("i") for event_id in targets}
+    for user in range(len(offsets) - 1):
+        for event_id in flat[offsets[user]:offsets[user + 1]]:
+            users = members.get(event_id)
+            if users is not None:
+                users.append(user)
+    rows = []
+    for event_id in sorted(members):
+        if not bookers[event_id]:
+            continue
+        counts = Counter(chain.from_iterable(flat[offsets[user]:offsets[user + 1]] for user in members[event_id]))
+        del counts[event_id]
+        rows.append((event_id, bookers[event_id], counts.most_common(k)))
+    return rows
+
+async def _max_booking_id(db: AsyncSession) -> int:
+    return (await db.execute(select(func.max(models.Booking.id)))).scalar() or 0
+
+async def _distinct_where_in(db: AsyncSession, column, filter_column, values):
+    found = set()
+    values = sorted(values)
+    for i in range(0, len(values), _IN_CHUNK):
+        found.update((await db.execute(
+            select(distinct(column)).where(filter_column.in_(values[i:i + _IN_CHUNK]), column.is_not(None))
+        )).scalars())
+    return found
+
+async def build_index(db: AsyncSession, path: str = RECOMMENDATIONS_INDEX_PATH, k: int = RECOMMENDATIONS_TOP_K):
+    started = time.perf_counter()
+    watermark = await _max_booking_id(db)
+    rows = await _co_bookings(db, watermark, k)
+    _write(path, k, watermark, rows)
+    report = {"mode": "full", "events": len(rows), "watermark": watermark,
+              "seconds": round(time.perf_counter() - started, 3), "bytes": os.path.getsize(path)}
+    logger.info("recommendation index built", extra=report)
+    return report
+
+async def refresh_index(db: AsyncSession, path: str = RECOMMENDATIONS_INDEX_PATH):
+    """Recompute only the events whose neighbours can have changed since the index was built."""
+    started = time.perf_counter()
+    current = RecommendationIndex(path, reload_seconds=0)
+    current.reload()
+    if not current.rows:
+        return await build_index(db, path)
+    booking = models.Booking
+    watermark = await _max_booking_id(db)
+    # Every event a user with new bookings ever booked gains or keeps pairs; no other row changes
+    new_users = set((await db.execute(
+        select(distinct(booking.user_id))
+        .where(booking.id > current.watermark - RECOMMENDATIONS_REFRESH_OVERLAP, booking.id <= watermark)
+        .where(booking.user_id.is_not(None))
+    )).scalars())
+    affected = await _distinct_where_in(db, booking.event_id, booking.user_id, new_users)
+    if len(affected) > RECOMMENDATIONS_REFRESH_MAX_FRACTION * current.rows:
+        return await build_index(db, path, current.k)
+    users = await _distinct_where_in(db, booking.user_id, booking.event_id, affected)
+    changed = {row[0]: row for row in await _co_bookings(db, watermark, current.k, sorted(users), affected)}
+    rows = [changed.pop(row[0], row) for row in current.iter_rows()]
+    rows = sorted(rows + list(changed.values()))
+    k = current.k
+    current._release()
+    _write(path, k, watermark, rows)
+    report = {"mode": "refresh", "events": len(rows), "recomputed": len(affected), "new_users": len(new_users),
+              "watermark": watermark, "seconds": round(time.perf_counter() - started, 3), "bytes": os.path.getsize(path)}
+    logger.info("recommendation index refreshed", extra=report)
+    return report
+
+async def _main(args):
+    async with database.get_async_sessionmaker()() as db:
+        report = await (refresh_index(db, args.path) if args.refresh else build_index(db, args.path, args.k))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the co-booking recommendation index.")
+    parser.add_argument("--refresh", action="store_true", help="only recompute events touched by new bookings")
+    parser.add_argument("--path", default=RECOMMENDATIONS_INDEX_PATH)
+    parser.add_argument("--k", type=int, default=RECOMMENDATIONS_TOP_K, help="neighbours kept per event (full build)")
+    asyncio.run(_main(parser.parse_args()))
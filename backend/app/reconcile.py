@@ -0,0 +1,113 @@
+"""Recompute event booking aggregates from the bookings table and report drift.
+
+The aggregates on `events` (tickets_sold, booking_count, last_booked_at) are
+maintained incrementally by the booking transaction. This job rebuilds them
+from scratch. It reports any event whose stored values disagree and, with
+--fix, overwrites them.
+
+Usage (from backend/):
+    python -m app.reconcile [--fix] [--max-report 100]
+"""
+import argparse
+import asyncio
+import json
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import database, models
+
+AGGREGATES = ("tickets_sold", "booking_count", "last_booked_at")
+
+def recounted(event):
+    """Correlated subqueries that recount one event's aggregates at the time the UPDATE runs."""
+    booking = models.Booking
+    of_event = booking.event_id == event.id
+    return {
+        "tickets_sold": select(func.coalesce(func.sum(booking.number_of_tickets), 0)).where(of_event).scalar_subquery(),
+        "booking_count": select(func.count(booking.id)).where(of_event).scalar_subquery(),
+        "last_booked_at": select(func.max(booking.booked_id)).where(of_event).scalar_subquery(),
+    }
+
+def booking_totals():
+    booking = models.Booking
+    return (
+        select(
+            booking.event_id,
+            func.sum(booking.number_of_tickets).label("tickets_sold"),
+            func.count(booking.id).label("booking_count"),
+            func.max(booking.booked_id).label("last_booked_at"),
+        )
+        .group_by(booking.event_id)
+        .subquery()
+    )
+
+async def reconcile_event_stats(db: AsyncSession, fix: bool = False, max_report: int = 100):
+    event = models.Event
+    totals = booking_totals()
+    actual = {
+        "tickets_sold": func.coalesce(totals.c.tickets_sold, 0),
+        "booking_count": func.coalesce(totals.c.booking_count, 0),
+        "last_booked_at": totals.c.last_booked_at,
+    }
+    # Compare in SQL so only drifted events come back; IS DISTINCT FROM treats NULLs as values
+    drifted = (await db.execute(
+        select(
+            event.id,
+            *(getattr(event, name) for name in AGGREGATES),
+            *(actual[name].label(f"actual_{name}") for name in AGGREGATES),
+        )
+        .outerjoin(totals, totals.c.event_id == event.id)
+        .where(or_(*(getattr(event, name).is_distinct_from(actual[name]) for name in AGGREGATES)))
+        .order_by(event.id)
+    )).all()
+    # Seat counts are reported but never rewritten: a mismatch there needs a human decision
+    seat_drift = (await db.execute(
+        select(func.count())
+        .select_from(event)
+        .outerjoin(totals, totals.c.event_id == event.id)
+        .where(event.capacity.is_not(None))
+        .where(event.remaining_seats != event.capacity - actual["tickets_sold"])
+    )).scalar_one()
+    events_checked = (await db.execute(select(func.count()).select_from(event))).scalar_one()
+
+    if fix and drifted:
+        # Recount inside the write rather than writing back the values read above, so a booking
+        # committed since the drift query isn't erased. Locking the row first makes the UPDATE's
+        # snapshot (READ COMMITTED) include any booking that held it; SQLite serializes writers anyway.
+        for row in drifted:
+            await db.execute(select(event.id).where(event.id == row.id).with_for_update())
+            await db.execute(
+                update(event)
+                .where(event.id == row.id)
+                .values(**recounted(event))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    def describe(row):
+        return {
+            "event_id": row.id,
+            **{
+                name: {"stored": getattr(row, name), "actual": getattr(row, f"actual_{name}")}
+                for name in AGGREGATES if getattr(row, name) != getattr(row, f"actual_{name}")
+            },
+        }
+
+    return {
+        "events_checked": events_checked,
+        "drifted": len(drifted),
+        "fixed": len(drifted) if fix else 0,
+        "seat_drift": seat_drift,
+        "drift": [describe(row) for row in drifted[:max_report]],
+        "drift_truncated": len(drifted) > max_report,
+    }
+
+async def _main(args):
+    async with database.get_async_sessionmaker()() as db:
+        report = await reconcile_event_stats(db, fix=args.fix, max_report=args.max_report)
+    print(json.dumps(report, indent=2, default=str))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute event booking aggregates and report drift.")
+    parser.add_argument("--fix", action="store_true", help="overwrite drifted aggregates")
+    parser.add_argument("--max-report", type=int, default=100)
+    asyncio.run(_main(parser.parse_args()))
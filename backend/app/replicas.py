@@ -0,0 +1,208 @@
+import asyncio
+import itertools
+import os
+import time
+from contextvars import ContextVar
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from . import database
+from .logs import get_logger
+
+logger = get_logger(__name__)
+
+# Replica routing settings (override through the environment)
+REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", "5"))
+REPLICA_HEALTH_TIMEOUT_SECONDS = float(os.getenv("REPLICA_HEALTH_TIMEOUT_SECONDS", "1"))
+# How long a replica that failed a query is skipped before being tried again
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "10"))
+# Upper bound on replication lag: for this long after a write, the client's reads go to the primary
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+WRITE_FENCE_COOKIE = "houzeful_write_fence"
+WRITE_FENCE_HEADER = "x-write-fence"
+
+class Replica:
+    __slots__ = ("name", "engine", "sessionmaker", "healthy", "down_until", "reads", "failures")
+
+    def __init__(self, url: str, engine):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.sessionmaker = database.create_async_sessionmaker(engine)
+        self.healthy = True
+        self.down_until = 0.0
+        self.reads = 0
+        self.failures = 0
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.down_until
+
+class ReplicaSet:
+    """Round-robin over the healthy read replicas, falling back to the primary.
+
+    A replica leaves the rotation when the periodic health check fails or a
+    query on it raises a connection error. It rejoins once a later health
+    check passes, or after REPLICA_RETRY_SECONDS for a passive failure.
+    """
+
+    def __init__(self):
+        self._engines = None
+        self._replicas = []
+        self._counter = itertools.count()
+        self._health_task = None
+        self.primary_reads = 0
+        self.fenced_reads = 0
+
+    @property
+    def replicas(self):
+        engines = database.get_replica_engines()
+        # Rebuilt whenever the engines are (e.g. after a lifespan restart disposed them)
+        if engines is not self._engines:
+            self._replicas = [Replica(url, engine) for url, engine in zip(database.DATABASE_REPLICA_URLS, engines)]
+            self._engines = engines
+        return self._replicas
+
+    def choose(self):
+        replicas = self.replicas
+        now = time.monotonic()
+        for _ in range(len(replicas)):
+            replica = replicas[next(self._counter) % len(replicas)]
+            if replica.available(now):
+                replica.reads += 1
+                return replica
+        self.primary_reads += 1
+        return None
+
+    def mark_down(self, replica: Replica, reason: str):
+        replica.failures += 1
+        replica.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        logger.warning("replica marked down", extra={"replica": replica.name, "reason": reason})
+
+    async def check(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), REPLICA_HEALTH_TIMEOUT_SECONDS)
+            healthy = True
+        except Exception:
+            healthy = False
+        if healthy != replica.healthy:
+            logger.warning("replica health changed", extra={"replica": replica.name, "healthy": healthy})
+        replica.healthy = healthy
+        if healthy:
+            replica.down_until = 0.0
+        else:
+            replica.failures += 1
+        return healthy
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(REPLICA_HEALTH_INTERVAL_SECONDS)
+
+    def start(self):
+        if self.replicas and self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "primary_reads": self.primary_reads,
+            "fenced_reads": self.fenced_reads,
+            "replicas": [
+                {"name": replica.name, "available": replica.available(now), "healthy": replica.healthy,
+                 "reads": replica.reads, "failures": replica.failures}
+                for replica in self.replicas
+            ],
+        }
+
+replica_set = ReplicaSet()
+
+# Read-your-writes: a commit that wrote anything marks the current request, and the
+# middleware hands the client a fence; reads carrying an unexpired fence use the primary
+_request_writes = ContextVar("request_writes", default=None)
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _committed(session):
+    marker = _request_writes.get()
+    if session.info.pop("wrote", False) and marker is not None:
+        marker["wrote"] = True
+
+@event.listens_for(Session, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("wrote", None)
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware that sets the write fence cookie/header on responses to writes."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not database.DATABASE_REPLICA_URLS:
+            return await self.app(scope, receive, send)
+        marker = {"wrote": False}
+        token = _request_writes.set(marker)
+
+        async def send_with_fence(message):
+            if message["type"] == "http.response.start" and marker["wrote"]:
+                fence = f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}"
+                headers = MutableHeaders(scope=message)
+                headers.append(WRITE_FENCE_HEADER, fence)
+                headers.append(
+                    "set-cookie",
+                    f"{WRITE_FENCE_COOKIE}={fence}; Max-Age={int(READ_YOUR_WRITES_SECONDS) + 1}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_fence)
+        finally:
+            _request_writes.reset(token)
+
+def recently_wrote(request: Request) -> bool:
+    # Browsers send the cookie back; other clients can echo the response header
+    fence = request.headers.get(WRITE_FENCE_HEADER) or request.cookies.get(WRITE_FENCE_COOKIE)
+    try:
+        return fence is not None and float(fence) > time.time()
+    except ValueError:
+        return False
+
+# Dependency for read-only routes: a replica session, or the primary when none is usable
+async def get_read_db(request: Request):
+    if recently_wrote(request):
+        replica_set.fenced_reads += 1
+        replica = None
+    else:
+        replica = replica_set.choose()
+    if replica is None:
+        async with database.get_async_sessionmaker()() as db:
+            yield db
+        return
+    async with replica.sessionmaker() as db:
+        db.info["replica"] = replica.name
+        try:
+            yield db
+        except (OperationalError, InterfaceError) as e:
+            replica_set.mark_down(replica, type(e).__name__)
+            raise
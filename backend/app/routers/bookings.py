@@ -53,33 +53,195 @@
 # #     return db.query(models.Booking).all()
 
 
-from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends
-from .. import models, schemas, database
-from typing import List
+from datetime import datetime
+from sqlalchemy import case, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from .. import fastjson, idempotency, models, schemas
+from typing import Annotated, List, Optional
 from ..database import get_db
+from ..replicas import get_read_db
 from ..auth import get_current_user
-from app.models import User
+from app.schemas import User
+from app.availability import publish_seats
+from app.http_cache import catalog_cache
+from app.jobs import job_queue
+from app.logs import get_logger
+from app.notifications import enqueue_booking_confirmation
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
+async def reserve_seats(db: AsyncSession, event_id: int, tickets: int, booked_at: Optional[datetime] = None):
+    # Single conditional UPDATE: the database row lock makes check-and-decrement atomic,
+    # so concurrent bookings for different events never wait on each other.
+    # The event's booking aggregates ride along in the same statement.
+    booked_at = booked_at or datetime.utcnow()
+    last_booked_at = models.Event.last_booked_at
+    result = await db.execute(
+        update(models.Event)
+        .where(models.Event.id == event_id)
+        .where(or_(models.Event.remaining_seats.is_(None), models.Event.remaining_seats >= tickets))
+        .values(
+            remaining_seats=models.Event.remaining_seats - tickets,
+            tickets_sold=models.Event.tickets_sold + tickets,
+            booking_count=models.Event.booking_count + 1,
+            # Transactions can commit out of order, so never move the timestamp backwards
+            last_booked_at=case(
+                (or_(last_booked_at.is_(None), last_booked_at < booked_at), booked_at), else_=last_booked_at
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        return
+    await db.rollback()
+    logger.info("seat reservation failed", extra={"event_id": event_id, "tickets": tickets})
+    if await db.get(models.Event, event_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Not enough seats available")
+
+def _booking_tables(include_archived: bool):
+    # Bookings of archived events live in bookings_archive; they are only read on request
+    return (models.Booking, models.ArchivedBooking) if include_archived else (models.Booking,)
+
 @router.get("/my", response_model=List[schemas.Booking])
-def get_bookings_by_user(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(models.Booking).filter(models.Booking.user_id == current_user.id).all()
+async def get_bookings_by_user(
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    if fastjson.FAST_JSON_RESPONSES:
+        rows = []
+        for model in _booking_tables(include_archived):
+            query = fastjson.select_fields(schemas.Booking, model).where(model.user_id == current_user.id)
+            rows.extend((await db.execute(query)).all())
+        body = fastjson.dumps(fastjson.row_dicts(fastjson.response_fields(schemas.Booking), rows))
+        return Response(content=body, media_type="application/json")
+    bookings = []
+    for model in _booking_tables(include_archived):
+        result = await db.execute(select(model).where(model.user_id == current_user.id))
+        bookings.extend(result.scalars().all())
+    return bookings
+
+@router.get("/my/details", response_model=schemas.BookingPage)
+async def get_booking_details_by_user(
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # joinedload pulls each booking's event into the same SELECT, so the page costs one query per table
+    items = []
+    for model in _booking_tables(include_archived):
+        query = (
+            select(model)
+            .options(joinedload(model.event))
+            .where(model.user_id == current_user.id)
+        )
+        if cursor is not None:
+            query = query.where(model.id > cursor)
+        result = await db.execute(query.order_by(model.id).limit(limit + 1))
+        items.extend(result.scalars().all())
+    # A booking moves in one transaction, so the two tables never hold the same id
+    items = sorted(items, key=lambda booking: booking.id)[:limit + 1]
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1].id
+    return {"items": items, "next_cursor": next_cursor}
+
+async def place_bookings(db: AsyncSession, user_id: int, requests: List[schemas.BookingCreate]):
+    booked_at = datetime.utcnow()
+    # Reserve in event id order so concurrent batches lock rows in the same order (no deadlocks)
+    for booking in sorted(requests, key=lambda item: item.event_id):
+        try:
+            await reserve_seats(db, booking.event_id, booking.number_of_tickets, booked_at)
+        except HTTPException as e:
+            if len(requests) > 1:
+                e.detail = f"{e.detail} (event {booking.event_id})"
+            raise
+    db_bookings = [
+        models.Booking(
+            user_id=user_id, event_id=booking.event_id, number_of_tickets=booking.number_of_tickets, booked_id=booked_at
+        )
+        for booking in requests
+    ]
+    db.add_all(db_bookings)
+    await db.flush()
+    # Committed with the bookings; the email goes out from a worker, off the request path
+    enqueue_booking_confirmation(db, db_bookings)
+    return db_bookings
+
+async def check_idempotency(db: AsyncSession, user_id: int, key: Optional[str], path: str, payload: str):
+    if key is None:
+        return None, None
+    idempotency.validate_key(key)
+    request_hash = idempotency.fingerprint(path, payload)
+    return request_hash, await idempotency.replay(db, user_id, key, request_hash)
+
+async def commit_bookings(
+    db: AsyncSession, user_id: int, key: Optional[str], request_hash: Optional[str], body: str, event_ids: List[int]
+):
+    if key is not None:
+        idempotency.remember(db, user_id, key, request_hash, status.HTTP_200_OK, body)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key committed first; answer with its response
+        await db.rollback()
+        stored = await idempotency.replay(db, user_id, key, request_hash) if key is not None else None
+        if stored is None:
+            raise
+        return stored
+    job_queue.notify()
+    # remaining_seats changed, so cached catalog pages are stale
+    catalog_cache.invalidate()
+    await publish_seats(db, event_ids)
+    return Response(content=body, media_type="application/json")
 
 @router.post("/", response_model=schemas.Booking)
-def create_booking(
+async def create_booking(
     booking: schemas.BookingCreate, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Annotated[Optional[str], Header()] = None,
 ):
+    request_hash, stored = await check_idempotency(
+        db, current_user.id, idempotency_key, "/bookings/", booking.model_dump_json()
+    )
+    if stored is not None:
+        return stored
     # Link booking to the current user (override any user_id in the request)
-    db_booking = models.Booking(
-        user_id=current_user.id,
-        event_id=booking.event_id,
-        number_of_tickets=booking.number_of_tickets if hasattr(booking, 'number_of_tickets') else 1
+    db_booking, = await place_bookings(db, current_user.id, [booking])
+    body = schemas.Booking.model_validate(db_booking, from_attributes=True).model_dump_json()
+    response = await commit_bookings(db, current_user.id, idempotency_key, request_hash, body, [db_booking.event_id])
+    logger.info("booking created", extra={"booking_id": db_booking.id, "event_id": db_booking.event_id,
+                                           "user_id": current_user.id, "tickets": db_booking.number_of_tickets})
+    return response
+
+@router.post("/batch", response_model=schemas.BookingBatch)
+async def create_bookings_batch(
+    batch: schemas.BookingBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Annotated[Optional[str], Header()] = None,
+):
+    # All-or-nothing: any event that can't be booked rolls back the whole batch
+    request_hash, stored = await check_idempotency(
+        db, current_user.id, idempotency_key, "/bookings/batch", batch.model_dump_json()
     )
-    db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-    return db_booking
+    if stored is not None:
+        return stored
+    db_bookings = await place_bookings(db, current_user.id, batch.items)
+    body = schemas.BookingBatch(
+        bookings=[schemas.Booking.model_validate(item, from_attributes=True) for item in db_bookings]
+    ).model_dump_json()
+    event_ids = [item.event_id for item in db_bookings]
+    response = await commit_bookings(db, current_user.id, idempotency_key, request_hash, body, event_ids)
+    logger.info("booking batch created", extra={"user_id": current_user.id, "bookings": len(db_bookings)})
+    return response
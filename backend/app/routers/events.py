@@ -1,25 +1,321 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from .. import models, schemas
+import base64
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+from starlette.background import BackgroundTask
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from .. import fastjson, models, schemas
+from ..availability import availability_broker, encode_message
+from ..changes import DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT, encode_changes, fetch_changes, fetch_snapshot
+from ..auth import get_current_organizer, get_optional_organizer
 from ..database import get_db
+from ..export import EXPORT_MEDIA_TYPES, stream_attendees
+from ..replicas import READ_YOUR_WRITES_SECONDS, get_read_db
+from ..http_cache import catalog_cache
+from ..ingest import BULK_BATCH_SIZE, BULK_MAX_BATCH_SIZE, BulkIngestor, iter_csv_records, iter_lines, iter_ndjson_records
+from ..logs import get_logger
+from ..recommendations import RECOMMENDATIONS_TOP_K, recommendation_index
+from ..search import highlights_html, search_statement
+
+logger = get_logger(__name__)
 
 router = APIRouter(
     prefix="/events",
     tags=["events"]
 )
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# GET /events answers with a plain list of events; the cursor for the next page travels in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_event_list = TypeAdapter(List[schemas.Event])
+
+# Cursors are opaque to clients: base64 of "<iso date>|<id>" of the last row seen
+def encode_cursor(date: datetime, event_id: int) -> str:
+    raw = f"{date.isoformat()}|{event_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        date_str, id_str = raw.split("|", 1)
+        return datetime.fromisoformat(date_str), int(id_str)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _event_page_query(
+    model,
+    cursor: Optional[str],
+    genre: Optional[str],
+    location: Optional[str],
+    language: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    as_rows: bool,
+):
+    # model is models.Event or models.ArchivedEvent; they share the listed columns
+    query = fastjson.select_fields(schemas.Event, model) if as_rows else select(model)
+    if genre is not None:
+        query = query.where(model.genre == genre)
+    if location is not None:
+        query = query.where(model.location == location)
+    if language is not None:
+        query = query.where(model.language == language)
+    if date_from is not None:
+        query = query.where(model.date >= date_from)
+    if date_to is not None:
+        query = query.where(model.date < date_to)
+    if cursor is not None:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.date, model.id) > tuple_(last_date, last_id))
+    return query.order_by(model.date, model.id)
+
+async def fetch_event_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    genre: Optional[str] = None,
+    location: Optional[str] = None,
+    language: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    as_rows: bool = False,
+    include_archived: bool = False,
+):
+    # as_rows selects plain column tuples in schemas.Event field order instead of ORM objects
+    filters = (cursor, genre, location, language, date_from, date_to, as_rows)
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(_event_page_query(models.Event, *filters).limit(limit + 1))
+    events = result.all() if as_rows else result.scalars().all()
+    if include_archived:
+        result = await db.execute(_event_page_query(models.ArchivedEvent, *filters).limit(limit + 1))
+        archived = result.all() if as_rows else result.scalars().all()
+        # Mid-archival an event can sit in both tables; the hot row wins
+        hot_ids = {event.id for event in events}
+        events = sorted(
+            [*events, *(event for event in archived if event.id not in hot_ids)],
+            key=lambda event: (event.date, event.id),
+        )[:limit + 1]
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].date, events[-1].id)
+    return {"items": events, "next_cursor": next_cursor}
+
+def encode_event_page(page, as_rows: bool = False) -> bytes:
+    # Only the items go in the body; callers send page["next_cursor"] as NEXT_CURSOR_HEADER
+    if as_rows:
+        return fastjson.dumps(fastjson.row_dicts(fastjson.response_fields(schemas.Event), page["items"]))
+    return _event_list.dump_json(_event_list.validate_python(page["items"], from_attributes=True))
+
 # GET /events
 @router.get("/", response_model=List[schemas.Event])
-def get_events(db: Session = Depends(get_db)):
-    events = db.query(models.Event).all()
-    return events
+async def get_events(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    genre: Optional[str] = None,
+    location: Optional[str] = None,
+    language: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_archived: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Served from the versioned response cache when possible; a 304 never touches the database
+    key = catalog_cache.key(request)
+    cached = catalog_cache.get(key)
+    if cached is not None:
+        return catalog_cache.respond(request, cached)
+    version = catalog_cache.version
+    as_rows = fastjson.FAST_JSON_RESPONSES
+    page = await fetch_event_page(
+        db, cursor, limit, genre, location, language, date_from, date_to, as_rows, include_archived
+    )
+    body = encode_event_page(page, as_rows)
+    headers = {NEXT_CURSOR_HEADER: page["next_cursor"]} if page["next_cursor"] is not None else {}
+    # A replica may not have replayed the write behind a recent invalidation; don't pin its answer
+    cacheable = not (db.info.get("replica") and catalog_cache.invalidated_within(READ_YOUR_WRITES_SECONDS))
+    return catalog_cache.respond(request, catalog_cache.store(key, version, body, cacheable, headers))
+
+# GET /events/stats (declared before the /{event_id} routes so "stats" is never read as an id)
+@router.get("/stats", response_model=schemas.EventStatsPage)
+async def get_event_stats(
+    ids: Optional[List[int]] = Query(None),
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    organizer: schemas.User = Depends(get_current_organizer),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Reads the aggregates stored on each event row; no scan of the bookings table
+    query = fastjson.select_fields(schemas.EventStats, models.Event).where(models.Event.organizer_id == organizer.id)
+    if ids:
+        query = query.where(models.Event.id.in_(ids))
+    if cursor is not None:
+        query = query.where(models.Event.id > cursor)
+    result = await db.execute(query.order_by(models.Event.id).limit(limit + 1))
+    items = result.all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1].id
+    return {"items": items, "next_cursor": next_cursor}
+
+# GET /events/changes
+@router.get("/changes", response_model=schemas.EventChanges)
+async def get_event_changes(
+    request: Request,
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # A replica may be up to READ_YOUR_WRITES_SECONDS behind, so its cursors settle that much later
+    lag = READ_YOUR_WRITES_SECONDS if db.info.get("replica") else 0.0
+    if since is not None:
+        return Response(content=encode_changes(await fetch_changes(db, since, limit, lag)), media_type="application/json")
+    # Without a cursor: the full snapshot every client starts from, cached with its compressed variants
+    key = catalog_cache.key(request)
+    cached = catalog_cache.get(key)
+    if cached is not None:
+        return catalog_cache.respond(request, cached)
+    version = catalog_cache.version
+    body = encode_changes(await fetch_snapshot(db, lag))
+    cacheable = not (db.info.get("replica") and catalog_cache.invalidated_within(READ_YOUR_WRITES_SECONDS))
+    return catalog_cache.respond(request, catalog_cache.store(key, version, body, cacheable))
+
+# POST /events/bulk
+@router.post("/bulk", response_model=schemas.BulkIngestReport)
+async def bulk_create_events(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=BULK_MAX_BATCH_SIZE),
+    upsert: bool = False,
+    organizer: Optional[schemas.User] = Depends(get_optional_organizer),
+    db: AsyncSession = Depends(get_db),
+):
+    # The body is parsed as it streams in; only the current batch is held in memory
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    lines = iter_lines(request.stream())
+    records = iter_csv_records(lines) if format == "csv" else iter_ndjson_records(lines)
+    # Anonymous feeds create unowned events and can only upsert unowned events
+    organizer_id = organizer.id if organizer is not None else None
+    ingestor = BulkIngestor(db, batch_size, upsert, organizer_id, on_batch_committed=catalog_cache.invalidate)
+    async for row, record, error in records:
+        await ingestor.add(row, record, error)
+    await ingestor.flush()
+    logger.info("bulk ingest finished", extra={k: v for k, v in ingestor.report.items() if k != "errors"})
+    return ingestor.report
+
+# GET /events/search
+@router.get("/search", response_model=List[schemas.EventSearchResult])
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    prefix: bool = True,
+    db: AsyncSession = Depends(get_read_db),
+):
+    dialect = db.bind.dialect.name
+    statement = search_statement(dialect, q, limit, prefix)
+    if statement is None:
+        return []
+    rows = (await db.execute(statement)).all()
+    results = []
+    for row in rows:
+        highlight, snippet = highlights_html(dialect, q, row.highlight, row.snippet)
+        results.append(schemas.EventSearchResult(
+            **schemas.Event.model_validate(row.Event, from_attributes=True).model_dump(),
+            rank=row.rank, highlight=highlight, snippet=snippet,
+        ))
+    return results
+
+# GET /events/{id}/availability/stream
+@router.get("/{event_id}/availability/stream")
+async def stream_availability(event_id: int, db: AsyncSession = Depends(get_read_db)):
+    # Server-Sent Events: the current seat count first, then one frame per booking change
+    subscription = availability_broker.subscribe(event_id)
+    try:
+        event = await db.get(models.Event, event_id)
+        if event is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+        snapshot = encode_message(subscription.seen, event.id, event.remaining_seats, event.capacity)
+    except BaseException:
+        subscription.close()
+        raise
+    finally:
+        # The stream never touches the database, so give the connection back now
+        await db.close()
+    return StreamingResponse(
+        subscription.stream(snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(subscription.close),
+    )
+
+# GET /events/{id}/bookings/export
+@router.get("/{event_id}/bookings/export")
+async def export_attendees(
+    event_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    organizer: schemas.User = Depends(get_current_organizer),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Streams from a server-side cursor: memory stays at one batch however many bookings the event has.
+    # Another organizer's event answers 404 like a missing one, so ids can't be probed
+    event = await db.get(models.Event, event_id)
+    if event is None or event.organizer_id != organizer.id:
+        raise HTTPException(status_code=404, detail="Event not found")
+    logger.info("attendee export started", extra={"event_id": event_id, "format": format, "user_id": organizer.id})
+    return StreamingResponse(
+        stream_attendees(db, event_id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="event-{event_id}-attendees.{format}"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+# GET /events/{id}/recommendations
+@router.get("/{event_id}/recommendations", response_model=List[schemas.EventRecommendation])
+async def get_recommendations(
+    event_id: int,
+    limit: int = Query(10, ge=1, le=RECOMMENDATIONS_TOP_K),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Neighbours come from the precomputed index; the database only supplies current event rows
+    neighbours = recommendation_index.neighbours(event_id)
+    result = await db.execute(select(models.Event).where(models.Event.id.in_([event_id, *(n[0] for n in neighbours)])))
+    events = {event.id: event for event in result.scalars()}
+    if event_id not in events:
+        raise HTTPException(status_code=404, detail="Event not found")
+    # Events deleted since the index was built are skipped
+    return [
+        schemas.EventRecommendation(
+            **schemas.Event.model_validate(events[neighbour], from_attributes=True).model_dump(),
+            co_bookings=co_bookings, score=score,
+        )
+        for neighbour, co_bookings, score in neighbours if neighbour in events
+    ][:limit]
 
 # POST /events
 @router.post("/", response_model=schemas.Event)
-def create_event(event: schemas.EventCreate, db: Session = Depends(get_db)):
-    new_event = models.Event(**event.dict())
+async def create_event(
+    event: schemas.EventCreate,
+    organizer: Optional[schemas.User] = Depends(get_optional_organizer),
+    db: AsyncSession = Depends(get_db),
+):
+    # Events created without signing in have no organizer, so they show up in nobody's stats
+    organizer_id = organizer.id if organizer is not None else None
+    new_event = models.Event(**event.dict(), remaining_seats=event.capacity, organizer_id=organizer_id)
     db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
+    await db.commit()
+    await db.refresh(new_event)
+    catalog_cache.invalidate()
+    logger.info("event created", extra={"event_id": new_event.id})
     return new_event
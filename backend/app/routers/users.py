@@ -19,17 +19,22 @@
 
 
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.auth import hash_password, verify_password, create_access_token
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth import hash_password, verify_password, password_needs_rehash, create_access_token
 from app.models import User
 from app import schemas
 from app.database import get_db
+from app.logs import get_logger
+from app.ratelimit import LOGIN_PER_EMAIL, LOGIN_PER_IP, REGISTER_PER_IP, client_ip, rate_limiter
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("/register", response_model=schemas.User)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, request: Request, db: AsyncSession = Depends(get_db)):
     # db_user = db.query(User).filter(User.email == user.email).first()
     # if db_user:
     #     raise HTTPException(status_code=400, detail="Email already registered")
@@ -39,26 +44,38 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     # db.commit()
     # db.refresh(new_user)
     # return new_user
-    db_user = db.query(User).filter(User.email == user.email).first()
+    # Rate limits run before any query or bcrypt work
+    await rate_limiter.hit(REGISTER_PER_IP, client_ip(request))
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hash_password(user.password)
     new_user = User(name=user.name, email=user.email, hashed_password=hashed_pw)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    logger.info("user registered", extra={"user_id": new_user.id})
     return new_user
 
 @router.post("/login", response_model=schemas.Token)
-def login(user: schemas.Login, db: Session = Depends(get_db)):
+async def login(user: schemas.Login, request: Request, db: AsyncSession = Depends(get_db)):
     # db_user = db.query(User).filter(User.email == user.email).first()
     # if not db_user or not verify_password(user.password, db_user.hashed_password):
     #     raise HTTPException(status_code=401, detail="Invalid credentials")
     # token = create_access_token(data={"sub": str(db_user.id)})
     # return {"access_token": token, "token_type": "bearer"}
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    # Rate limits run before any query or bcrypt work; per-email catches attempts spread over many IPs
+    await rate_limiter.hit(LOGIN_PER_IP, client_ip(request))
+    await rate_limiter.hit(LOGIN_PER_EMAIL, user.email.strip().lower())
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
+    if not db_user or not await verify_password(user.password, db_user.hashed_password):
+        logger.warning("login failed", extra={"user_id": db_user.id if db_user else None})
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    # Transparently upgrade hashes created with an outdated bcrypt cost
+    if password_needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = await hash_password(user.password)
+        await db.commit()
+        logger.info("password hash upgraded", extra={"user_id": db_user.id})
     # No need to specify expires_delta as it's now handled in the function
     token = create_access_token(data={"sub": str(db_user.id)})
     return {"access_token": token, "token_type": "bearer"}
@@ -106,7 +106,7 @@
 
 
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class UserCreate(BaseModel):
@@ -130,22 +130,74 @@ class EventBase(BaseModel):
     location: str
     date: datetime
     language: Optional[str] = None
+    capacity: Optional[int] = Field(None, ge=0)
+    external_id: Optional[str] = None
 
 class EventCreate(EventBase):
     pass
 
 class Event(EventBase):
     id: int
+    remaining_seats: Optional[int] = None
     created_at: datetime
 
     class Config:
         orm_mode = True
 
+# Catalog delta since a sync cursor; clients apply `deleted` first, then upsert `items`
+class EventChanges(BaseModel):
+    items: List[Event]
+    deleted: List[int]
+    next_cursor: str
+    has_more: bool
+
+# Booking aggregates for the organizer dashboard
+class EventStats(BaseModel):
+    id: int
+    title: str
+    date: datetime
+    capacity: Optional[int] = None
+    remaining_seats: Optional[int] = None
+    tickets_sold: int
+    booking_count: int
+    last_booked_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class EventStatsPage(BaseModel):
+    items: List[EventStats]
+    next_cursor: Optional[int] = None
+
+# Full-text search hit: the event plus its relevance and highlighted fragments
+class EventSearchResult(Event):
+    rank: float
+    highlight: Optional[str] = None
+    snippet: Optional[str] = None
+
+# "Also booked" neighbour: co_bookings users booked both; score is their share of this event's bookers
+class EventRecommendation(Event):
+    co_bookings: int
+    score: float
+
+# Outcome of a bulk ingestion request
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkIngestReport(BaseModel):
+    received: int
+    written: int
+    failed: int
+    batches: int
+    errors: List[BulkRowError]
+    errors_truncated: bool
+
 ##########################################
 # Booking schemas - Fixed to not require user_id since it comes from auth
 class BookingCreate(BaseModel):
     event_id: int
-    number_of_tickets: Optional[int] = 1
+    number_of_tickets: int = Field(1, ge=1)
 
 # Booking response
 class Booking(BaseModel):
@@ -157,6 +209,22 @@ class Booking(BaseModel):
     class Config:
         orm_mode = True
 
+# Several bookings placed in one all-or-nothing transaction
+class BookingBatchCreate(BaseModel):
+    items: List[BookingCreate] = Field(..., min_length=1, max_length=50)
+
+class BookingBatch(BaseModel):
+    bookings: List[Booking]
+
+# Booking with its event loaded in the same query
+class BookingWithEvent(Booking):
+    booked_id: Optional[datetime] = None
+    event: Event
+
+class BookingPage(BaseModel):
+    items: List[BookingWithEvent]
+    next_cursor: Optional[int] = None
+
 ###########################################
 # For login input
 class TokenData(BaseModel):
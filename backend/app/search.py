@@ -0,0 +1,156 @@
+import html
+import re
+from sqlalchemy import DDL, and_, case, event, func, literal_column, or_, select, table, column
+from . import models
+
+# Full-text index over events: an external-content FTS5 table kept in sync by triggers
+# on SQLite, a GIN expression index on PostgreSQL
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, description, genre, location,
+        content='events', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, genre, location)
+        VALUES (new.id, new.title, new.description, new.genre, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, genre, location)
+        VALUES ('delete', old.id, old.title, old.description, old.genre, old.location);
+    END""",
+    # Only the indexed columns re-index; seat counter updates on booking skip the FTS work
+    """CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF title, description, genre, location ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, genre, location)
+        VALUES ('delete', old.id, old.title, old.description, old.genre, old.location);
+        INSERT INTO events_fts(rowid, title, description, genre, location)
+        VALUES (new.id, new.title, new.description, new.genre, new.location);
+    END""",
+    "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+]
+# Merges the index segments; run after bulk deletes, whose tombstoned entries every MATCH still walks
+SQLITE_FTS_OPTIMIZE = "INSERT INTO events_fts(events_fts) VALUES ('optimize')"
+
+POSTGRES_DOCUMENT_SQL = (
+    "to_tsvector('simple'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '') "
+    "|| ' ' || coalesce(genre, '') || ' ' || coalesce(location, ''))"
+)
+POSTGRES_SEARCH_DDL = [f"CREATE INDEX IF NOT EXISTS ix_events_search ON events USING GIN ({POSTGRES_DOCUMENT_SQL})"]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(models.Event.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(models.Event.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    models.Event.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS events_fts").execute_if(dialect="sqlite"),
+)
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# The database wraps matches in these private-use characters; highlights_html() escapes the
+# text and only then turns them into <mark> tags, so event text can't inject markup
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+FULL_TEXT_DIALECTS = ("sqlite", "postgresql")
+# Characters of description kept around the first match when the ILIKE fallback builds a snippet
+FALLBACK_SNIPPET_CHARS = 120
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(q: str):
+    return _TOKEN.findall(q.lower())
+
+def sqlite_match_query(tokens, prefix: bool) -> str:
+    # Quote every token so user input can't inject FTS5 operators
+    terms = [f'"{token}"' for token in tokens]
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+def postgres_tsquery(tokens, prefix: bool) -> str:
+    terms = list(tokens)
+    if prefix:
+        terms[-1] += ":*"
+    return " & ".join(terms)
+
+def search_statement(dialect: str, q: str, limit: int, prefix: bool = True):
+    """Select (Event, rank, title highlight, description snippet) ordered by relevance.
+
+    Returns None when `q` has no searchable tokens. Dialects without a full-text index
+    fall back to an unindexed ILIKE scan; pass the rows through highlights_html() either way.
+    """
+    tokens = tokenize(q)
+    if not tokens:
+        return None
+    if dialect == "sqlite":
+        fts = table("events_fts", column("rowid"))
+        fts_ref = literal_column("events_fts")
+        # Title matches weigh most, then genre/location, then description
+        bm25 = func.bm25(fts_ref, 10.0, 1.0, 3.0, 3.0)
+        return (
+            select(
+                models.Event,
+                (-bm25).label("rank"),
+                func.highlight(fts_ref, 0, _MARK_START, _MARK_END).label("highlight"),
+                func.snippet(fts_ref, 1, _MARK_START, _MARK_END, "…", 16).label("snippet"),
+            )
+            .join_from(models.Event, fts, fts.c.rowid == models.Event.id)
+            .where(fts_ref.op("MATCH")(sqlite_match_query(tokens, prefix)))
+            .order_by(bm25)
+            .limit(limit)
+        )
+    if dialect == "postgresql":
+        document = literal_column(POSTGRES_DOCUMENT_SQL)
+        query = func.to_tsquery(literal_column("'simple'::regconfig"), postgres_tsquery(tokens, prefix))
+        rank = func.ts_rank_cd(document, query)
+        options = f"StartSel={_MARK_START}, StopSel={_MARK_END}"
+        return (
+            select(
+                models.Event,
+                rank.label("rank"),
+                func.ts_headline("simple", models.Event.title, query, options + ", HighlightAll=true").label("highlight"),
+                func.ts_headline(
+                    "simple", func.coalesce(models.Event.description, ""), query, options + ", MaxWords=24, MinWords=8"
+                ).label("snippet"),
+            )
+            .where(document.op("@@")(query))
+            .order_by(rank.desc())
+            .limit(limit)
+        )
+    return fallback_statement(tokens, limit)
+
+def fallback_statement(tokens, limit: int):
+    # Every token must appear in some column; titles containing more of them rank first
+    event = models.Event
+    columns = (event.title, event.description, event.genre, event.location)
+    rank = sum(case((event.title.icontains(token, autoescape=True), 1.0), else_=0.0) for token in tokens)
+    return (
+        select(event, rank.label("rank"), event.title.label("highlight"), event.description.label("snippet"))
+        .where(and_(*(or_(*(c.icontains(token, autoescape=True) for c in columns)) for token in tokens)))
+        .order_by(rank.desc(), event.date, event.id)
+        .limit(limit)
+    )
+
+def _mark(text: str, tokens) -> str:
+    pattern = re.compile("|".join(re.escape(token) for token in sorted(tokens, key=len, reverse=True)), re.IGNORECASE)
+    return pattern.sub(lambda match: f"{_MARK_START}{match.group()}{_MARK_END}", text)
+
+def _fallback_snippet(text: str) -> str:
+    start = max(text.find(_MARK_START) - FALLBACK_SNIPPET_CHARS // 2, 0)
+    end = start + FALLBACK_SNIPPET_CHARS
+    # Never cut through a marked match
+    while end < len(text) and text.rfind(_MARK_START, start, end) > text.rfind(_MARK_END, start, end):
+        end += 1
+    return ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+
+def _to_html(text):
+    if text is None:
+        return None
+    return html.escape(text).replace(_MARK_START, HIGHLIGHT_START).replace(_MARK_END, HIGHLIGHT_END)
+
+def highlights_html(dialect: str, q: str, highlight, snippet):
+    """Return a result row's (highlight, snippet) as HTML: matches in <mark>, everything else escaped."""
+    if dialect not in FULL_TEXT_DIALECTS:
+        tokens = tokenize(q)
+        highlight = _mark(highlight, tokens)
+        snippet = _fallback_snippet(_mark(snippet, tokens)) if snippet else snippet
+    return _to_html(highlight), _to_html(snippet)
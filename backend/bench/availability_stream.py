@@ -0,0 +1,168 @@
+"""Hold N concurrent seat-availability SSE streams and measure their cost.
+
+Opens N streams on GET /api/events/{id}/availability/stream by calling the
+real ASGI app directly. httpx's ASGI transport buffers whole bodies, so it
+can't hold a stream open. The benchmark reports:
+  * memory per open connection, from tracemalloc and RSS deltas;
+  * fan-out latency from one booking commit to the frame reaching every stream;
+  * coalescing under a burst of bookings, with a share of deliberately slow clients;
+  * cleanup after every client disconnects (no leaked subscribers).
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.availability_stream --subscribers 10000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import time
+import tracemalloc
+from datetime import datetime
+
+import httpx
+
+from bench.suite import bench_users, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("availability.db")
+
+from app.auth import create_access_token
+from app.availability import availability_broker
+from app.main import app
+
+CAPACITY = 1_000_000
+
+
+class Client:
+    """Minimal in-process SSE client: keeps only counters and the last data frame."""
+
+    __slots__ = ("disconnect", "connected", "frames", "last", "slow", "_requested")
+
+    def __init__(self, slow: bool):
+        self.disconnect = asyncio.Event()
+        self.connected = asyncio.Event()
+        self.frames = 0
+        self.last = None
+        self.slow = slow
+        self._requested = False
+
+    async def receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] != "http.response.body" or not message.get("body"):
+            return
+        if self.slow:
+            await asyncio.sleep(0.05)
+        for line in message["body"].split(b"\n"):
+            if line.startswith(b"data: "):
+                self.frames += 1
+                self.last = line[6:]
+        self.connected.set()
+
+    def remaining_seats(self):
+        return json.loads(self.last)["remaining_seats"]
+
+
+def scope(event_id: int):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": f"/api/events/{event_id}/availability/stream", "raw_path": b"", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"bench"), (b"accept", b"text/event-stream")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+
+
+def seed():
+    seed_database(DATABASE_URL, users=bench_users(1), events=[{
+        "title": "On-sale", "genre": "rock", "location": "Pune", "language": "en",
+        "date": datetime(2030, 1, 1), "capacity": CAPACITY, "remaining_seats": CAPACITY,
+    }])
+
+
+def rss_kb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() // 1024
+
+
+async def wait_until(predicate, timeout):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise SystemExit("timed out waiting for subscribers")
+        await asyncio.sleep(0.001)
+
+
+async def run(args):
+    gc.collect()
+    rss_before = rss_kb()
+    tracemalloc.start()
+    traced_before = tracemalloc.get_traced_memory()[0]
+
+    # Open the streams in waves so the snapshot queries don't all queue on the pool at once
+    clients, tasks = [], []
+    started = time.perf_counter()
+    for offset in range(0, args.subscribers, args.wave):
+        wave = [Client(slow=(offset + i) % 100 < args.slow_percent) for i in range(min(args.wave, args.subscribers - offset))]
+        for client in wave:
+            tasks.append(asyncio.create_task(app(scope(1), client.receive, client.send)))
+        await asyncio.gather(*(client.connected.wait() for client in wave))
+        clients.extend(wave)
+    connect_seconds = time.perf_counter() - started
+
+    gc.collect()
+    traced = tracemalloc.get_traced_memory()[0] - traced_before
+    tracemalloc.stop()
+    rss = rss_kb() - rss_before
+    print(f"subscribers={len(clients)} open in {connect_seconds:.2f}s  broker={availability_broker.stats()}")
+    print(f"memory per connection: tracemalloc={traced / len(clients) / 1024:.2f} KiB  rss={rss / len(clients):.2f} KiB")
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        # Fan-out latency: one booking, time until every fast stream has the new count
+        fast = [client for client in clients if not client.slow]
+        started = time.perf_counter()
+        (await http.post("/api/bookings/", json={"event_id": 1, "number_of_tickets": 1}, headers=headers)).raise_for_status()
+        await wait_until(lambda: all(client.frames >= 2 for client in fast), 60)
+        print(f"fan-out: booking commit to {len(fast)} fast streams in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        # Burst: slow clients should skip intermediate counts, yet all end on the final one
+        for _ in range(args.burst):
+            (await http.post("/api/bookings/", json={"event_id": 1, "number_of_tickets": 1}, headers=headers)).raise_for_status()
+        final = CAPACITY - 1 - args.burst
+        await wait_until(lambda: all(client.last is not None and client.remaining_seats() == final for client in clients), 60)
+        slow = [client for client in clients if client.slow]
+        print(f"burst of {args.burst}: every stream ends at remaining_seats={final}; "
+              f"frames per fast client={sum(c.frames for c in fast) / max(len(fast), 1):.1f}, "
+              f"per slow client={sum(c.frames for c in slow) / max(len(slow), 1):.1f} (coalesced)")
+
+    # Cleanup: every disconnect must release its subscription
+    started = time.perf_counter()
+    for client in clients:
+        client.disconnect.set()
+    await asyncio.gather(*tasks)
+    stats = availability_broker.stats()
+    print(f"disconnect: {len(clients)} streams closed in {(time.perf_counter() - started) * 1000:.1f}ms  broker={stats}")
+    if stats["subscribers"] or stats["topics"]:
+        raise SystemExit("leaked subscriptions after disconnect")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--wave", type=int, default=500)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--slow-percent", type=int, default=10, help="share of clients whose send() takes 50ms")
+    args = parser.parse_args()
+    seed()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
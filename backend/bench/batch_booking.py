@@ -0,0 +1,71 @@
+"""Benchmark batched vs. sequential bookings.
+
+Drives the real app in-process over httpx's ASGI transport: books K events
+with K sequential POST /api/bookings/ calls and with one POST
+/api/bookings/batch call, and reports time per group purchase. Also
+measures an Idempotency-Key replay.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.batch_booking --groups 200 --events-per-group 5
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+
+from bench.suite import bench_users, p50_p99, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("batch.db")
+
+from app.auth import create_access_token
+from app.main import app
+
+
+async def run(args):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    transport = httpx.ASGITransport(app=app)
+    results = {"sequential": [], "batch": [], "idempotent_replay": []}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for group in range(args.groups):
+            items = [
+                {"event_id": (group * args.events_per_group + i) % args.events + 1, "number_of_tickets": 1}
+                for i in range(args.events_per_group)
+            ]
+
+            started = time.perf_counter()
+            for item in items:
+                (await client.post("/api/bookings/", json=item, headers=headers)).raise_for_status()
+            results["sequential"].append(time.perf_counter() - started)
+
+            key = {"Idempotency-Key": f"group-{group}"}
+            started = time.perf_counter()
+            (await client.post("/api/bookings/batch", json={"items": items}, headers={**headers, **key})).raise_for_status()
+            results["batch"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            response = await client.post("/api/bookings/batch", json={"items": items}, headers={**headers, **key})
+            assert response.headers.get("idempotent-replayed") == "true"
+            results["idempotent_replay"].append(time.perf_counter() - started)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--events-per-group", type=int, default=5)
+    parser.add_argument("--events", type=int, default=500)
+    args = parser.parse_args()
+
+    seed_database(DATABASE_URL, users=bench_users(1), events=(
+        {"title": f"Event {i}", "location": "Mumbai", "date": datetime(2030, 1, 1)} for i in range(args.events)
+    ))
+
+    results = asyncio.run(run(args))
+    for name, samples in results.items():
+        print(f"{name:18s} {p50_p99([sample * 1000 for sample in samples])}  per {args.events_per_group}-event purchase")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Multi-threaded booking stress test.
+
+Hammers `routers.bookings.create_booking` from many threads against events
+with limited capacity, then checks that no event was oversold and reports
+bookings/sec.
+
+Usage (from backend/):
+    python -m bench.booking_stress --threads 32 --attempts 200 --events 4 --capacity 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app import models, schemas
+from app.database import create_async_db_engine, create_async_sessionmaker
+from app.routers import bookings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=200, help="booking attempts per thread")
+    parser.add_argument("--events", type=int, default=4)
+    parser.add_argument("--capacity", type=int, default=1000)
+    parser.add_argument("--max-tickets", type=int, default=4)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'stress.db')}"
+    connect_args = {"check_same_thread": False, "timeout": 30} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args, pool_size=args.threads, max_overflow=0)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        user = models.User(name="stress", email=f"stress-{time.time()}@example.com", hashed_password="x")
+        db.add(user)
+        event_ids = []
+        for i in range(args.events):
+            event = models.Event(
+                title=f"Stress {i}", location="Mumbai", date=datetime(2030, 1, 1),
+                capacity=args.capacity, remaining_seats=args.capacity,
+            )
+            db.add(event)
+            db.flush()
+            event_ids.append(event.id)
+        db.commit()
+        current_user = SimpleNamespace(id=user.id)
+
+    outcomes = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    async def book_many(seed, local):
+        # Each thread drives the real async handler on its own loop and engine
+        async_engine = create_async_db_engine(url, pool_size=1, max_overflow=0)
+        AsyncSession = create_async_sessionmaker(async_engine)
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(args.attempts):
+            request = schemas.BookingCreate(
+                event_id=rng.choice(event_ids), number_of_tickets=rng.randint(1, args.max_tickets)
+            )
+            async with AsyncSession() as db:
+                try:
+                    await bookings.create_booking(request, db=db, current_user=current_user)
+                    local["booked"] += 1
+                except HTTPException as exc:
+                    local[f"rejected_{exc.status_code}"] += 1
+        await async_engine.dispose()
+
+    def worker(seed):
+        local = Counter()
+        asyncio.run(book_many(seed, local))
+        with lock:
+            outcomes.update(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    oversold = 0
+    with Session() as db:
+        for event_id in event_ids:
+            event = db.get(models.Event, event_id)
+            sold = db.query(func.coalesce(func.sum(models.Booking.number_of_tickets), 0)).filter(
+                models.Booking.event_id == event_id
+            ).scalar()
+            if sold > event.capacity or event.remaining_seats != event.capacity - sold or event.remaining_seats < 0:
+                oversold += 1
+            # The incrementally maintained aggregate must match the recomputed sum
+            if event.tickets_sold != sold:
+                oversold += 1
+            print(f"event {event_id}: capacity={event.capacity} sold={sold} remaining={event.remaining_seats} "
+                  f"tickets_sold={event.tickets_sold} bookings={event.booking_count}")
+
+    attempts = args.threads * args.attempts
+    print(f"attempts={attempts} outcomes={dict(outcomes)}")
+    print(f"elapsed={elapsed:.2f}s  attempts/sec={attempts / elapsed:.0f}  bookings/sec={outcomes['booked'] / elapsed:.0f}")
+    if oversold:
+        raise SystemExit(f"FAIL: {oversold} event(s) oversold or inconsistent")
+    print("OK: zero oversell")
+
+
+if __name__ == "__main__":
+    main()
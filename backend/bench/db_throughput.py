@@ -0,0 +1,111 @@
+"""Database throughput comparison across engine configurations.
+
+Spawns N worker processes (standing in for uvicorn workers) that each run a
+read/write mix of the API's hot queries: paged event reads and atomic seat
+reservations plus booking inserts. Runs once per configuration and prints
+operations/sec so the SQLite default journal, tuned SQLite (WAL) and an
+optional PostgreSQL URL can be compared side by side.
+
+Usage (from backend/):
+    python -m bench.db_throughput --workers 4 --seconds 10
+    python -m bench.db_throughput --postgres-url postgresql+psycopg2://localhost/houzeful_bench
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from app import models
+from app.database import create_async_db_engine, create_async_sessionmaker, create_db_engine
+from app.routers.bookings import reserve_seats
+
+
+def prepare(url, sqlite_pragmas, events):
+    engine = create_db_engine(url, sqlite_pragmas=sqlite_pragmas)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"name": "bench", "email": "bench@example.com", "hashed_password": "x"}])
+        conn.execute(insert(models.Event), [
+            {"title": f"Event {i}", "location": "Mumbai", "date": start + timedelta(hours=i),
+             "capacity": 10 ** 9, "remaining_seats": 10 ** 9}
+            for i in range(events)
+        ])
+    engine.dispose()
+
+
+async def run_mix(url, sqlite_pragmas, seconds, write_ratio, events, seed):
+    engine = create_async_db_engine(url, sqlite_pragmas=sqlite_pragmas, pool_size=1, max_overflow=0)
+    Session = create_async_sessionmaker(engine)
+    rng = random.Random(seed)
+    reads = writes = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        async with Session() as db:
+            try:
+                if rng.random() < write_ratio:
+                    event_id = rng.randint(1, events)
+                    await reserve_seats(db, event_id, 1)
+                    db.add(models.Booking(user_id=1, event_id=event_id, number_of_tickets=1))
+                    await db.commit()
+                    writes += 1
+                else:
+                    await db.execute(select(models.Event).order_by(models.Event.date, models.Event.id).limit(50))
+                    reads += 1
+            except Exception:
+                await db.rollback()
+                errors += 1
+    await engine.dispose()
+    return reads, writes, errors
+
+
+def worker(url, sqlite_pragmas, seconds, write_ratio, events, seed, results):
+    results.put(asyncio.run(run_mix(url, sqlite_pragmas, seconds, write_ratio, events, seed)))
+
+
+def run(label, url, sqlite_pragmas, args):
+    prepare(url, sqlite_pragmas, args.events)
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(
+            target=worker, args=(url, sqlite_pragmas, args.seconds, args.write_ratio, args.events, i, results)
+        )
+        for i in range(args.workers)
+    ]
+    for proc in procs:
+        proc.start()
+    totals = [0, 0, 0]
+    for _ in procs:
+        for i, value in enumerate(results.get()):
+            totals[i] += value
+    for proc in procs:
+        proc.join()
+    reads, writes, errors = totals
+    print(f"{label:22s} reads/s={reads / args.seconds:9.0f}  writes/s={writes / args.seconds:8.0f}  errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"))
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    run("sqlite (default)", f"sqlite:///{os.path.join(tmp, 'default.db')}", False, args)
+    run("sqlite (WAL tuned)", f"sqlite:///{os.path.join(tmp, 'wal.db')}", True, args)
+    if args.postgres_url:
+        run("postgresql (pooled)", args.postgres_url, True, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Bytes on the wire and server CPU per catalog sync.
+
+Calls the real ASGI app directly and counts the raw response bytes, before
+any client-side decompression. CPU is process time spent inside the app
+call. It compares:
+  * paging the full list through GET /api/events/ (what a client without
+    delta sync downloads on every load);
+  * the full snapshot from GET /api/events/changes, cold (rendered and
+    compressed), warm (the cached, precompressed body) and revalidated (304);
+  * a delta sync from a client's cursor after a few bookings, catalog edits
+    and deletes.
+Each is measured with identity and every supported Content-Encoding.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.delta_sync --events 10000 --changed 50 --deleted 10
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from sqlalchemy import update
+
+from bench.suite import seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("delta_sync.db")
+os.environ["CHANGES_SETTLE_SECONDS"] = "0"
+
+import orjson
+
+from app import models
+from app.changes import delete_events
+from app.compression import ENCODINGS, brotli
+from app.database import get_async_sessionmaker
+from app.http_cache import catalog_cache
+from app.main import app
+
+
+def seed(events):
+    start = datetime(2030, 1, 1, 19, 0)
+    seed_database(DATABASE_URL, events=(
+        {"title": f"Live at the Arena vol. {i}", "description": f"An evening of music and stories, night {i}.",
+         "genre": ("rock", "jazz", "comedy")[i % 3], "location": ("Pune", "Mumbai", "Delhi")[i % 3],
+         "language": "en", "date": start + timedelta(hours=i), "capacity": 500, "remaining_seats": 500}
+        for i in range(events)
+    ))
+
+
+async def call(path, params=None, encoding="identity", headers=()):
+    """Return (status, headers, raw body, server CPU seconds) for one GET."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": urlencode(params or {}).encode(),
+        "headers": [(b"host", b"bench"), (b"accept-encoding", encoding.encode()),
+                    *((name.encode(), value.encode()) for name, value in headers)],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    response = {"body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        else:
+            response["body"] += message.get("body", b"")
+
+    started = time.process_time()
+    await app(scope, receive, send)
+    cpu = time.process_time() - started
+    return response["status"], response["headers"], response["body"], cpu
+
+
+def report(label, encoding, requests, wire_bytes, cpu):
+    print(f"{label:34s} {encoding:8s} {requests:5d} req {wire_bytes / 1024:10.1f} KiB {cpu * 1000:9.1f} ms CPU")
+
+
+async def full_list(encoding):
+    requests, wire, cpu, cursor = 0, 0, 0.0, None
+    while True:
+        params = {"limit": 200, **({"cursor": cursor} if cursor else {})}
+        status, headers, body, spent = await call("/api/events/", params, encoding)
+        requests, wire, cpu = requests + 1, wire + len(body), cpu + spent
+        cursor = headers.get("x-next-cursor")
+        if cursor is None:
+            return requests, wire, cpu
+
+
+def decompress(body, encoding):
+    return gzip.decompress(body) if encoding == "gzip" else brotli.decompress(body)
+
+
+async def change_catalog(changed, deleted, first_id):
+    async with get_async_sessionmaker()() as db:
+        ids = range(first_id, first_id + changed)
+        # Seat updates stand in for bookings; every other one is a catalog edit
+        await db.execute(update(models.Event).where(models.Event.id.in_(ids[::2]))
+                         .values(remaining_seats=models.Event.remaining_seats - 1))
+        await db.execute(update(models.Event).where(models.Event.id.in_(ids[1::2]))
+                         .values(description="Rescheduled: new doors time 20:00."))
+        await delete_events(db, range(first_id + changed, first_id + changed + deleted))
+        await db.commit()
+    catalog_cache.invalidate()
+
+
+async def run(args):
+    encodings = ("identity", *ENCODINGS)
+    async with app.router.lifespan_context(app):
+        await call("/api/events/changes")  # warm imports and the connection pool
+        for encoding in encodings:
+            catalog_cache.invalidate()
+            report("full list (paged /api/events/)", encoding, *await full_list(encoding))
+
+        for encoding in encodings:
+            catalog_cache.invalidate()
+            status, headers, body, cold = await call("/api/events/changes", encoding=encoding)
+            assert status == 200, status
+            report("snapshot, cold", encoding, 1, len(body), cold)
+            status, headers, body, warm = await call("/api/events/changes", encoding=encoding)
+            report("snapshot, warm (precompressed)", encoding, 1, len(body), warm)
+            status, _, body, revalidate = await call(
+                "/api/events/changes", encoding=encoding, headers=[("if-none-match", headers["etag"])]
+            )
+            assert status == 304, status
+            report("snapshot, revalidated (304)", encoding, 1, len(body), revalidate)
+        status, headers, body, _ = await call("/api/events/changes")
+        cursor = orjson.loads(body)["next_cursor"]
+
+        await change_catalog(args.changed, args.deleted, first_id=args.events // 2)
+        for encoding in encodings:
+            requests, wire, cpu, since = 0, 0, 0.0, cursor
+            while True:
+                status, headers, body, spent = await call("/api/events/changes", {"since": since}, encoding)
+                requests, wire, cpu = requests + 1, wire + len(body), cpu + spent
+                if "content-encoding" in headers:
+                    body = decompress(body, headers["content-encoding"])
+                page = orjson.loads(body)
+                since = page["next_cursor"]
+                if not page["has_more"]:
+                    break
+            report(f"delta ({len(page['items'])} upd, {len(page['deleted'])} del)", encoding, requests, wire, cpu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--changed", type=int, default=50)
+    parser.add_argument("--deleted", type=int, default=10)
+    args = parser.parse_args()
+    seed(args.events)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
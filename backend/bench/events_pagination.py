@@ -0,0 +1,116 @@
+"""Benchmark GET /api/events: full-table listing vs keyset pagination.
+
+Seeds a throwaway SQLite database with synthetic events and reports p50/p99
+latency (query + serialization) for the old `.all()` listing and for pages
+fetched through `routers.events.fetch_event_page`.
+
+Usage (from backend/):
+    python -m bench.events_pagination --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from bench.suite import percentile, seed_database
+
+from app import models, schemas
+from app.database import create_async_db_engine, create_async_sessionmaker
+from app.routers import events
+
+GENRES = ["rock", "jazz", "comedy", "theatre", "pop", "classical", "techno", "folk"]
+LOCATIONS = ["Mumbai", "Delhi", "Pune", "Bangalore", "Chennai", "Hyderabad", "Kolkata"]
+LANGUAGES = ["en", "hi", "mr", "ta", "te", "kn"]
+
+
+def seed(url, rows):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    seed_database(url, events=({
+        "title": f"Event {i}",
+        "description": "Synthetic benchmark event",
+        "genre": rng.choice(GENRES),
+        "location": rng.choice(LOCATIONS),
+        "language": rng.choice(LANGUAGES),
+        "date": start + timedelta(minutes=rng.randrange(0, 60 * 24 * 730)),
+        "created_at": start,
+    } for i in range(rows)))
+
+
+def measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(percentile(samples, 0.50), 2),
+        "p99_ms": round(percentile(samples, 0.99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-iterations", type=int, default=5)
+    parser.add_argument("--page-iterations", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=events.DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    started = time.perf_counter()
+    seed(f"sqlite:///{path}", args.rows)
+    print(f"seeded {args.rows} events in {time.perf_counter() - started:.1f}s")
+    engine = create_engine(f"sqlite:///{path}")
+
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    loop = asyncio.new_event_loop()
+    async_engine = create_async_db_engine(f"sqlite:///{path}")
+    async_db = create_async_sessionmaker(async_engine)()
+
+    def legacy():
+        rows = db.query(models.Event).all()
+        [schemas.Event.model_validate(row, from_attributes=True).model_dump_json() for row in rows]
+        db.expunge_all()
+
+    async def walk_pages(filters):
+        # Walk a few pages deep so cursor decoding is exercised too
+        cursor = None
+        for _ in range(3):
+            page = await events.fetch_event_page(async_db, cursor=cursor, limit=args.limit, **filters)
+            events.encode_event_page(page)
+            cursor = page["next_cursor"]
+        async_db.expunge_all()
+
+    def paged(**filters):
+        return lambda: loop.run_until_complete(walk_pages(filters))
+
+    no_filters = dict(genre=None, location=None, language=None, date_from=None, date_to=None)
+    results = {
+        "legacy_all": measure(legacy, args.legacy_iterations),
+        "keyset_page": measure(paged(**no_filters), args.page_iterations),
+        "keyset_page_genre_filter": measure(
+            paged(**{**no_filters, "genre": "jazz"}), args.page_iterations
+        ),
+        "keyset_page_date_range": measure(
+            paged(**{**no_filters, "date_from": datetime(2025, 6, 1), "date_to": datetime(2025, 7, 1)}),
+            args.page_iterations,
+        ),
+    }
+    db.close()
+    loop.run_until_complete(async_db.close())
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+    for name, result in results.items():
+        print(f"{name:28s} p50={result['p50_ms']:>10.2f}ms  p99={result['p99_ms']:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Stream a 1M-row attendee export and assert memory stays bounded.
+
+Seeds one event with N bookings, each joined to a user. It then drives
+GET /api/events/{id}/bookings/export through the real ASGI app, throwing
+every chunk away as it arrives, as a client writing to disk would. httpx's
+ASGI transport would buffer the whole body instead. For CSV and NDJSON it
+reports time to first byte, time to first row, throughput and peak
+anonymous RSS growth. It fails if RSS grows past --max-rss-mb or any row is missing.
+Finally it loads the same rows with .all() to show the memory a
+non-streaming export would need.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.export_stream --rows 1000000 --max-rss-mb 32
+"""
+import argparse
+import asyncio
+import gc
+import resource
+import time
+from datetime import datetime, timedelta
+
+from bench.suite import bench_users, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("export.db")
+
+from app.auth import create_access_token
+from app.database import get_async_sessionmaker
+from app.export import attendee_statement
+from app.main import app
+
+USERS = 100_000
+
+
+def seed(rows):
+    start = datetime(2025, 1, 1)
+    total = rows * 10 // 9 + 1
+    seed_database(
+        DATABASE_URL,
+        users=bench_users(USERS),
+        # Both events belong to user 1, who runs the export
+        events=({"id": event_id, "title": f"Event {event_id}", "location": "Pune", "date": datetime(2030, 1, 1),
+                 "organizer_id": 1} for event_id in (1, 2)),
+        # Event 1 is the big one; event 2's bookings are interleaved so the export must use the index
+        bookings=({"user_id": i % USERS + 1, "event_id": 1 if i % 10 else 2, "booked_id": start + timedelta(seconds=i),
+                   "number_of_tickets": i % 4 + 1} for i in range(total)),
+    )
+    # Every tenth booking went to event 2
+    return total - (total + 9) // 10
+
+
+def rss_mb():
+    # Anonymous RSS only: SQLite's mmap_size maps the database file, and those clean
+    # page-cache pages count towards total RSS without being memory the export holds
+    with open("/proc/self/statm") as statm:
+        _, resident, shared = statm.read().split()[:3]
+    return (int(resident) - int(shared)) * resource.getpagesize() / 1024 / 1024
+
+
+async def export(event_id, format, token):
+    path = f"/api/events/{event_id}/bookings/export"
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": f"format={format}".encode(),
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    stats = {"bytes": 0, "lines": 0, "chunks": 0, "first_byte": None, "first_row": None, "peak_rss": rss_mb()}
+    started = time.perf_counter()
+
+    async def receive():
+        # Never disconnects; a real client's disconnect cancels the stream
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            stats["status"] = message["status"]
+            return
+        body = message.get("body", b"")
+        if not body:
+            return
+        now = time.perf_counter() - started
+        stats["first_byte"] = stats["first_byte"] or now
+        stats["bytes"] += len(body)
+        stats["lines"] += body.count(b"\n")
+        stats["chunks"] += 1
+        if stats["lines"] > (format == "csv"):
+            stats["first_row"] = stats["first_row"] or now
+        stats["peak_rss"] = max(stats["peak_rss"], rss_mb())
+
+    await app(scope, receive, send)
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+async def run(args, expected):
+    token = create_access_token({"sub": "1"})
+    failures = []
+    async with app.router.lifespan_context(app):
+        for format in ("csv", "ndjson"):
+            gc.collect()
+            baseline = rss_mb()
+            stats = await export(1, format, token)
+            rows = stats["lines"] - (format == "csv")
+            growth = stats["peak_rss"] - baseline
+            print(f"{format:6s} rows={rows:,} bytes={stats['bytes'] / 1024 / 1024:.1f} MiB chunks={stats['chunks']} "
+                  f"ttfb={stats['first_byte'] * 1000:.1f}ms first_row={stats['first_row'] * 1000:.1f}ms "
+                  f"total={stats['seconds']:.1f}s ({rows / stats['seconds']:,.0f} rows/s) peak RSS +{growth:.1f} MiB")
+            if stats["status"] != 200 or rows != expected:
+                failures.append(f"{format}: status {stats['status']}, {rows} of {expected} rows")
+            if growth > args.max_rss_mb:
+                failures.append(f"{format}: RSS grew {growth:.1f} MiB (limit {args.max_rss_mb} MiB)")
+
+        gc.collect()
+        baseline = rss_mb()
+        async with get_async_sessionmaker()() as db:
+            rows = (await db.execute(attendee_statement(1))).all()
+            print(f".all() for comparison: {len(rows):,} rows held at once, RSS +{rss_mb() - baseline:.1f} MiB")
+            del rows
+    assert not failures, failures
+    print(f"PASS: peak RSS growth stayed under {args.max_rss_mb} MiB for every format")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-rss-mb", type=float, default=32)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    expected = seed(args.rows)
+    print(f"seeded {expected:,} bookings for the exported event in {time.perf_counter() - started:.1f}s")
+    asyncio.run(run(args, expected))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Check that the job queue's purge removes expired idempotency keys.
+
+Seeds idempotency keys that expired, expire later and have just been
+replayed, runs JobQueue.purge() and asserts that only the expired rows
+are gone and that a live key still replays. Exits non-zero on failure.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.idempotency_purge
+"""
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+from bench.suite import bench_users, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("idempotency.db")
+
+from app import idempotency
+from app.database import dispose_engines, get_async_sessionmaker
+from app.jobs import job_queue
+
+EXPIRED, LIVE = 500, 50
+
+
+def seed():
+    seed_database(DATABASE_URL, users=bench_users(1))
+    conn = sqlite3.connect(DATABASE_URL.removeprefix("sqlite:///"))
+    now = datetime.utcnow()
+    conn.executemany(
+        "INSERT INTO idempotency_keys (user_id, key, request_hash, status_code, response_body, created_at, expires_at) "
+        "VALUES (1, ?, 'hash', 201, '{}', ?, ?)",
+        [(f"expired-{i}", now - timedelta(days=2), now - timedelta(minutes=i + 1)) for i in range(EXPIRED)]
+        + [(f"live-{i}", now, now + timedelta(hours=1)) for i in range(LIVE)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def remaining():
+    conn = sqlite3.connect(DATABASE_URL.removeprefix("sqlite:///"))
+    keys = [key for key, in conn.execute("SELECT key FROM idempotency_keys")]
+    conn.close()
+    return keys
+
+
+async def main_async():
+    purged = await job_queue.purge()
+    async with get_async_sessionmaker()() as db:
+        replayed = await idempotency.replay(db, 1, "live-0", "hash")
+    await dispose_engines()
+    return purged, replayed
+
+
+def main():
+    seed()
+    purged, replayed = asyncio.run(main_async())
+    keys = remaining()
+    print(f"purged {purged['idempotency_keys']} of {EXPIRED} expired keys; {len(keys)} of {LIVE} live keys left")
+    ok = (
+        purged["idempotency_keys"] == EXPIRED
+        and sorted(keys) == sorted(f"live-{i}" for i in range(LIVE))
+        and replayed is not None
+    )
+    print("OK" if ok else "FAIL: purge removed the wrong idempotency keys")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Booking latency, throughput and delivery guarantees of the background job queue.
+
+Drives POST /api/bookings/ through the real ASGI app with the fake mail
+sink, and measures:
+  * booking latency while the sink takes 0 ms and then --mail-latency-ms
+    per message; with mail off the request path the two should match;
+  * queue throughput for a burst of --bookings concurrent bookings,
+    sampling the queue lag as it drains;
+  * retries, with the sink failing --failure-rate of sends;
+  * redelivery, with jobs claimed by a worker that "crashes" before
+    finishing them.
+It fails unless every booking's confirmation was sent at least once and
+no job ended up dead.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.job_queue --bookings 2000 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from bench.suite import bench_users, p50_p99, seed_database, throwaway_database
+
+# Short backoffs and polls keep the retry scenarios quick
+DATABASE_URL = throwaway_database(
+    "jobs.db", JOB_BACKOFF_BASE_SECONDS=0.05, JOB_BACKOFF_MAX_SECONDS=0.5, JOB_POLL_INTERVAL_SECONDS=0.1,
+    LOG_LEVEL="ERROR",
+)
+# Deliveries are checked against the fake sink's counts
+os.environ["MAIL_BACKEND"] = "fake"
+
+import httpx
+
+from app.auth import create_access_token
+from app.database import get_async_sessionmaker
+from app.jobs import claim, job_queue, queue_stats
+from app.mail import mailer
+from app.main import app
+
+USERS = 1000
+
+
+def seed(events):
+    seed_database(DATABASE_URL, users=bench_users(USERS), events=(
+        {"id": i, "title": f"Event {i}", "location": "Pune", "date": datetime(2030, 1, 1),
+         "capacity": 1_000_000, "remaining_seats": 1_000_000}
+        for i in range(1, events + 1)
+    ))
+
+
+async def book(client, tokens, count, events, concurrency):
+    """Book `count` tickets; return per-request latencies (ms) and the booking ids."""
+    latencies, booking_ids = [], []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with limit:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/bookings/", json={"event_id": i % events + 1, "number_of_tickets": 1},
+                headers={"authorization": f"Bearer {tokens[i % USERS]}"},
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+            booking_ids.append(response.json()["id"])
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return latencies, booking_ids
+
+
+async def drain(timeout=120):
+    """Wait until no job is pending; return the peak lag seen and the seconds taken."""
+    started, peak_lag = time.perf_counter(), 0.0
+    while time.perf_counter() - started < timeout:
+        async with get_async_sessionmaker()() as db:
+            stats = await queue_stats(db)
+        peak_lag = max(peak_lag, stats["lag_seconds"])
+        if stats["pending"] == 0:
+            return peak_lag, time.perf_counter() - started
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"queue did not drain in {timeout}s: {stats}")
+
+
+def delivered(booking_ids):
+    return all(mailer.deliveries.get(f"<booking-{booking_id}@houzeful>", 0) >= 1 for booking_id in booking_ids)
+
+
+async def run(args):
+    tokens = [create_access_token({"sub": str(user_id)}) for user_id in range(1, USERS + 1)]
+    job_queue.workers = args.workers
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            await book(client, tokens, 50, args.events, args.concurrency)  # warm up
+            await drain()
+
+            for latency_ms in (0, args.mail_latency_ms):
+                mailer.latency_ms = latency_ms
+                latencies, _ = await book(client, tokens, args.requests, args.events, concurrency=1)
+                await drain()
+                print(f"POST /bookings/ with mail taking {latency_ms:4.0f} ms: {p50_p99(latencies)}")
+            mailer.latency_ms = 0
+
+            mailer.clear()
+            succeeded = job_queue.succeeded
+            started = time.perf_counter()
+            latencies, booking_ids = await book(client, tokens, args.bookings, args.events, args.concurrency)
+            booked = time.perf_counter() - started
+            peak_lag, drained = await drain()
+            jobs = job_queue.succeeded - succeeded
+            print(f"burst: {args.bookings:,} bookings in {booked:.1f}s ({args.bookings / booked:,.0f}/s, "
+                  f"{p50_p99(latencies)}); queue drained {drained:.2f}s later")
+            print(f"  {jobs:,} jobs at {jobs / (booked + drained):,.0f} jobs/s with {args.workers} workers, "
+                  f"peak queue lag {peak_lag:.2f}s")
+            assert delivered(booking_ids)
+
+            mailer.clear()
+            mailer.failure_rate = args.failure_rate
+            retried = job_queue.retried
+            _, booking_ids = await book(client, tokens, args.flaky_bookings, args.events, args.concurrency)
+            _, drained = await drain()
+            mailer.failure_rate = 0
+            print(f"flaky sink ({args.failure_rate:.0%} of sends fail): {len(booking_ids)} bookings, "
+                  f"{job_queue.retried - retried} retries, {mailer.failed} failed sends, all sent in {drained:.2f}s: "
+                  f"{delivered(booking_ids)}")
+            assert delivered(booking_ids)
+
+            # A worker claims jobs and dies; they come back once the visibility timeout passes
+            mailer.clear()
+            await job_queue.stop()
+            _, booking_ids = await book(client, tokens, args.crashed_jobs, args.events, args.concurrency)
+            async with get_async_sessionmaker()() as db:
+                abandoned = await claim(db, "crashed-worker", args.crashed_jobs, visibility_timeout=1.0)
+            job_queue.start()
+            _, drained = await drain()
+            print(f"crashed worker: {len(abandoned)} claimed jobs abandoned, redelivered and sent within "
+                  f"{drained:.2f}s: {delivered(booking_ids)} ({mailer.stats()['duplicates']} duplicate emails)")
+            assert len(abandoned) == args.crashed_jobs and delivered(booking_ids)
+
+            async with get_async_sessionmaker()() as db:
+                final = await queue_stats(db)
+            print(f"final queue: {final}; workers: {job_queue.stats()}")
+            assert final["dead"] == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    # SQLite's busy-wait write lock is unfair: past a few concurrent writers some bookings wait seconds
+    parser.add_argument("--concurrency", type=int, default=4, help="bookings in flight during the burst")
+    parser.add_argument("--requests", type=int, default=200, help="sequential bookings per latency sample")
+    parser.add_argument("--mail-latency-ms", type=float, default=200)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--flaky-bookings", type=int, default=300)
+    parser.add_argument("--crashed-jobs", type=int, default=20)
+    args = parser.parse_args()
+    seed(args.events)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""HTTP load test against a real uvicorn server.
+
+Seeds a throwaway SQLite database, starts `app.main:app` under uvicorn and
+drives it with an asyncio httpx client at increasing concurrency levels,
+reporting sustained RPS and p50/p99 latency for catalog reads and
+authenticated "my bookings" reads. Run it on two commits to compare them.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.load_test --concurrency 50 200 800 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from bench.suite import bench_users, free_port, percentile, seed_database, throwaway_database
+
+from app.auth import create_access_token
+
+
+def seed(url, events, bookings):
+    start = datetime(2025, 1, 1)
+    seed_database(
+        url,
+        users=bench_users(1),
+        events=({"title": f"Event {i}", "location": "Mumbai", "genre": "rock", "date": start + timedelta(hours=i)}
+                for i in range(events)),
+        bookings=({"user_id": 1, "event_id": i % events + 1, "number_of_tickets": 1} for i in range(bookings)),
+    )
+
+
+async def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def drive(base_url, path, headers, concurrency, seconds):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "errors": errors,
+    }
+
+
+async def main_async(args, base_url, token):
+    await wait_until_up(base_url)
+    scenarios = {
+        "catalog": ("/api/events/?limit=20", {}),
+        "my_bookings": ("/api/bookings/my", {"Authorization": f"Bearer {token}"}),
+    }
+    for name, (path, headers) in scenarios.items():
+        for concurrency in args.concurrency:
+            result = await drive(base_url, path, headers, concurrency, args.seconds)
+            print(f"{name:12s} c={concurrency:<5d} rps={result['rps']:>8}  p50={result['p50_ms']:>8}ms  "
+                  f"p99={result['p99_ms']:>8}ms  errors={result['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--bookings", type=int, default=50)
+    args = parser.parse_args()
+
+    url = throwaway_database("load.db")
+    seed(url, args.events, args.bookings)
+    token = create_access_token({"sub": "1"})
+    port = free_port()
+    env = {**os.environ, "AUTO_MIGRATE": "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(args.workers), "--no-access-log"],
+        env=env,
+    )
+    try:
+        asyncio.run(main_async(args, f"http://127.0.0.1:{port}", token))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Per-request logging overhead: old print() debugging vs the queue-based JSON logger.
+
+The "before" case replays the prints get_current_user used to do on every
+authenticated request against a line-buffered file (how stdout behaves under
+a TTY or container log driver). The "after" cases log through app.logs with
+sampling on and off.
+
+Usage (from backend/):
+    python -m bench.logging_overhead --requests 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from app import logs
+
+SECRET_KEY = "yash"
+TOKEN = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJzdWIiOiIxIiwiZXhwIjoxNzAwMDAwMDAwfQ.signature"
+PAYLOAD = {"sub": "1", "exp": 1700000000}
+
+
+def before(n):
+    for _ in range(n):
+        print("Key used for decoding:", SECRET_KEY)
+        print("Token received:", TOKEN)
+        print("Decoded payload:", PAYLOAD)
+        print("User ID:", 1)
+        print("User found: someone@example.com")
+
+
+def after(n, logger, sampled):
+    token = logs.sampled_var.set(sampled)
+    try:
+        for _ in range(n):
+            logger.info("booking created", extra={"booking_id": 1, "event_id": 2, "user_id": 3, "tickets": 1})
+    finally:
+        logs.sampled_var.reset(token)
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    args = parser.parse_args()
+    n = args.requests
+
+    path = os.path.join(tempfile.mkdtemp(), "stdout.log")
+    with open(path, "w", buffering=1) as out, redirect_stdout(out):
+        print_seconds = timed(before, n)
+
+    sink = open(os.devnull, "w")
+    logs.configure_logging(stream=sink)
+    logger = logs.get_logger("app.bench")
+    logged_seconds = timed(after, n, logger, True)
+    sampled_out_seconds = timed(after, n, logger, False)
+    logs.shutdown_logging()
+    sink.close()
+
+    for name, seconds in (
+        ("print debugging (before)", print_seconds),
+        ("queue JSON logger, sampled in", logged_seconds),
+        ("queue JSON logger, sampled out", sampled_out_seconds),
+    ):
+        print(f"{name:34s} {seconds / n * 1e6:8.2f} us/request")
+    print(f"records dropped on full queue: {logs.DropOnFullQueueHandler.dropped}")
+
+
+if __name__ == "__main__":
+    main()
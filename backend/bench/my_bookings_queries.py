@@ -0,0 +1,80 @@
+"""Query-count check for GET /api/bookings/my/details.
+
+Seeds users with increasing numbers of bookings and asserts the endpoint
+issues the same number of SQL statements for each, i.e. no N+1 on
+Booking.event. Exits non-zero on failure.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.my_bookings_queries
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+import httpx
+from sqlalchemy import event
+
+from bench.suite import bench_users, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("queries.db")
+
+from app.auth import create_access_token
+from app.database import create_async_db_engine, create_async_sessionmaker, get_db
+from app.main import app
+from app.replicas import get_read_db
+
+BOOKING_COUNTS = [1, 10, 100]
+
+
+async def main_async(url):
+    engine = create_async_db_engine(url)
+    Session = create_async_sessionmaker(engine)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async def override_get_db():
+        async with Session() as db:
+            yield db
+
+    # Read routes take their session from get_read_db; both must use the instrumented engine
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    counts = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for user_id, bookings in enumerate(BOOKING_COUNTS, start=1):
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+            # Warm the authenticated-user cache so only the endpoint's own queries are counted
+            await client.get("/api/bookings/my/details", headers=headers)
+            statements.clear()
+            response = await client.get("/api/bookings/my/details", params={"limit": 200}, headers=headers)
+            response.raise_for_status()
+            assert len(response.json()["items"]) == bookings
+            counts[bookings] = len(statements)
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    return counts
+
+
+def main():
+    seed_database(
+        DATABASE_URL,
+        users=bench_users(len(BOOKING_COUNTS)),
+        events=({"title": f"Event {i}", "location": "Mumbai", "date": datetime(2030, 1, 1)}
+                for i in range(max(BOOKING_COUNTS))),
+        bookings=({"user_id": user_id, "event_id": i + 1, "number_of_tickets": 1}
+                  for user_id, bookings in enumerate(BOOKING_COUNTS, start=1) for i in range(bookings)),
+    )
+
+    counts = asyncio.run(main_async(DATABASE_URL))
+    for bookings, statements in counts.items():
+        print(f"{bookings:4d} bookings -> {statements} SQL statement(s)")
+    if not all(counts.values()):
+        sys.exit("FAIL: no statements recorded; the endpoint is not using the instrumented engine")
+    if len(set(counts.values())) != 1:
+        sys.exit("FAIL: statement count grows with the number of bookings")
+    print("OK: constant statement count")
+
+
+if __name__ == "__main__":
+    main()
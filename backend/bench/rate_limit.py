@@ -0,0 +1,98 @@
+"""Benchmark the login/register rate limiter.
+
+Part 1 times the limiter alone, per call:
+  * a hot key;
+  * 100k keys in rotation;
+  * a never-repeating key stream that keeps the store at its size cap, so every call evicts.
+Part 2 floods POST /api/users/login from one client through the real app
+over ASGI. It checks that attempts past the limit get 429 without reaching
+bcrypt, and compares their latency with attempts that do reach bcrypt.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.rate_limit --calls 500000 --attempts 200
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from bench.suite import p50_p99, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("rate_limit.db", LOG_LEVEL="ERROR")
+
+from app.hashing import password_hasher
+from app.main import app
+from app.ratelimit import LOGIN_PER_EMAIL, LOGIN_PER_IP, Limit, MemoryBackend, RateLimiter
+
+BUDGET_US = 50.0
+
+
+async def time_calls(limiter, limit, keys, calls):
+    hit = limiter.hit
+    started = time.perf_counter()
+    for i in range(calls):
+        await hit(limit, keys[i % len(keys)])
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def micro(calls):
+    # Generous limits so the allowed path (the one every legitimate request takes) is measured
+    limit = Limit("bench", 10**9, 10**6)
+    results = {}
+    limiter = RateLimiter(MemoryBackend(16, 200_000))
+    results["hot key"] = await time_calls(limiter, limit, ["203.0.113.7"], calls)
+    limiter = RateLimiter(MemoryBackend(16, 200_000))
+    keys = [f"10.{i >> 16}.{i >> 8 & 255}.{i & 255}" for i in range(100_000)]
+    results["100k keys"] = await time_calls(limiter, limit, keys, calls)
+    # Login-like refill keeps every bucket alive, so the store fills up and must evict
+    limiter = RateLimiter(MemoryBackend(16, 10_000))
+    results["unique keys at cap"] = await time_calls(
+        limiter, LOGIN_PER_EMAIL, [f"user{i}@bench.test" for i in range(calls)], calls
+    )
+    evictions = limiter.backend.stats()["evictions"]
+    for name, micros in results.items():
+        print(f"limiter {name:20s} {micros:6.2f} us/call")
+    print(f"  store at cap evicted {evictions} buckets, size stayed {limiter.backend.stats()['keys']}")
+    worst = max(results.values())
+    if worst >= BUDGET_US:
+        raise SystemExit(f"FAIL: limiter costs {worst:.2f}us per call (budget {BUDGET_US}us)")
+
+
+def seed():
+    seed_database(DATABASE_URL, users=[
+        {"name": "victim", "email": "victim@bench.test", "hashed_password": password_hasher.hash("correct horse")}
+    ])
+
+
+async def flood(attempts):
+    transport = httpx.ASGITransport(app=app, client=("198.51.100.9", 4000))
+    statuses, latencies = {}, {}
+    hashes_before = password_hasher.stats()["completed"]
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(attempts):
+            started = time.perf_counter()
+            response = await client.post("/api/users/login", json={"email": "victim@bench.test", "password": f"guess{i}"})
+            latencies.setdefault(response.status_code, []).append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    hashed = password_hasher.stats()["completed"] - hashes_before
+    print(f"login flood: {attempts} attempts from one IP -> {dict(sorted(statuses.items()))}")
+    print(f"  bcrypt checks run: {hashed} (per-email burst {LOGIN_PER_EMAIL.capacity}, per-IP burst {LOGIN_PER_IP.capacity})")
+    for code, samples in sorted(latencies.items()):
+        print(f"  status {code}: {p50_p99(samples)} over {len(samples)} requests")
+    if hashed != statuses.get(401, 0):
+        raise SystemExit("FAIL: rate-limited attempts reached bcrypt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500_000)
+    parser.add_argument("--attempts", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(micro(args.calls))
+    seed()
+    asyncio.run(flood(args.attempts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Exercise read/write routing with SQLite files as primary and replicas.
+
+The primary and two replica files start as copies. "Replication" happens
+only when this script copies the primary over the replicas, so replica lag
+is fully controlled. Through the real app (ASGI, lifespan included) it
+checks that:
+  * read-only routes round-robin over the replicas, and writes go to the primary;
+  * a client holding the write fence from its booking reads its own booking
+    from the primary, while a client without it sees the lagging replica;
+  * a replica that becomes unreachable leaves the rotation after a failed
+    health check and rejoins once it is back.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.read_replicas --reads 200
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+from bench.suite import bench_users, seed_database
+
+DIRECTORY = tempfile.mkdtemp()
+PRIMARY = os.path.join(DIRECTORY, "primary.db")
+REPLICAS = [os.path.join(DIRECTORY, "replica1", "replica.db"), os.path.join(DIRECTORY, "replica2", "replica.db")]
+HEALTH_INTERVAL = 0.2
+
+# The app reads its settings at import time, so configure the environment first
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{PRIMARY}",
+    "DATABASE_REPLICA_URLS": ",".join(f"sqlite:///{path}" for path in REPLICAS),
+    "REPLICA_HEALTH_INTERVAL_SECONDS": str(HEALTH_INTERVAL),
+    "REPLICA_RETRY_SECONDS": "1",
+    "AUTO_MIGRATE": "false",
+    "LOG_LEVEL": "ERROR",
+})
+
+from app.auth import create_access_token
+from app.database import get_replica_engines
+from app.main import app
+from app.replicas import WRITE_FENCE_HEADER, replica_set
+
+
+def seed(events):
+    seed_database(f"sqlite:///{PRIMARY}", users=bench_users(1), events=(
+        {"title": f"Show {i}", "genre": "rock", "location": "Pune", "language": "en",
+         "date": datetime(2030, 1, 1), "capacity": 100, "remaining_seats": 100, "organizer_id": 1}
+        for i in range(events)
+    ))
+
+
+def replicate():
+    """Bring every replica up to date with the primary (SQLite online backup)."""
+    source = sqlite3.connect(PRIMARY)
+    for path in REPLICAS:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        target = sqlite3.connect(path)
+        source.backup(target)
+        target.close()
+    source.close()
+
+
+def reads_by_target():
+    stats = replica_set.stats()
+    return {"primary": stats["primary_reads"], "fenced": stats["fenced_reads"], **{replica["name"].rsplit("/", 2)[-2]: replica["reads"] for replica in stats["replicas"]}}
+
+
+def delta(before, after):
+    return {name: after[name] - before[name] for name in after}
+
+
+async def run(args):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as writer, \
+                httpx.AsyncClient(transport=transport, base_url="http://bench") as stranger:
+            # Round-robin reads (/stats is uncached, so every request reaches a session)
+            before = reads_by_target()
+            for _ in range(args.reads):
+                (await stranger.get("/api/events/stats", params={"limit": 5}, headers=headers)).raise_for_status()
+            print(f"{args.reads} reads routed: {delta(before, reads_by_target())}")
+
+            # Write goes to the primary and hands back a fence
+            response = await writer.post("/api/bookings/", json={"event_id": 1, "number_of_tickets": 2}, headers=headers)
+            response.raise_for_status()
+            fence = response.headers.get(WRITE_FENCE_HEADER)
+            print(f"booking written to primary; fence header={fence} cookie={'set' if writer.cookies else 'missing'}")
+
+            before = reads_by_target()
+            own = (await writer.get("/api/bookings/my", headers=headers)).json()
+            routed = delta(before, reads_by_target())
+            other = (await stranger.get("/api/bookings/my", headers=headers)).json()
+            print(f"writer sees {len(own)} booking(s) via {routed}; client without the fence sees {len(other)} (replicas lag)")
+            assert len(own) == 1 and len(other) == 0, (own, other)
+            replicate()
+            caught_up = (await stranger.get("/api/bookings/my", headers=headers)).json()
+            print(f"after replication the other client sees {len(caught_up)} booking(s)")
+            assert len(caught_up) == 1
+
+            # Take replica2 away: new connections fail until its directory returns
+            hidden = os.path.dirname(REPLICAS[1]) + ".away"
+            await get_replica_engines()[1].dispose()
+            shutil.move(os.path.dirname(REPLICAS[1]), hidden)
+            started = time.perf_counter()
+            while replica_set.stats()["replicas"][1]["available"]:
+                await asyncio.sleep(0.01)
+            print(f"replica2 left the rotation {time.perf_counter() - started:.2f}s after going away")
+            before = reads_by_target()
+            for _ in range(args.reads):
+                (await stranger.get("/api/events/stats", params={"limit": 5}, headers=headers)).raise_for_status()
+            print(f"{args.reads} reads with replica2 down: {delta(before, reads_by_target())}")
+
+            shutil.move(hidden, os.path.dirname(REPLICAS[1]))
+            started = time.perf_counter()
+            while not replica_set.stats()["replicas"][1]["available"]:
+                await asyncio.sleep(0.01)
+            print(f"replica2 rejoined {time.perf_counter() - started:.2f}s after coming back")
+            before = reads_by_target()
+            for _ in range(args.reads):
+                (await stranger.get("/api/events/stats", params={"limit": 5}, headers=headers)).raise_for_status()
+            print(f"{args.reads} reads after recovery: {delta(before, reads_by_target())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--events", type=int, default=100)
+    args = parser.parse_args()
+    seed(args.events)
+    replicate()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
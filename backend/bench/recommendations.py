@@ -0,0 +1,157 @@
+"""Build time, lookup latency and refresh exactness of the co-booking index.
+
+Seeds a synthetic catalog in which users mostly book within one "taste
+cluster" of events. It then measures:
+  * a full build from N bookings (wall time, peak RSS growth, index size);
+  * lookup latency straight from the memory-mapped index, and through
+    GET /api/events/{id}/recommendations (which adds the event-row query);
+  * an incremental refresh after new bookings, timed against a full rebuild
+    and checked row-for-row against it;
+  * the share of recommended neighbours in the event's own cluster.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.recommendations --bookings 10000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sqlite3
+import time
+from datetime import datetime
+
+import httpx
+
+from bench.suite import p50_p99, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("recommendations.db")
+# The index lives next to the throwaway database
+INDEX_PATH = os.path.join(os.path.dirname(DATABASE_URL.removeprefix("sqlite:///")), "recommendations.idx")
+os.environ["RECOMMENDATIONS_INDEX_PATH"] = INDEX_PATH
+
+from app.database import get_async_sessionmaker
+from app.main import app
+from app.recommendations import RecommendationIndex, build_index, refresh_index
+
+CLUSTER_SIZE = 100
+BOOKINGS_PER_USER = 10
+IN_CLUSTER = 8
+
+
+def user_bookings(rng, user_id, events):
+    clusters = events // CLUSTER_SIZE
+    base = (user_id % clusters) * CLUSTER_SIZE
+    for _ in range(IN_CLUSTER):
+        yield user_id, base + rng.randrange(CLUSTER_SIZE) + 1, 1
+    for _ in range(BOOKINGS_PER_USER - IN_CLUSTER):
+        yield user_id, rng.randrange(events) + 1, 1
+
+
+def seed(bookings, events, rng):
+    seed_database(DATABASE_URL, events=(
+        {"id": i, "title": f"Event {i}", "location": "Pune", "date": datetime(2030, 1, 1),
+         "capacity": 1000, "remaining_seats": 1000}
+        for i in range(1, events + 1)
+    ))
+    users = bookings // BOOKINGS_PER_USER
+    # Tens of millions of rows: plain sqlite3 inserts them about twice as fast as seed_database()
+    conn = sqlite3.connect(DATABASE_URL.removeprefix("sqlite:///"))
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        "INSERT INTO bookings (user_id, event_id, number_of_tickets) VALUES (?, ?, ?)",
+        (row for user_id in range(1, users + 1) for row in user_bookings(rng, user_id, events)),
+    )
+    conn.commit()
+    conn.close()
+    return users
+
+
+def add_bookings(count, users, events, rng):
+    # Half from returning users, half from brand-new ones
+    conn = sqlite3.connect(DATABASE_URL.removeprefix("sqlite:///"))
+    rows = []
+    while len(rows) < count:
+        user_id = rng.randrange(1, users + 1) if len(rows) % 2 else users + 1 + len(rows)
+        rows.extend(list(user_bookings(rng, user_id, events))[:rng.randrange(1, BOOKINGS_PER_USER + 1)])
+    conn.executemany("INSERT INTO bookings (user_id, event_id, number_of_tickets) VALUES (?, ?, ?)", rows[:count])
+    conn.commit()
+    conn.close()
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentiles(samples_us):
+    return f"{p50_p99(samples_us, 'us')}  max {max(samples_us):8.2f}us"
+
+
+async def run(args, rng):
+    sessions = get_async_sessionmaker()
+    rss_before = max_rss_mb()
+    async with sessions() as db:
+        report = await build_index(db, INDEX_PATH, args.k)
+    print(f"full build: {report['seconds']:.1f}s for {args.bookings:,} bookings, {report['events']:,} events, "
+          f"index {report['bytes'] / 1024 / 1024:.1f} MiB, peak RSS +{max_rss_mb() - rss_before:.0f} MiB")
+
+    index = RecommendationIndex(INDEX_PATH)
+    index.reload()
+    samples = []
+    for _ in range(args.lookups):
+        event_id = rng.randrange(1, args.events + 1)
+        started = time.perf_counter_ns()
+        index.neighbours(event_id, 10)
+        samples.append((time.perf_counter_ns() - started) / 1000)
+    print(f"index lookup (mmap, k=10)       {percentiles(samples)}")
+
+    same_cluster = total = 0
+    for event_id in range(1, args.events + 1, max(1, args.events // 1000)):
+        for neighbour, _, _ in index.neighbours(event_id, 10):
+            total += 1
+            same_cluster += (neighbour - 1) // CLUSTER_SIZE == (event_id - 1) // CLUSTER_SIZE
+    print(f"neighbours in the event's own taste cluster: {same_cluster / max(total, 1):.1%}")
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            samples = []
+            for _ in range(args.requests):
+                started = time.perf_counter_ns()
+                response = await client.get(f"/api/events/{rng.randrange(1, args.events + 1)}/recommendations")
+                samples.append((time.perf_counter_ns() - started) / 1000)
+                response.raise_for_status()
+            print(f"GET /recommendations (ASGI)     {percentiles(samples)}")
+
+    add_bookings(args.new_bookings, args.bookings // BOOKINGS_PER_USER, args.events, rng)
+    async with sessions() as db:
+        report = await refresh_index(db, INDEX_PATH)
+    print(f"refresh after {args.new_bookings:,} new bookings: {report['seconds']:.2f}s "
+          f"({report['mode']}, {report.get('recomputed', report['events']):,} events recomputed)")
+    rebuilt_path = INDEX_PATH + ".full"
+    async with sessions() as db:
+        report = await build_index(db, rebuilt_path, args.k)
+    print(f"full rebuild for comparison: {report['seconds']:.1f}s")
+    refreshed, rebuilt = RecommendationIndex(INDEX_PATH), RecommendationIndex(rebuilt_path)
+    identical = list(refreshed.iter_rows()) == list(rebuilt.iter_rows())
+    print(f"refreshed index matches a full rebuild: {identical}")
+    assert identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=10_000_000)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--new-bookings", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(7)
+    started = time.perf_counter()
+    seed(args.bookings, args.events, rng)
+    print(f"seeded {args.bookings:,} bookings over {args.events:,} events in {time.perf_counter() - started:.1f}s")
+    asyncio.run(run(args, rng))
+
+
+if __name__ == "__main__":
+    main()
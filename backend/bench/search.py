@@ -0,0 +1,97 @@
+"""Benchmark full-text event search against a LIKE '%q%' scan.
+
+Seeds a throwaway SQLite database (the FTS5 index is maintained by the
+insert trigger, so seeding also measures incremental indexing cost) and
+compares p50/p99 for ranked FTS queries vs. the LIKE scan a naive search
+endpoint would run over title/description/genre/location.
+
+Usage (from backend/):
+    python -m bench.search --rows 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import sessionmaker
+
+from bench.suite import percentile, seed_database
+
+from app import models, search
+from app.database import create_db_engine
+
+WORDS = (
+    "jazz rock comedy theatre symphony techno folk indie acoustic orchestra stand-up improv "
+    "festival night live unplugged tribute classics legends sunset rooftop warehouse garden "
+    "premiere finale special tour session showcase"
+).split()
+LOCATIONS = ["Mumbai", "Delhi", "Pune", "Bangalore", "Chennai", "Hyderabad", "Kolkata"]
+QUERIES = ["jazz", "rooftop techno", "legen", "pune acoustic", "symphony finale", "warehouse"]
+
+
+def themed(rng, probability=0.05):
+    return [rng.choice(WORDS)] if rng.random() < probability else []
+
+
+def seed(url, rows):
+    rng = random.Random(7)
+    # A large filler vocabulary keeps themed query terms selective, as in a real catalog
+    filler = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 9))) for _ in range(20_000)]
+    start = datetime(2024, 1, 1)
+    seed_database(url, events=({
+        "title": " ".join(rng.choices(filler, k=2) + themed(rng)).title(),
+        "description": " ".join(rng.choices(filler, k=18) + themed(rng)),
+        "genre": rng.choice(WORDS[:8]),
+        "location": rng.choice(LOCATIONS),
+        "date": start + timedelta(minutes=rng.randrange(0, 60 * 24 * 730)),
+    } for _ in range(rows)), batch_size=20_000)
+
+
+def like_statement(q, limit):
+    clauses = []
+    for token in search.tokenize(q):
+        pattern = f"%{token}%"
+        clauses.append(or_(
+            models.Event.title.like(pattern), models.Event.description.like(pattern),
+            models.Event.genre.like(pattern), models.Event.location.like(pattern),
+        ))
+    # Newest-first like a real listing, which forces the scan to visit every row
+    return select(models.Event).where(*clauses).order_by(models.Event.date.desc()).limit(limit)
+
+
+def measure(db, build, iterations, limit):
+    samples = []
+    for i in range(iterations):
+        statement = build(QUERIES[i % len(QUERIES)], limit)
+        started = time.perf_counter()
+        db.execute(statement).all()
+        samples.append((time.perf_counter() - started) * 1000)
+        db.expunge_all()
+    return percentile(samples, 0.50), percentile(samples, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=60)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'search.db')}"
+    started = time.perf_counter()
+    seed(url, args.rows)
+    engine = create_db_engine(url)
+    print(f"seeded {args.rows} events (with FTS triggers) in {time.perf_counter() - started:.1f}s")
+
+    with sessionmaker(bind=engine)() as db:
+        fts = lambda q, limit: search.search_statement("sqlite", q, limit)
+        for name, build in (("fts5 ranked", fts), ("like scan", like_statement)):
+            p50, p99 = measure(db, build, args.iterations, args.limit)
+            print(f"{name:12s} p50={p50:9.2f}ms  p99={p99:9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Microbenchmark: Pydantic response_model serialization vs the orjson row fast path.
+
+For 1k/10k/100k rows it times the two list payloads both ways and checks
+the output is byte-identical. Bookings go through the real
+GET /api/bookings/my endpoint. Event pages go through fetch_event_page +
+encode_event_page, because the HTTP route caps page size.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.serialization --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from bench.suite import percentile, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("serialization.db")
+
+from app import fastjson
+from app.auth import create_access_token
+from app.database import get_async_sessionmaker
+from app.main import app
+from app.routers.events import encode_event_page, fetch_event_page
+
+
+def seed(sizes):
+    largest = max(sizes)
+    start = datetime(2025, 1, 1, 18, 30, 0, 123456)
+    seed_database(
+        DATABASE_URL,
+        users=({"name": f"user {size}", "email": f"user{size}@bench.test", "hashed_password": "x"} for size in sizes),
+        # Non-ASCII text, quotes and microsecond timestamps exercise encoder edge cases
+        events=({"title": f"Ñight «{i}» \"live\" ✨", "description": "Ünïcode – line\nbreak" if i % 2 else None,
+                 "genre": "jazz", "location": "Mumbai", "language": "hi", "date": start + timedelta(seconds=i),
+                 "capacity": 100 if i % 3 else None, "remaining_seats": 100 if i % 3 else None,
+                 "created_at": start + timedelta(microseconds=i)}
+                for i in range(largest)),
+        bookings=({"user_id": user_id, "event_id": i % largest + 1, "number_of_tickets": i % 4 + 1}
+                  for user_id, size in enumerate(sizes, start=1) for i in range(size)),
+    )
+
+
+def timed(samples, started):
+    samples.append((time.perf_counter() - started) * 1000)
+
+
+async def bench_bookings(client, user_id, iterations):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    results = {}
+    for fast in (False, True):
+        fastjson.FAST_JSON_RESPONSES = fast
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = await client.get("/api/bookings/my", headers=headers)
+            timed(samples, started)
+        results[fast] = (percentile(samples, 0.50), response.content)
+    return results
+
+
+async def bench_events(size, iterations):
+    results = {}
+    for fast in (False, True):
+        samples = []
+        for _ in range(iterations):
+            async with get_async_sessionmaker()() as db:
+                started = time.perf_counter()
+                body = encode_event_page(await fetch_event_page(db, limit=size, as_rows=fast), fast)
+                timed(samples, started)
+        results[fast] = (percentile(samples, 0.50), body)
+    return results
+
+
+async def run(sizes, iterations):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        for user_id, size in enumerate(sizes, start=1):
+            for name, results in (
+                ("bookings /my", await bench_bookings(client, user_id, iterations)),
+                ("events page", await bench_events(size, iterations)),
+            ):
+                (slow_ms, slow_body), (fast_ms, fast_body) = results[False], results[True]
+                identical = "identical" if slow_body == fast_body else "MISMATCH"
+                print(f"{name:13s} rows={size:<7d} pydantic={slow_ms:9.2f}ms  orjson={fast_ms:9.2f}ms  "
+                      f"speedup={slow_ms / fast_ms:5.2f}x  bytes={len(fast_body)} {identical}")
+                if slow_body != fast_body:
+                    raise SystemExit("fast path output differs from the Pydantic response")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    seed(args.sizes)
+    asyncio.run(run(args.sizes, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Measure import-to-ready time for the API.
+
+Runs each measurement several times in fresh processes:
+  * migrate: `python -m app.migrate` against an empty database, then again once
+    the schema is current (what every deploy pays);
+  * in-process: `import app.main`, then the lifespan startup (engine creation and
+    pool warmup), then the first successful readiness check;
+  * uvicorn: wall time from spawning `uvicorn --workers N` to the first 200 from
+    /health/ready.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.startup --runs 5 --workers 1 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench.suite import free_port
+
+# Runs in a child process so every import is cold
+IN_PROCESS = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from app import lifecycle
+async def main():
+    async with app.router.lifespan_context(app):
+        up = time.perf_counter()
+        ready, detail = await lifecycle.readiness()
+        assert ready, detail
+        done = time.perf_counter()
+    print(json.dumps({"import_ms": (imported - started) * 1000, "lifespan_ms": (up - imported) * 1000,
+                      "first_ready_ms": (done - up) * 1000, "import_to_ready_ms": (done - started) * 1000}))
+asyncio.run(main())
+"""
+
+
+def timed_run(command, env):
+    started = time.perf_counter()
+    subprocess.run(command, env=env, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - started) * 1000
+
+
+async def wait_ready(base_url, timeout=60):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/health/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.01)
+    raise RuntimeError("server did not become ready")
+
+
+def uvicorn_to_ready(env, workers):
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{port}"))
+        return (time.perf_counter() - started) * 1000
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summary(samples):
+    return f"median {statistics.median(samples):8.1f}ms  min {min(samples):8.1f}ms  max {max(samples):8.1f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    env = {**os.environ, "LOG_LEVEL": "WARNING", "AUTO_MIGRATE": "false"}
+    migrate_fresh, migrate_current = [], []
+    for run in range(args.runs):
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, f'startup{run}.db')}"
+        migrate_fresh.append(timed_run([sys.executable, "-m", "app.migrate"], env))
+        migrate_current.append(timed_run([sys.executable, "-m", "app.migrate"], env))
+    print(f"migrate (empty db)          {summary(migrate_fresh)}")
+    print(f"migrate (already current)   {summary(migrate_current)}")
+
+    phases = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, "-c", IN_PROCESS], env=env, check=True, capture_output=True, text=True)
+        phases.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    for name in ("import_ms", "lifespan_ms", "first_ready_ms", "import_to_ready_ms"):
+        print(f"in-process {name:17s} {summary([phase[name] for phase in phases])}")
+
+    for workers in args.workers:
+        samples = [uvicorn_to_ready(env, workers) for _ in range(args.runs)]
+        print(f"uvicorn --workers {workers:<2d} to ready {summary(samples)}")
+
+
+if __name__ == "__main__":
+    main()
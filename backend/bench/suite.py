@@ -0,0 +1,346 @@
+"""Reproducible load-testing suite for the Houzeful API.
+
+Seeds synthetic users, events and bookings into a throwaway SQLite file (or
+a Postgres database given with --database-url), then runs the catalog
+browse, login storm, booking rush and my-bookings scenarios against the
+real `app.main:app`. It runs either in-process over httpx's ASGITransport
+or over uvicorn with N workers. Each scenario reports RPS, p50/p95/p99,
+status counts and SQL queries per request (scraped from /metrics) as JSON,
+together with the git commit and settings, so runs compare across commits.
+The throwaway-database, seeding and percentile helpers below are shared by
+the single-purpose benches in this directory.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.suite --mode asgi --scale small --output before.json
+    python -m bench.suite --mode uvicorn --workers 4 --scale medium --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import islice
+
+import bcrypt
+import httpx
+from sqlalchemy import insert
+
+SCALES = {
+    "small": {"users": 1_000, "events": 5_000, "bookings": 20_000},
+    "medium": {"users": 20_000, "events": 100_000, "bookings": 500_000},
+    "large": {"users": 200_000, "events": 1_000_000, "bookings": 5_000_000},
+}
+PASSWORD = "bench-password"
+SCENARIOS = ("catalog_browse", "login_storm", "booking_rush", "my_bookings")
+# Metrics compared against a baseline: (field, higher is better)
+COMPARED = (("rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+
+
+def throwaway_database(filename, **settings):
+    """Point the app at a fresh SQLite file and return its URL.
+
+    The app reads its settings at import time, so call this before importing
+    app.main. `settings` (and LOG_LEVEL=WARNING) are environment defaults;
+    variables already set in the environment win.
+    """
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), filename)}"
+    os.environ["DATABASE_URL"] = url
+    for name, value in {"LOG_LEVEL": "WARNING", **settings}.items():
+        os.environ.setdefault(name, str(value))
+    return url
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def seed_database(url, users=(), events=(), bookings=(), batch_size=50_000):
+    """Migrate `url` to the current schema, then bulk-insert user, event and booking dicts.
+
+    Rows may be generators; they are inserted batch_size at a time in one transaction.
+    """
+    from app import migrate, models
+    from app.database import create_db_engine
+
+    # Same schema path as a deploy: migrations once, then the workers start with AUTO_MIGRATE off
+    migrate.upgrade(url)
+    engine = create_db_engine(url)
+    with engine.begin() as conn:
+        for model, rows in ((models.User, users), (models.Event, events), (models.Booking, bookings)):
+            for batch in batched(rows, batch_size):
+                conn.execute(insert(model), batch)
+    engine.dispose()
+
+
+def bench_users(count, hashed_password="x"):
+    """User rows 1..count with fan<id>@bench.test emails; ids match the tokens benches mint."""
+    return (
+        {"id": i, "name": f"Fan {i}", "email": f"fan{i}@bench.test", "hashed_password": hashed_password}
+        for i in range(1, count + 1)
+    )
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile, pct in [0, 1]; samples need not be sorted."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+
+def p50_p99(samples, unit="ms"):
+    return f"p50 {percentile(samples, 0.50):8.2f}{unit}  p99 {percentile(samples, 0.99):8.2f}{unit}"
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(url, users, events, bookings, rush_events, rush_capacity):
+    from app import migrate, models
+    from app.database import create_db_engine
+
+    engine = create_db_engine(url)
+    models.Base.metadata.drop_all(bind=engine)
+    migrate.version_metadata.drop_all(bind=engine)
+    engine.dispose()
+    rng = random.Random(1234)
+    # One real bcrypt hash shared by every user keeps seeding fast while logins still verify
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=int(os.getenv("BCRYPT_ROUNDS", "12")))).decode()
+    start = datetime(2025, 1, 1)
+    seed_database(
+        url,
+        users=({"name": f"User {i}", "email": f"user{i}@bench.test", "hashed_password": hashed} for i in range(users)),
+        # The first rush_events events have limited capacity for the booking rush
+        events=({
+            "title": f"Event {i}", "description": "Synthetic benchmark event",
+            "genre": rng.choice(["rock", "jazz", "comedy", "theatre"]),
+            "location": rng.choice(["Mumbai", "Delhi", "Pune", "Bangalore"]),
+            "language": rng.choice(["en", "hi"]),
+            "date": start + timedelta(minutes=rng.randrange(0, 60 * 24 * 730)),
+            "capacity": rush_capacity if i < rush_events else None,
+            "remaining_seats": rush_capacity if i < rush_events else None,
+        } for i in range(events)),
+        bookings=({
+            "user_id": rng.randint(1, users), "event_id": rng.randint(rush_events + 1, events), "number_of_tickets": 1,
+        } for _ in range(bookings)),
+    )
+
+
+def request_factory(name, args, tokens):
+    rng = random.Random(name)
+    if name == "catalog_browse":
+        filters = [{}, {"genre": "jazz"}, {"location": "Pune"}, {"language": "hi"}]
+        return lambda: ("GET", "/api/events/", {"params": {"limit": 50, **rng.choice(filters)}})
+    if name == "login_storm":
+        return lambda: ("POST", "/api/users/login", {
+            "json": {"email": f"user{rng.randrange(args.users)}@bench.test", "password": PASSWORD}
+        })
+    if name == "booking_rush":
+        return lambda: ("POST", "/api/bookings/", {
+            "json": {"event_id": rng.randint(1, args.rush_events), "number_of_tickets": rng.randint(1, 4)},
+            "headers": {"Authorization": f"Bearer {rng.choice(tokens)}"},
+        })
+    if name == "my_bookings":
+        return lambda: ("GET", "/api/bookings/my/details", {
+            "params": {"limit": 50}, "headers": {"Authorization": f"Bearer {rng.choice(tokens)}"},
+        })
+    raise ValueError(name)
+
+
+def scrape_queries(text):
+    """Sum of (queries, requests) across routes from the /metrics exposition."""
+    totals = {"sum": 0.0, "count": 0.0}
+    for kind, value in re.findall(r"^houzeful_http_request_queries_(sum|count)\{[^}]*\} (\S+)$", text, re.M):
+        totals[kind] += float(value)
+    return totals
+
+
+async def run_scenario(client, name, args, tokens):
+    make_request = request_factory(name, args, tokens)
+    before = scrape_queries((await client.get("/metrics")).text)
+    latencies, statuses = [], Counter()
+    deadline = time.perf_counter() + args.duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            method, path, kwargs = make_request()
+            started = time.perf_counter()
+            try:
+                statuses[(await client.request(method, path, **kwargs)).status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    after = scrape_queries((await client.get("/metrics")).text)
+
+    pick = lambda pct: round(percentile(latencies, pct) * 1000, 2) if latencies else None
+    requests = after["count"] - before["count"] - 1  # minus the first /metrics scrape
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "status_counts": {str(code): count for code, count in sorted(statuses.items(), key=str)},
+        # Note: with several uvicorn workers /metrics reflects whichever worker answered the scrape
+        "queries_per_request": round((after["sum"] - before["sum"]) / requests, 2) if requests > 0 else None,
+    }
+
+
+async def run_all(client, args, tokens):
+    results = {}
+    for name in args.scenarios:
+        results[name] = await run_scenario(client, name, args, tokens)
+        print(f"{name:15s} {json.dumps(results[name])}", file=sys.stderr)
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(args, tokens, env):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(args.workers), "--no-access-log", "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            for _ in range(150):
+                try:
+                    if (await client.get("/health/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.2)
+            else:
+                raise RuntimeError("uvicorn did not start")
+            return await run_all(client, args, tokens)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run_asgi(args, tokens):
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        return await run_all(client, args, tokens)
+
+
+def compare(results, baseline, tolerance):
+    for key in ("mode", "workers", "database", "dataset", "concurrency", "duration_seconds"):
+        if results["meta"].get(key) != baseline.get("meta", {}).get(key):
+            print(f"warning: baseline differs in {key}; results may not be comparable", file=sys.stderr)
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for field, higher_is_better in COMPARED:
+            old, new = previous.get(field), current.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            marker = "REGRESSION" if worse > tolerance else ""
+            print(f"{name:15s} {field:7s} {old:>10} -> {new:>10} ({change:+.1%}) {marker}", file=sys.stderr)
+            if marker:
+                regressions.append(f"{name}.{field}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--events", type=int)
+    parser.add_argument("--bookings", type=int)
+    parser.add_argument("--rush-events", type=int, default=5)
+    parser.add_argument("--rush-capacity", type=int, default=2_000)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON report of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+    for key, value in SCALES[args.scale].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'suite.db')}"
+    # The app reads its settings at import time, so configure the environment first.
+    # login_storm measures bcrypt throughput from a single client, so the login rate limit is off.
+    env = {**os.environ, "DATABASE_URL": url, "LOG_LEVEL": "WARNING", "RATE_LIMIT_ENABLED": "false",
+           "AUTO_MIGRATE": "false"}
+    os.environ.update(env)
+
+    started = time.perf_counter()
+    seed(url, args.users, args.events, args.bookings, args.rush_events, args.rush_capacity)
+    seed_seconds = round(time.perf_counter() - started, 2)
+
+    from app.auth import create_access_token
+    tokens = [create_access_token({"sub": str(user_id)}) for user_id in random.Random(5).sample(range(1, args.users + 1), min(500, args.users))]
+
+    if args.mode == "asgi":
+        scenarios = asyncio.run(run_asgi(args, tokens))
+    else:
+        scenarios = asyncio.run(run_uvicorn(args, tokens, env))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "database": url.split(":", 1)[0],
+            "dataset": {"users": args.users, "events": args.events, "bookings": args.bookings},
+            "seed_seconds": seed_seconds,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+        },
+        "scenarios": scenarios,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(f"regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Hot-path latency before and after moving past events to the archive tables.
+
+Seeds a five-year catalog, EVENTS_PER_DAY events a day up to a month
+ahead, each with bookings spread over a fixed pool of users. It then times
+the hot read paths through the real ASGI app, runs app.archive and times
+them again:
+  * the first page of upcoming events, with and without a genre filter;
+  * a frequent booker's GET /api/bookings/my;
+  * the full delta-sync snapshot (GET /api/events/changes);
+  * full-text search.
+The archive run is interrupted after --interrupt-after batches and
+resumed, to check that a partial run leaves the tables consistent. Every
+list, booking and count must match its pre-archive value when
+include_archived=true is set.
+
+Usage (from backend/, needs bench/requirements.txt):
+    python -m bench.tiering --years 5 --events-per-day 50 --bookings-per-event 10
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from bench.suite import bench_users, percentile, seed_database, throwaway_database
+
+DATABASE_URL = throwaway_database("tiering.db")
+
+import orjson
+
+from app.archive import archive_past_events
+from app.auth import create_access_token
+from app.database import get_async_sessionmaker
+from app.http_cache import catalog_cache
+from app.main import app
+
+USERS = 20_000
+GENRES = ("rock", "jazz", "comedy", "theatre", "classical")
+CITIES = ("Pune", "Mumbai", "Delhi", "Bengaluru")
+
+
+def seed(args, rng):
+    today = datetime.utcnow().replace(hour=19, minute=0, second=0, microsecond=0)
+    days = range(-args.years * 365, 31)
+    count = len(days) * args.events_per_day
+    seed_database(
+        DATABASE_URL,
+        users=bench_users(USERS),
+        events=({
+            "title": f"{GENRES[i % len(GENRES)].title()} night {i}",
+            "description": f"Live {GENRES[i % len(GENRES)]} in {CITIES[i % len(CITIES)]}",
+            "genre": GENRES[i % len(GENRES)], "location": CITIES[i % len(CITIES)], "language": "en",
+            "date": today + timedelta(days=day, minutes=i % args.events_per_day),
+            "capacity": 500, "remaining_seats": 500 - args.bookings_per_event,
+            "tickets_sold": args.bookings_per_event, "booking_count": args.bookings_per_event,
+            "created_at": today, "updated_at": today,
+        } for i, day in enumerate(day for day in days for _ in range(args.events_per_day))),
+        # User 1 is a regular who books a few events every week
+        bookings=({"user_id": 1 if j == 0 and event_id % 20 == 0 else rng.randrange(2, USERS + 1),
+                   "event_id": event_id, "booked_id": today, "number_of_tickets": 1}
+                  for event_id in range(1, count + 1) for j in range(args.bookings_per_event)),
+    )
+    return count
+
+
+async def call(path, params=None, token=None, headers=None):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": urlencode(params or {}).encode(),
+        "headers": [(b"host", b"bench"), *([(b"authorization", f"Bearer {token}".encode())] if token else [])],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    response = {"body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        else:
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    assert response["status"] == 200, (path, response)
+    if headers is not None:
+        headers.update(response["headers"])
+    return orjson.loads(response["body"])
+
+
+def hot_paths(token):
+    upcoming = {"date_from": datetime.utcnow().isoformat(), "limit": 50}
+    return {
+        "upcoming events, first page": ("/api/events/", upcoming, None),
+        "upcoming jazz, first page": ("/api/events/", {**upcoming, "genre": "jazz"}, None),
+        "GET /bookings/my (regular)": ("/api/bookings/my", {}, token),
+        "changes snapshot": ("/api/events/changes", {}, None),
+        "search 'jazz pune'": ("/api/events/search", {"q": "jazz pune"}, None),
+    }
+
+
+async def measure(token, requests):
+    timings = {}
+    for label, (path, params, auth) in hot_paths(token).items():
+        samples = []
+        for _ in range(requests):
+            # Measure the query, not the response cache
+            catalog_cache.invalidate()
+            started = time.perf_counter()
+            await call(path, params, auth)
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[label] = (percentile(samples, 0.50), percentile(samples, 0.99))
+    return timings
+
+
+async def everything(token):
+    """Every past and upcoming event id and the regular's bookings, read with include_archived=true."""
+    event_ids, cursor = [], None
+    while True:
+        params = {"limit": 200, "include_archived": "true", **({"cursor": cursor} if cursor else {})}
+        headers = {}
+        event_ids.extend(item["id"] for item in await call("/api/events/", params, headers=headers))
+        cursor = headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    bookings = await call("/api/bookings/my", {"include_archived": "true"}, token)
+    details, cursor = [], None
+    while True:
+        params = {"limit": 200, "include_archived": "true", **({"cursor": cursor} if cursor else {})}
+        page = await call("/api/bookings/my/details", params, token)
+        details.extend((item["id"], item["event"]["id"]) for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    return event_ids, sorted(booking["id"] for booking in bookings), details
+
+
+def table_counts():
+    conn = sqlite3.connect(DATABASE_URL.removeprefix("sqlite:///"))
+    counts = {table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+              for table in ("events", "bookings", "events_archive", "bookings_archive", "event_tombstones")}
+    orphans = conn.execute(
+        "SELECT count(*) FROM bookings_archive b LEFT JOIN events_archive e ON e.id = b.event_id WHERE e.id IS NULL"
+    ).fetchone()[0]
+    conn.close()
+    return counts, orphans
+
+
+async def run(args):
+    token = create_access_token({"sub": "1"})
+    sessions = get_async_sessionmaker()
+    async with app.router.lifespan_context(app):
+        await call("/api/events/")  # warm imports and the connection pool
+        before = await measure(token, args.requests)
+        expected = await everything(token)
+
+        async with sessions() as db:
+            partial = await archive_past_events(db, args.older_than_days, max_batches=args.interrupt_after)
+        # The archive job can't reach API caches; drop this process's so the checks below read the tables
+        catalog_cache.invalidate()
+        counts, orphans = table_counts()
+        print(f"interrupted after {partial['batches']} batches ({partial['seconds']:.1f}s): {counts}")
+        assert orphans == 0
+        assert await everything(token) == expected, "partial archive changed include_archived results"
+
+        async with sessions() as db:
+            resumed = await archive_past_events(db, args.older_than_days)
+        catalog_cache.invalidate()
+        counts, orphans = table_counts()
+        events, bookings = partial["events"] + resumed["events"], partial["bookings"] + resumed["bookings"]
+        seconds = partial["seconds"] + resumed["seconds"]
+        print(f"resumed: {resumed['batches']} more batches; {events:,} events and {bookings:,} bookings archived "
+              f"in {seconds:.1f}s ({bookings / seconds:,.0f} bookings/s), {resumed['deferred_events']} deferred")
+        print(f"tables after archiving: {counts}")
+        assert orphans == 0 and resumed["deferred_events"] == 0
+
+        after = await measure(token, args.requests)
+        assert await everything(token) == expected, "include_archived results differ after archiving"
+        print("include_archived=true returns every event and booking seen before archiving: True")
+
+    print(f"\n{'hot path':30s} {'before p50':>11s} {'p99':>9s} {'after p50':>11s} {'p99':>9s} {'speedup':>8s}")
+    for label, (p50, p99) in before.items():
+        after_p50, after_p99 = after[label]
+        print(f"{label:30s} {p50:9.2f}ms {p99:7.2f}ms {after_p50:9.2f}ms {after_p99:7.2f}ms {p50 / after_p50:7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--events-per-day", type=int, default=50)
+    parser.add_argument("--bookings-per-event", type=int, default=10)
+    parser.add_argument("--older-than-days", type=int, default=30)
+    parser.add_argument("--interrupt-after", type=int, default=20, help="batches before the simulated interruption")
+    parser.add_argument("--requests", type=int, default=50, help="requests per hot path and phase")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    events = seed(args, random.Random(7))
+    print(f"seeded {events:,} events and {events * args.bookings_per_event:,} bookings "
+          f"in {time.perf_counter() - started:.1f}s")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()